@@ -29,11 +29,15 @@ with warnings.catch_warnings():
     warnings.filterwarnings('ignore', category=DeprecationWarning)
     import paramiko
 from .version import __version__
-from .account import Account, AccountPool
+from .account import Account, AccountPool, TokenBucket, ConcurrencyLimit
 from .key import PrivateKey
 from .queue import Queue
+from .connectionpool import ConnectionPool
+from .resolver import Resolver
+from .metrics import Metrics
 from .host import Host
-from .logger import Logger, FileLogger
+from .logger import Logger, FileLogger, BufferedFileLogger, \
+        TranscriptLogger
 
 import inspect
 __all__ = [name for name, obj in list(locals().items())
@@ -24,11 +24,14 @@
 Manages user accounts.
 """
 from builtins import object
-import multiprocessing
-from collections import deque, defaultdict
+import time
+import weakref
+from collections import deque, defaultdict, OrderedDict
 from .util.cast import to_list
 from .util.event import Event
-from .util.impl import Context
+from .util.impl import Context, monotonic
+from .util.sync import get_backend
+from .util import timing
 
 
 class Account(object):
@@ -42,7 +45,8 @@ class Account(object):
                  password='',
                  password2=None,
                  key=None,
-                 needs_lock=True):
+                 needs_lock=True,
+                 sync=None):
         """
         Constructor.
 
@@ -65,6 +69,10 @@ class Account(object):
         .. warning::
             Setting `lock` to True drastically degrades performance!
 
+        The lock is a threading primitive by default. Pass
+        sync='multiprocessing' if the account is shared with forked
+        processes; see :class:`Exscript.util.sync`.
+
         :type  name: str
         :param name: A username.
         :type  password: str
@@ -75,6 +83,8 @@ class Account(object):
         :param key: A private key, if required.
         :type needs_lock: bool
         :param needs_lock: True if the account will be locked during login.
+        :type  sync: str|Exscript.util.sync.SyncBackend
+        :param sync: The backend that provides the lock.
         """
         self.acquired_event = Event()
         self.released_event = Event()
@@ -83,9 +93,32 @@ class Account(object):
         self.password = password
         self.authorization_password = password2
         self.key = key
-        self.synclock = multiprocessing.Condition(multiprocessing.Lock())
-        self.lock = multiprocessing.Lock()
+        self.sync = get_backend(sync)
+        self.lock = self.sync.lock()
         self.needs_lock = needs_lock
+        self._hash = object.__hash__(self)
+
+    def __hash__(self):
+        # Copies that were sent to another process keep the hash, so that
+        # they can still be acquired from the parent's account manager.
+        return self._hash
+
+    def __getstate__(self):
+        # Events and locks are local to a process; a copy gets new ones.
+        state = self.__dict__.copy()
+        for name in ('acquired_event', 'released_event', 'changed_event',
+                     'lock'):
+            del state[name]
+        state['sync'] = self.sync.name
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.acquired_event = Event()
+        self.released_event = Event()
+        self.changed_event = Event()
+        self.sync = get_backend(state['sync'])
+        self.lock = self.sync.lock()
 
     def __enter__(self):
         if self.needs_lock:
@@ -113,12 +146,9 @@ class Account(object):
         """
         if not self.needs_lock:
             return
-        with self.synclock:
-            while not self.lock.acquire(False):
-                self.synclock.wait()
-            if signal:
-                self.acquired_event(self)
-            self.synclock.notify_all()
+        self.lock.acquire()
+        if signal:
+            self.acquired_event(self)
 
     def release(self, signal=True):
         """
@@ -131,11 +161,11 @@ class Account(object):
         """
         if not self.needs_lock:
             return
-        with self.synclock:
-            self.lock.release()
+        try:
             if signal:
                 self.released_event(self)
-            self.synclock.notify_all()
+        finally:
+            self.lock.release()
 
     def set_name(self, name):
         """
@@ -397,62 +427,268 @@ class LoggerProxy(object):
         self.parent.send(('log-succeeded', (self.logger_id, job_id)))
 
 
+class AccountPolicy(object):
+
+    """
+    Base class for policies that throttle how fast accounts are
+    acquired from an :class:`AccountPool`; for example, to protect the
+    authentication server that is used by the accounts of the pool.
+    Policies also keep track of the time that was spent waiting.
+    """
+
+    def __init__(self, sync=None):
+        """
+        Constructor.
+
+        :type  sync: str|Exscript.util.sync.SyncBackend
+        :param sync: The backend that provides the locks.
+        """
+        self.lock = get_backend(sync).lock()
+        self.n_acquired = 0
+        self.n_waited = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def _wait(self):
+        """
+        Blocks until the policy permits another acquisition.
+        Returns True if it had to wait, False otherwise.
+        """
+        raise NotImplementedError()
+
+    def acquire(self):
+        """
+        Waits until the policy permits another account to be acquired.
+
+        :rtype:  float
+        :return: The number of seconds that were spent waiting.
+        """
+        start = monotonic()
+        waited = self._wait()
+        elapsed = monotonic() - start
+        with self.lock:
+            self.n_acquired += 1
+            if waited:
+                self.n_waited += 1
+                self.wait_time += elapsed
+                self.max_wait = max(self.max_wait, elapsed)
+        return elapsed
+
+    def release(self):
+        """
+        Called when an account that was acquired under this policy is
+        released.
+        """
+        pass
+
+    def get_metrics(self):
+        """
+        Returns the number of acquisitions, the number of acquisitions
+        that had to wait, and the total and maximum wait time in seconds.
+
+        :rtype:  dict
+        :return: Maps 'acquired', 'waited', 'wait_time' and 'max_wait'.
+        """
+        with self.lock:
+            return {'acquired': self.n_acquired,
+                    'waited': self.n_waited,
+                    'wait_time': self.wait_time,
+                    'max_wait': self.max_wait}
+
+
+class TokenBucket(AccountPolicy):
+
+    """
+    Limits the rate at which accounts are acquired, e.g. to at most 20
+    logins per second. Up to `burst` acquisitions are permitted at once
+    after a quiet period.
+    """
+
+    def __init__(self, rate, burst=1, sync=None):
+        """
+        Constructor.
+
+        :type  rate: float
+        :param rate: The permitted number of acquisitions per second.
+        :type  burst: int
+        :param burst: The size of the bucket.
+        :type  sync: str|Exscript.util.sync.SyncBackend
+        :param sync: The backend that provides the locks.
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError('rate and burst must be positive')
+        AccountPolicy.__init__(self, sync)
+        self.rate = float(rate)
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = monotonic()
+
+    def _wait(self):
+        # Takes a token, going into debt if the bucket is empty. The
+        # debt is the time until the token is available, so concurrent
+        # callers are served in order without waking each other up.
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.burst,
+                              self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            delay = -self.tokens / self.rate
+        if delay <= 0:
+            return False
+        time.sleep(delay)
+        return True
+
+
+class ConcurrencyLimit(AccountPolicy):
+
+    """
+    Limits the number of accounts that are acquired at the same time,
+    e.g. to at most 50 concurrent logins against one TACACS server.
+    """
+
+    def __init__(self, max_concurrent, sync=None):
+        """
+        Constructor.
+
+        :type  max_concurrent: int
+        :param max_concurrent: The maximum number of acquired accounts.
+        :type  sync: str|Exscript.util.sync.SyncBackend
+        :param sync: The backend that provides the locks.
+        """
+        if max_concurrent < 1:
+            raise ValueError('max_concurrent must be positive')
+        AccountPolicy.__init__(self, sync)
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self.cond = get_backend(sync).condition()
+
+    def _wait(self):
+        with self.cond:
+            waited = self.active >= self.max_concurrent
+            while self.active >= self.max_concurrent:
+                self.cond.wait()
+            self.active += 1
+        return waited
+
+    def release(self):
+        with self.cond:
+            self.active -= 1
+            self.cond.notify()
+
+
 class AccountPool(object):
 
     """
     This class manages a collection of available accounts.
     """
 
-    def __init__(self, accounts=None):
+    def __init__(self, accounts=None, sync=None, policies=None):
         """
         Constructor.
 
         :type  accounts: Account|list[Account]
         :param accounts: Passed to add_account()
+        :type  sync: str|Exscript.util.sync.SyncBackend
+        :param sync: The backend that provides the locks.
+        :type  policies: AccountPolicy|list[AccountPolicy]
+        :param policies: Passed to add_policy()
         """
         self.accounts = set()
-        self.unlocked_accounts = deque()
+        self.hash2account = {}
+        self.name2account = defaultdict(OrderedDict)
+        self.account2name = {}
+        # Used as an ordered set, to take accounts in a round-robin fashion.
+        self.unlocked_accounts = OrderedDict()
         self.owner2account = defaultdict(list)
         self.account2owner = {}
-        self.unlock_cond = multiprocessing.Condition(multiprocessing.RLock())
+        self.sync = get_backend(sync)
+        self.lock = self.sync.rlock()
+        self.waiters = deque()  # Waiting for any account.
+        self.account_waiters = defaultdict(deque)  # Map account to waiters.
+        self.policies = []
+        self.account2policies = {}
         if accounts:
             self.add_account(accounts)
+        if policies:
+            self.add_policy(policies)
+
+    def _wait(self, waiters):
+        # Waits until a release wakes us up. Each waiter has its own
+        # condition, so a release wakes exactly one of them.
+        cond = self.sync.condition(self.lock)
+        waiters.append(cond)
+        try:
+            cond.wait()
+        finally:
+            if cond in waiters:
+                waiters.remove(cond)
+
+    def _notify(self, account):
+        # Passes the given, unlocked account to the next waiter. Threads
+        # that wait for this particular account take precedence.
+        waiters = self.account_waiters.get(account)
+        if waiters:
+            waiters.popleft().notify()
+            if not waiters:
+                del self.account_waiters[account]
+        elif self.waiters:
+            self.waiters.popleft().notify()
+
+    def _release_policies(self, account):
+        for policy in self.account2policies.pop(account, ()):
+            policy.release()
 
     def _on_account_acquired(self, account):
-        with self.unlock_cond:
+        with self.lock:
             if account not in self.accounts:
                 msg = 'attempt to acquire unknown account %s' % account
                 raise Exception(msg)
             if account not in self.unlocked_accounts:
                 raise Exception('account %s is already locked' % account)
-            self.unlocked_accounts.remove(account)
-            self.unlock_cond.notify_all()
+            del self.unlocked_accounts[account]
         return account
 
     def _on_account_released(self, account):
-        with self.unlock_cond:
+        with self.lock:
             if account not in self.accounts:
                 msg = 'attempt to acquire unknown account %s' % account
                 raise Exception(msg)
             if account in self.unlocked_accounts:
                 raise Exception('account %s should be locked' % account)
-            self.unlocked_accounts.append(account)
+            self.unlocked_accounts[account] = None
             owner = self.account2owner.get(account)
             if owner is not None:
                 self.account2owner.pop(account)
                 self.owner2account[owner].remove(account)
-            self.unlock_cond.notify_all()
+            self._release_policies(account)
+            self._notify(account)
         return account
 
+    def _index_name(self, account):
+        name = account.get_name()
+        self.account2name[account] = name
+        self.name2account[name][account] = None
+
+    def _unindex_name(self, account):
+        name = self.account2name.pop(account)
+        accounts = self.name2account[name]
+        del accounts[account]
+        if not accounts:
+            del self.name2account[name]
+
+    def _on_account_changed(self, account):
+        with self.lock:
+            if account in self.accounts:
+                self._unindex_name(account)
+                self._index_name(account)
+
     def get_account_from_hash(self, account_hash):
         """
         Returns the account with the given hash, or None if no such
         account is included in the account pool.
         """
-        for account in self.accounts:
-            if account.__hash__() == account_hash:
-                return account
-        return None
+        return self.hash2account.get(account_hash)
 
     def has_account(self, account):
         """
@@ -471,13 +707,18 @@ class AccountPool(object):
         :type  accounts: Account|list[Account]
         :param accounts: The account to be added.
         """
-        with self.unlock_cond:
+        with self.lock:
             for account in to_list(accounts):
+                if account in self.accounts:
+                    continue
                 account.acquired_event.listen(self._on_account_acquired)
                 account.released_event.listen(self._on_account_released)
+                account.changed_event.listen(self._on_account_changed)
                 self.accounts.add(account)
-                self.unlocked_accounts.append(account)
-            self.unlock_cond.notify_all()
+                self.hash2account[account.__hash__()] = account
+                self._index_name(account)
+                self.unlocked_accounts[account] = None
+                self._notify(account)
 
     def _remove_account(self, accounts):
         """
@@ -492,18 +733,31 @@ class AccountPool(object):
                 raise Exception('account %s should be unlocked' % account)
             account.acquired_event.disconnect(self._on_account_acquired)
             account.released_event.disconnect(self._on_account_released)
+            account.changed_event.disconnect(self._on_account_changed)
             self.accounts.remove(account)
-            self.unlocked_accounts.remove(account)
+            del self.hash2account[account.__hash__()]
+            self._unindex_name(account)
+            del self.unlocked_accounts[account]
+
+    def add_policy(self, policies):
+        """
+        Adds one or more policies that are enforced whenever an account
+        is acquired using :class:`acquire_account()`.
+
+        :type  policies: AccountPolicy|list[AccountPolicy]
+        :param policies: The policy to be added.
+        """
+        with self.lock:
+            self.policies.extend(to_list(policies))
 
     def reset(self):
         """
         Removes all accounts.
         """
-        with self.unlock_cond:
-            for owner in self.owner2account:
+        with self.lock:
+            for owner in list(self.owner2account):
                 self.release_accounts(owner)
             self._remove_account(self.accounts.copy())
-            self.unlock_cond.notify_all()
 
     def get_account_from_name(self, name):
         """
@@ -512,10 +766,10 @@ class AccountPool(object):
         :type  name: string
         :param name: The name of the account.
         """
-        for account in self.accounts:
-            if account.get_name() == name:
-                return account
-        return None
+        accounts = self.name2account.get(name)
+        if not accounts:
+            return None
+        return next(iter(accounts))
 
     def n_accounts(self):
         """
@@ -535,28 +789,71 @@ class AccountPool(object):
         :rtype:  :class:`Account`
         :return: The account that was acquired.
         """
-        with self.unlock_cond:
-            if len(self.accounts) == 0:
-                raise ValueError('account pool is empty')
+        # Fail early, so that no policy is consumed by a call that can
+        # never succeed.
+        with self.lock:
+            self._check_acquirable(account)
+
+        # Policies may block for a while, so they are enforced outside
+        # of the lock.
+        policies = []
+        try:
+            with timing.span('acquire_account'):
+                for policy in list(self.policies):
+                    policy.acquire()
+                    policies.append(policy)
+                return self._acquire_account(account, owner, policies)
+        except:
+            for policy in policies:
+                policy.release()
+            raise
+
+    def _check_acquirable(self, account):
+        if len(self.accounts) == 0:
+            raise ValueError('account pool is empty')
+        if account and account not in self.accounts:
+            raise ValueError('account %s is not in the pool' % account)
+
+    def _acquire_account(self, account, owner, policies):
+        with self.lock:
+            self._check_acquirable(account)
 
             if account:
                 # Specific account requested.
                 while account not in self.unlocked_accounts:
-                    self.unlock_cond.wait()
-                self.unlocked_accounts.remove(account)
+                    self._wait(self.account_waiters[account])
+                del self.unlocked_accounts[account]
             else:
                 # Else take the next available one.
                 while len(self.unlocked_accounts) == 0:
-                    self.unlock_cond.wait()
-                account = self.unlocked_accounts.popleft()
+                    self._wait(self.waiters)
+                account = self.unlocked_accounts.popitem(last=False)[0]
 
             if owner is not None:
                 self.owner2account[owner].append(account)
                 self.account2owner[account] = owner
+            if policies:
+                self.account2policies[account] = policies
             account.acquire(False)
-            self.unlock_cond.notify_all()
             return account
 
+    def release_account(self, account):
+        """
+        Releases an account that was acquired using acquire_account().
+        Unlike :class:`Account.release()`, this also returns accounts
+        that do not need a lock to the pool, and frees the policies that
+        were enforced when the account was acquired.
+
+        :type  account: Account
+        :param account: The account to be released.
+        """
+        if account.needs_lock:
+            account.release()
+        else:
+            # The account was not locked, so it does not signal its
+            # release.
+            self._on_account_released(account)
+
     def release_accounts(self, owner):
         """
         Releases all accounts that were acquired by the given owner.
@@ -564,13 +861,13 @@ class AccountPool(object):
         :type  owner: object
         :param owner: The owner descriptor as passed to acquire_account().
         """
-        with self.unlock_cond:
-            for account in self.owner2account[owner]:
+        with self.lock:
+            for account in self.owner2account.pop(owner, ()):
                 self.account2owner.pop(account)
                 account.release(False)
-                self.unlocked_accounts.append(account)
-            self.owner2account.pop(owner)
-            self.unlock_cond.notify_all()
+                self.unlocked_accounts[account] = None
+                self._release_policies(account)
+                self._notify(account)
 
 
 class AccountManager(object):
@@ -586,16 +883,18 @@ class AccountManager(object):
         """
         self.default_pool = None
         self.pools = None
+        self.accounts = None
         self.reset()
 
     def reset(self):
         """
-        Removes all account pools.
+        Removes all account pools and registered accounts.
         """
         self.default_pool = AccountPool()
         self.pools = []
+        self.accounts = weakref.WeakValueDictionary()
 
-    def add_pool(self, pool, match=None):
+    def add_pool(self, pool, match=None, policies=None):
         """
         Adds a new account pool. If the given match argument is
         None, the pool the default pool. Otherwise, the match argument is
@@ -648,11 +947,21 @@ class AccountManager(object):
         hostname does not start with 'foo', the function returns False, and
         Exscript takes the 'default-user' account from the default pool.
 
+        To protect the authentication server of a pool from login storms,
+        pass policies that are enforced whenever an account is taken
+        from the pool::
+
+            policies = TokenBucket(20), ConcurrencyLimit(50)
+
         :type  pool: AccountPool
         :param pool: The account pool that is added.
         :type  match: callable
         :param match: A callback to check if the pool should be used.
+        :type  policies: AccountPolicy|list[AccountPolicy]
+        :param policies: Passed to :class:`AccountPool.add_policy()`.
         """
+        if policies:
+            pool.add_policy(policies)
         if match is None:
             self.default_pool = pool
         else:
@@ -668,10 +977,24 @@ class AccountManager(object):
         """
         self.default_pool.add_account(account)
 
+    def register_account(self, account):
+        """
+        Makes an account that is not in any pool known to the manager,
+        without using it for hosts that have no account attached.
+        This allows for locking the account from other processes through
+        :class:`AccountProxy`. The account is forgotten when it is
+        garbage collected.
+
+        :type  account: Account
+        :param account: The account that is registered.
+        """
+        self.accounts[account.__hash__()] = account
+
     def get_account_from_hash(self, account_hash):
         """
         Returns the account with the given hash, if it is contained in any
-        of the pools. Returns None otherwise.
+        of the pools or was registered using :meth:`register_account()`.
+        Returns None otherwise.
 
         :type  account_hash: str
         :param account_hash: The hash of an account object.
@@ -680,7 +1003,10 @@ class AccountManager(object):
             account = pool.get_account_from_hash(account_hash)
             if account is not None:
                 return account
-        return self.default_pool.get_account_from_hash(account_hash)
+        account = self.default_pool.get_account_from_hash(account_hash)
+        if account is not None:
+            return account
+        return self.accounts.get(account_hash)
 
     def acquire_account(self, account=None, owner=None):
         """
@@ -728,6 +1054,22 @@ class AccountManager(object):
         # Else, choose an account from the default account pool.
         return self.default_pool.acquire_account(owner=owner)
 
+    def release_account(self, account):
+        """
+        Releases an account that was acquired using acquire_account()
+        or acquire_account_for(). See
+        :class:`AccountPool.release_account()`.
+
+        :type  account: Account
+        :param account: The account to be released.
+        """
+        for _, pool in self.pools:
+            if pool.has_account(account):
+                return pool.release_account(account)
+        if self.default_pool.has_account(account):
+            return self.default_pool.release_account(account)
+        account.release()
+
     def release_accounts(self, owner):
         """
         Releases all accounts that were acquired by the given owner.
@@ -0,0 +1,209 @@
+#
+# Copyright (C) 2010-2017 Samuel Abels
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Keeps authenticated connections open for reuse across jobs.
+"""
+from __future__ import absolute_import
+from builtins import object
+import threading
+from collections import defaultdict
+from .util.impl import monotonic
+
+
+class ConnectionPool(object):
+
+    """
+    Holds idle, authenticated connections so that later jobs on the
+    same host can reuse them instead of connecting and logging in again.
+
+    Connections are keyed by protocol, address, TCP port and the account
+    that is attached to the host (if any). A connection that is taken
+    from the pool is health-checked by sending a newline and waiting for
+    the prompt; connections that fail the check are closed and dropped.
+    After a successful check the fresh prompt is left in the buffer, so
+    that a subsequent call to :class:`Protocol.login()` completes without
+    another round-trip.
+
+    Example usage::
+
+        pool = ConnectionPool(max_per_host=2, idle_timeout=60)
+        queue = Queue(connection_pool=pool)
+        queue.run(hosts, first_function)
+        queue.run(hosts, second_function)  # reuses the open sessions
+        queue.shutdown()
+
+    .. HINT::
+        Jobs that use pooled connections should leave the session at the
+        command line prompt when they return, i.e. not in a sub-mode or
+        with unread output pending.
+    """
+
+    def __init__(self, max_per_host=1, idle_timeout=300, check_timeout=10):
+        """
+        Constructor.
+
+        :type  max_per_host: int
+        :param max_per_host: The maximum number of idle connections per host.
+        :type  idle_timeout: float
+        :param idle_timeout: Seconds after which an idle connection is closed.
+        :type  check_timeout: float
+        :param check_timeout: Timeout for the health check on checkout.
+        """
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.check_timeout = check_timeout
+        self.lock = threading.Lock()
+        self.idle = defaultdict(list)  # key -> [(last_used, conn), ...]
+
+    def _key(self, host):
+        account = host.get_account()
+        account_hash = account.__hash__() if account is not None else None
+        return (host.get_protocol(),
+                host.get_address(),
+                host.get_tcp_port(),
+                account_hash)
+
+    def _close(self, conn):
+        try:
+            conn.close(force=True)
+        except Exception:
+            pass
+
+    def _pop_expired(self, now):
+        # Must be called with the lock held.
+        expired = []
+        for key, entries in list(self.idle.items()):
+            alive = []
+            for last_used, conn in entries:
+                if now - last_used < self.idle_timeout:
+                    alive.append((last_used, conn))
+                else:
+                    expired.append(conn)
+            if alive:
+                self.idle[key] = alive
+            else:
+                del self.idle[key]
+        return expired
+
+    def _is_alive(self, conn):
+        timeout = conn.get_timeout()
+        conn.set_timeout(self.check_timeout)
+        try:
+            conn.buffer.clear()
+            conn.send('\r')
+            conn.waitfor(conn.get_prompt())
+        except Exception:
+            return False
+        finally:
+            conn.set_timeout(timeout)
+        return True
+
+    def checkout(self, host):
+        """
+        Returns an idle connection to the given host, or None if there
+        is none. The returned connection has passed the health check.
+
+        :type  host: Exscript.Host
+        :param host: The host to which a connection is requested.
+        :rtype:  Exscript.protocols.Protocol|None
+        :return: An authenticated connection, or None.
+        """
+        key = self._key(host)
+        while True:
+            with self.lock:
+                expired = self._pop_expired(monotonic())
+                entries = self.idle.get(key)
+                conn = entries.pop()[1] if entries else None
+                if not entries:
+                    self.idle.pop(key, None)
+            for expired_conn in expired:
+                self._close(expired_conn)
+            if conn is None:
+                return None
+            if self._is_alive(conn):
+                return conn
+            self._close(conn)
+
+    def checkin(self, host, conn):
+        """
+        Returns the given connection to the pool. Connections that were
+        never authenticated are closed instead, as are connections that
+        would exceed the per-host limit.
+
+        :type  host: Exscript.Host
+        :param host: The host to which the connection is open.
+        :type  conn: Exscript.protocols.Protocol
+        :param conn: The connection.
+        :rtype:  bool
+        :return: True if the connection was added to the pool.
+        """
+        if not conn.is_app_authenticated():
+            self._close(conn)
+            return False
+        key = self._key(host)
+        now = monotonic()
+        with self.lock:
+            expired = self._pop_expired(now)
+            entries = self.idle[key]
+            if len(entries) < self.max_per_host:
+                entries.append((now, conn))
+                conn = None
+        for expired_conn in expired:
+            self._close(expired_conn)
+        if conn is None:
+            return True
+        self._close(conn)
+        return False
+
+    def evict_idle(self):
+        """
+        Closes all connections that exceeded the idle timeout.
+
+        :rtype:  int
+        :return: The number of connections that were closed.
+        """
+        with self.lock:
+            expired = self._pop_expired(monotonic())
+        for conn in expired:
+            self._close(conn)
+        return len(expired)
+
+    def n_connections(self):
+        """
+        Returns the number of idle connections in the pool.
+
+        :rtype:  int
+        :return: The number of connections.
+        """
+        with self.lock:
+            return sum(len(e) for e in list(self.idle.values()))
+
+    def close_all(self):
+        """
+        Closes all idle connections and empties the pool.
+        """
+        with self.lock:
+            entries = [e for el in list(self.idle.values()) for e in el]
+            self.idle.clear()
+        for last_used, conn in entries:
+            self._close(conn)
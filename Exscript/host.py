@@ -29,7 +29,11 @@ from builtins import object
 from .account import Account
 from .util.cast import to_list
 from .util.ipv4 import is_ip, clean_ip
-from .util.url import Url
+from .util.url import Url, _PLAIN_HOSTNAME_RE, _WELL_KNOWN_PORTS
+
+# Protocol names are shared by all hosts, so each host refers to the same
+# string instead of holding a copy.
+_protocols = {}
 
 
 def _is_ip(string):
@@ -37,6 +41,10 @@ def _is_ip(string):
     return ':' in string or is_ip(string)
 
 
+def _intern(string):
+    return _protocols.setdefault(string, string)
+
+
 class Host(object):
 
     """
@@ -61,7 +69,7 @@ class Host(object):
         :type  default_protocol: string
         :param default_protocol: The protocol name.
         """
-        self.protocol = default_protocol
+        self.protocol = _intern(default_protocol)
         self.vars = None    # To save memory, do not init with a dict.
         self.account = None
         self.name = None
@@ -71,8 +79,13 @@ class Host(object):
         self.set_uri(uri)
 
     def __copy__(self):
-        host = Host(self.get_uri())
-        host.set_name(self.get_name())
+        host = Host.__new__(Host)
+        for name in Host.__slots__:
+            setattr(host, name, getattr(self, name))
+        if self.vars is not None:
+            host.vars = dict(self.vars)
+        if self.options is not None:
+            host.options = dict(self.options)
         return host
 
     def set_uri(self, uri):
@@ -95,6 +108,12 @@ class Host(object):
         :type  uri: string
         :param uri: An URL formatted hostname.
         """
+        if _PLAIN_HOSTNAME_RE.match(uri):
+            self.set_tcp_port(_WELL_KNOWN_PORTS.get(self.protocol))
+            self.set_name(uri)
+            self.set_address(uri)
+            return
+
         try:
             uri = Url.from_string(uri, self.protocol)
         except ValueError:
@@ -221,7 +240,7 @@ class Host(object):
         :type  protocol: string
         :param protocol: The protocol name.
         """
-        self.protocol = protocol
+        self.protocol = _intern(protocol)
 
     def get_protocol(self):
         """
@@ -53,6 +53,17 @@ class Append(Token):
         self.parent.define(**args)
         return 1
 
+    def compile(self):
+        expr = self.expr.compile()
+        root = self.parent._get_root()
+        varname = self.varname
+
+        def run(context):
+            existing = root.variables.get(varname)
+            root.define(**{varname: existing + expr(context)})
+            return 1
+        return run
+
     def dump(self, indent=0):
         print((' ' * indent) + self.name, "to", self.varname)
         self.expr.dump(indent + 1)
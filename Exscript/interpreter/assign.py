@@ -53,3 +53,14 @@ class Assign(Token):
         result = self.expression.value(context)
         self.parent.define(**{self.varname: result})
         return result
+
+    def compile(self):
+        expression = self.expression.compile()
+        root = self.parent._get_root()
+        varname = self.varname
+
+        def run(context):
+            result = expression(context)
+            root.define(**{varname: result})
+            return result
+        return run
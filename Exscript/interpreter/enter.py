@@ -38,6 +38,9 @@ class Enter(Token):
     def value(self, context):
         return self.execute.value(context)
 
+    def compile(self):
+        return self.execute.compile()
+
     def dump(self, indent=0):
         print((' ' * indent) + self.name)
         self.execute.dump(indent + 1)
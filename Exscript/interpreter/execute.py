@@ -40,6 +40,7 @@ class Execute(String):
 
         # Make sure that any variables specified in the command are declared.
         string_re.sub(self.variable_test_cb, command)
+        self.plan = self._make_plan(command)
         self.parent.define(__response__=[])
 
     def value(self, context):
@@ -49,7 +50,7 @@ class Execute(String):
         conn = self.parent.get('__connection__')
 
         # Substitute variables in the command for values.
-        command = string_re.sub(self.variable_sub_cb, self.string)
+        command = self._substitute()
         command = command.lstrip()
 
         # Execute the command.
@@ -69,5 +70,8 @@ class Execute(String):
         self.parent.define(__response__=response)
         return 1
 
+    def compile(self):
+        return self.value
+
     def dump(self, indent=0):
         print((' ' * indent) + self.name, self.string)
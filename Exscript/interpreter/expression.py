@@ -99,12 +99,24 @@ class ExpressionNode(Token):
         elif self.op == 'not':
             return [not self.rgt.value(context)[0]]
 
+        return self._evaluate(self.lft.value(context),
+                              self.rgt.value(context))
+
+    def compile(self):
+        if self.op is None:
+            return self.lft.compile()
+        rgt = self.rgt.compile()
+        if self.op == 'not':
+            return lambda context: [not rgt(context)[0]]
+        lft = self.lft.compile()
+        evaluate = self._evaluate
+        return lambda context: evaluate(lft(context), rgt(context))
+
+    def _evaluate(self, lft_lst, rgt_lst):
         # There are only two types of values: Regular expressions and lists.
         # We also have to make sure that empty lists do not cause an error.
-        lft_lst = self.lft.value(context)
         if type(lft_lst) == type([]):
             lft = lft_lst[0] if len(lft_lst) > 0 else ''
-        rgt_lst = self.rgt.value(context)
         if type(rgt_lst) == type([]):
             rgt = rgt_lst[0] if len(rgt_lst) > 0 else ''
         if self.op_type == 'arithmetic_operator' and self.op != '.':
@@ -243,6 +255,9 @@ class Expression(Token):
     def value(self, context):
         return self.root.value(context)
 
+    def compile(self):
+        return self.root.compile()
+
     def dump(self, indent=0):
         print((' ' * indent) + self.name, 'start')
         self.root.dump(indent + 1)
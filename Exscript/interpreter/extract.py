@@ -98,8 +98,9 @@ class Extract(Token):
 
         # Walk through all lines, matching each one against the regular
         # expression.
+        regex = self.regex.value(context)
         for line in buffer:
-            match = self.regex.value(context).search(line)
+            match = regex.search(line)
             if match is None:
                 continue
 
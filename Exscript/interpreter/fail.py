@@ -52,6 +52,20 @@ class Fail(Token):
             raise FailException(self.msg.value(context)[0])
         return 1
 
+    def compile(self):
+        msg = self.msg.compile()
+        if self.expression is None:
+            def run(context):
+                raise FailException(msg(context)[0])
+            return run
+        expression = self.expression.compile()
+
+        def run(context):
+            if expression(context)[0]:
+                raise FailException(msg(context)[0])
+            return 1
+        return run
+
     def dump(self, indent=0):
         print((' ' * indent) + self.name, 'start')
         self.msg.dump(indent + 1)
@@ -71,3 +71,18 @@ class FunctionCall(Token):
             self.lexer.runtime_error(
                 'Undefined function %s' % self.funcname, self)
         return function(self.parent, *argument_values)
+
+    def compile(self):
+        arguments = [arg.compile() for arg in self.arguments]
+        root = self.parent._get_root()
+        parent = self.parent
+        funcname = self.funcname
+
+        def run(context):
+            argument_values = [arg(context) for arg in arguments]
+            function = root.variables.get(funcname)
+            if function is None:
+                self.lexer.runtime_error(
+                    'Undefined function %s' % funcname, self)
+            return function(parent, *argument_values)
+        return run
@@ -64,6 +64,25 @@ class IfCondition(Token):
             self.else_block.value(context)
         return 1
 
+    def compile(self):
+        expression = self.expression.compile()
+        if_block = self.if_block.compile()
+        if self.else_block is None:
+            def run(context):
+                if expression(context)[0]:
+                    if_block(context)
+                return 1
+            return run
+        else_block = self.else_block.compile()
+
+        def run(context):
+            if expression(context)[0]:
+                if_block(context)
+            else:
+                else_block(context)
+            return 1
+        return run
+
     def dump(self, indent=0):
         print((' ' * indent) + self.name, 'start')
         self.expression.dump(indent + 1)
@@ -155,6 +155,59 @@ class Loop(Token):
             self.block.value(context)
         return 1
 
+    def compile(self):
+        block = self.block.compile()
+        during = self.during.compile() if self.during is not None else None
+        until = self.until.compile() if self.until is not None else None
+        if len(self.list_variables) == 0 and not self.thefrom:
+            if during is not None:
+                def run(context):
+                    while during(context)[0]:
+                        block(context)
+                    return 1
+                return run
+
+            if until is not None:
+                def run(context):
+                    while not until(context)[0]:
+                        block(context)
+                    return 1
+                return run
+
+        if self.thefrom:
+            thefrom = self.thefrom.compile()
+            theto = self.theto.compile()
+
+            def get_lists(context):
+                start = thefrom(context)[0]
+                stop = theto(context)[0]
+                return [list(range(start, stop))]
+        else:
+            list_variables = [var.compile() for var in self.list_variables]
+
+            def get_lists(context):
+                return [var(context) for var in list_variables]
+        root = self.block._get_root()
+        vars = self.iter_varnames
+
+        def run(context):
+            lists = get_lists(context)
+            for thelist in lists:
+                if len(thelist) != len(lists[0]):
+                    msg = 'All list variables must have the same length'
+                    self.lexer.runtime_error(msg, self)
+
+            for i in range(len(lists[0])):
+                for f, thelist in enumerate(lists):
+                    root.define(**{vars[f]: [thelist[i]]})
+                if until is not None and until(context)[0]:
+                    break
+                if during is not None and not during(context)[0]:
+                    break
+                block(context)
+            return 1
+        return run
+
     def dump(self, indent=0):
         print((' ' * indent) + self.name, end=' ')
         print(self.list_variables, 'as', self.iter_varnames, 'start')
@@ -32,5 +32,9 @@ class Number(object):
     def value(self, context):
         return [self.number]
 
+    def compile(self):
+        number = self.number
+        return lambda context: [number]
+
     def dump(self, indent=0):
         print((' ' * indent) + 'Number', self.number)
@@ -32,6 +32,7 @@ class Program(Scope):
         Scope.__init__(self, 'Program', lexer, parser, None, **kwargs)
         self.variables = variables
         self.init_variables = variables
+        self.compiled = None
         self.add(Template(lexer, parser, self))
 
     def init(self, *args, **kwargs):
@@ -47,5 +48,7 @@ class Program(Scope):
         self.variables = copy.copy(self.init_variables)
         if 'variables' in kwargs:
             self.variables.update(kwargs.get('variables'))
-        self.value(self)
+        if self.compiled is None:
+            self.compiled = self.compile()
+        self.compiled(self)
         return self.variables
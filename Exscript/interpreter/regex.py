@@ -28,6 +28,9 @@ from .string import String
 # nor has a "?:" or "?<" appended.
 bracket_re = re.compile(r'(?<!\\)\((?!\?[:<])', re.I)
 
+#: The number of compiled expressions that are cached per regex token.
+cache_size = 32
+
 modifier_grammar = (
     ('modifier',     r'[i]'),
     ('invalid_char', r'.'),
@@ -47,6 +50,7 @@ class Regex(String):
         String.__init__(self, lexer, parser, parent)
         self.n_groups = len(bracket_re.findall(self.string))
         self.flags = 0
+        self.compiled = {}  # Map substituted patterns to compiled regexes.
 
         # Collect modifiers.
         lexer.set_grammar(modifier_grammar_c)
@@ -59,9 +63,12 @@ class Regex(String):
                 lexer.syntax_error(error, self)
         lexer.restore_grammar()
 
-        # Compile the regular expression.
+        # Compile the regular expression. If it contains no variables,
+        # the compiled expression is reused whenever it is evaluated.
         try:
             re.compile(self.string, self.flags)
+            if len(self.plan) == 1:
+                self.value(None)
         except Exception as e:
             error = 'Invalid regular expression %s: %s' % (
                 repr(self.string), e)
@@ -74,8 +81,20 @@ class Regex(String):
         return token
 
     def value(self, context):
-        pattern = String.value(self, context)[0]
-        return re.compile(pattern, self.flags)
+        pattern = self._substitute()
+        regex = self.compiled.get(pattern)
+        if regex is None:
+            if len(self.compiled) >= cache_size:
+                self.compiled.clear()
+            regex = re.compile(pattern, self.flags)
+            self.compiled[pattern] = regex
+        return regex
+
+    def compile(self):
+        if len(self.plan) == 1:
+            regex = self.value(None)
+            return lambda context: regex
+        return self.value
 
     def dump(self, indent=0):
         print((' ' * indent) + self.name, self.string)
@@ -52,6 +52,14 @@ class Scope(Token):
     def define_object(self, **kwargs):
         self.variables.update(kwargs)
 
+    def _get_root(self):
+        # Variables are always defined in the root scope (see define()), so
+        # compiled code looks them up there directly.
+        scope = self
+        while scope.parent is not None:
+            scope = scope.parent
+        return scope
+
     def is_defined(self, name):
         if name in self.variables:
             return 1
@@ -94,6 +102,16 @@ class Scope(Token):
             result = child.value(context)
         return result
 
+    def compile(self):
+        children = [child.compile() for child in self.children]
+
+        def run(context):
+            result = 1
+            for child in children:
+                result = child(context)
+            return result
+        return run
+
     def dump(self, indent=0):
         print((' ' * indent) + self.name, 'start')
         for child in self.children:
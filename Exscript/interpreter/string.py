@@ -70,6 +70,7 @@ class String(Token):
 
         # Make sure that any variables specified in the command are declared.
         string_re.sub(self.variable_test_cb, self.string)
+        self.plan = self._make_plan(self.string)
         self.mark_end()
         lexer.restore_grammar()
 
@@ -83,6 +84,40 @@ class String(Token):
             return token
         return char
 
+    def _make_plan(self, string):
+        # Splits the string into literal text and variable references, so
+        # that it does not need to be scanned again whenever it is
+        # evaluated. The result alternates between literals and
+        # (field, varname) tuples, starting and ending with a literal.
+        plan = []
+        literal = []
+        pos = 0
+        for match in string_re.finditer(string):
+            field, escape, varname = match.group(0, 1, 2)
+            literal.append(string[pos:match.start()])
+            pos = match.end()
+            if escape:
+                literal.append('$' + varname)
+            elif varname == '':
+                literal.append('$')
+            else:
+                plan.append(''.join(literal))
+                plan.append((field, varname))
+                literal = []
+        literal.append(string[pos:])
+        plan.append(''.join(literal))
+        return plan
+
+    def _substitute(self):
+        # Returns the string with all variables substituted by their value.
+        plan = self.plan
+        if len(plan) == 1:
+            return plan[0]
+        result = []
+        for n, item in enumerate(plan):
+            result.append(self._variable_value(*item) if n % 2 else item)
+        return ''.join(result)
+
     def _variable_error(self, field, msg):
         self.start += self.string.find(field)
         self.end = self.start + len(field)
@@ -91,16 +126,17 @@ class String(Token):
     # Tokens that include variables in a string may use this callback to
     # substitute the variable against its value.
     def variable_sub_cb(self, match):
-        field = match.group(0)
-        escape = match.group(1)
-        varname = match.group(2)
-        value = self.parent.get(varname)
-
-        # Check the variable name syntax.
+        field, escape, varname = match.group(0, 1, 2)
         if escape:
             return '$' + varname
         elif varname == '':
             return '$'
+        return self._variable_value(field, varname)
+
+    def _variable_value(self, field, varname):
+        value = self.parent.get(varname)
+
+        # Check the variable name syntax.
         if not varname_re.match(varname):
             msg = '%s is not a variable name' % repr(varname)
             self._variable_error(field, msg)
@@ -123,7 +159,14 @@ class String(Token):
         return match.group(0)
 
     def value(self, context):
-        return [string_re.sub(self.variable_sub_cb, self.string)]
+        return [self._substitute()]
+
+    def compile(self):
+        if len(self.plan) == 1:
+            string = self.plan[0]
+            return lambda context: [string]
+        substitute = self._substitute
+        return lambda context: [substitute()]
 
     def dump(self, indent=0):
         print((' ' * indent) + 'String "' + self.string + '"')
@@ -70,6 +70,9 @@ class Term(Token):
     def value(self, context):
         return self.term.value(context)
 
+    def compile(self):
+        return self.term.compile()
+
     def dump(self, indent=0):
         print((' ' * indent) + self.name)
         self.term.dump(indent + 1)
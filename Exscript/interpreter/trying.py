@@ -43,6 +43,17 @@ class Try(Scope):
             return 1
         return 1
 
+    def compile(self):
+        block = self.block.compile()
+
+        def run(context):
+            try:
+                block(context)
+            except ProtocolException:
+                pass
+            return 1
+        return run
+
     def dump(self, indent=0):
         print((' ' * indent) + self.name, 'start')
         self.block.dump(indent + 1)
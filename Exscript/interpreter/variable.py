@@ -39,5 +39,17 @@ class Variable(Token):
             self.lexer.runtime_error(msg, self)
         return val
 
+    def compile(self):
+        root = self.parent._get_root()
+        varname = self.varname
+
+        def run(context):
+            val = root.variables.get(varname)
+            if val is None:
+                msg = 'Undefined variable %s' % varname
+                self.lexer.runtime_error(msg, self)
+            return val
+        return run
+
     def dump(self, indent=0):
         print((' ' * indent) + 'Variable', self.varname, '.')
@@ -26,17 +26,25 @@ Logging to memory.
 from __future__ import print_function, absolute_import, unicode_literals
 from future import standard_library
 standard_library.install_aliases()
-from builtins import filter
 from builtins import str
 from builtins import object
 import os
 import errno
+import json
+import zlib
 import weakref
+import tempfile
+import threading
 from io import StringIO
 from itertools import chain
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from .util.impl import format_exception
 
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
 logger_registry = weakref.WeakValueDictionary() # Map id(logger) to Logger.
 
 
@@ -161,6 +169,501 @@ class Logfile(Log):
         Log.succeeded(self)
 
 
+class HandleCache(object):
+
+    """
+    Keeps a bounded number of files open for writing, so that logs that
+    receive many small writes do not need to open and close the file
+    every time. When the budget is exhausted, the least recently used
+    file is closed.
+
+    Data is flushed to the disk once a file has more than flush_size
+    bytes pending. A timer thread flushes all files at most
+    flush_interval seconds after unflushed data was first written.
+    """
+
+    def __init__(self, max_handles=128, flush_size=65536, flush_interval=1.0):
+        """
+        Constructor.
+
+        :type  max_handles: int
+        :param max_handles: The maximum number of open files.
+        :type  flush_size: int
+        :param flush_size: The number of bytes after which a file is flushed.
+        :type  flush_interval: float
+        :param flush_interval: The maximum age of unflushed data in seconds.
+            If 0, every write is flushed immediately.
+        """
+        self.max_handles = max_handles
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.handles = OrderedDict()  # Map filename to [file, pending].
+        self.timer = None
+
+    def __getstate__(self):
+        # Open files, locks and timers are local to a process; a copy
+        # (such as one sent along with a log through a pipe) opens its
+        # own files.
+        state = self.__dict__.copy()
+        del state['lock']
+        state['handles'] = OrderedDict()
+        state['timer'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def _flush_all(self):
+        for handle in self.handles.values():
+            if handle[1]:
+                handle[0].flush()
+                handle[1] = 0
+
+    def _on_timer(self):
+        with self.lock:
+            self.timer = None
+            self._flush_all()
+
+    def _start_timer(self):
+        # Called with the lock held, when data is pending.
+        if self.timer is not None:
+            return
+        self.timer = threading.Timer(self.flush_interval, self._on_timer)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _cancel_timer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def write(self, filename, mode, data):
+        """
+        Writes the given data to the file with the given name. The mode is
+        used if the file is not currently open.
+
+        :type  filename: str
+        :param filename: The name of the file.
+        :type  mode: str
+        :param mode: The mode for opening the file ('a' or 'w').
+        :type  data: str
+        :param data: The data to write.
+        """
+        with self.lock:
+            handle = self.handles.pop(filename, None)
+            if handle is None:
+                while len(self.handles) >= self.max_handles:
+                    self.handles.popitem(last=False)[1][0].close()
+                handle = [open(filename, mode), 0]
+            self.handles[filename] = handle
+            handle[0].write(data)
+            handle[1] += len(data)
+            if handle[1] >= self.flush_size or self.flush_interval <= 0:
+                handle[0].flush()
+                handle[1] = 0
+            else:
+                self._start_timer()
+
+    def flush(self, filename=None):
+        """
+        Writes pending data of the file with the given name to the disk.
+        If no name is given, all files are flushed.
+
+        :type  filename: str
+        :param filename: The name of the file, or None.
+        """
+        with self.lock:
+            if filename is None:
+                self._flush_all()
+                self._cancel_timer()
+                return
+            handle = self.handles.get(filename)
+            if handle is not None:
+                handle[0].flush()
+                handle[1] = 0
+
+    def close(self, filename=None):
+        """
+        Closes the file with the given name, if it is open. If no name is
+        given, all files are closed.
+
+        :type  filename: str
+        :param filename: The name of the file, or None.
+        """
+        with self.lock:
+            if filename is not None:
+                handle = self.handles.pop(filename, None)
+                if handle is not None:
+                    handle[0].close()
+                return
+            while self.handles:
+                self.handles.popitem()[1][0].close()
+            self._cancel_timer()
+
+    def is_open(self, filename):
+        """
+        Returns True if the file with the given name is currently open.
+
+        :type  filename: str
+        :param filename: The name of the file.
+        :rtype:  bool
+        :return: Whether the file is open.
+        """
+        with self.lock:
+            return filename in self.handles
+
+
+class BufferedLogfile(Logfile):
+
+    """
+    Like :class:`Logfile`, but writes through a :class:`HandleCache`
+    instead of opening the file for every write. The files are closed
+    once the log ends.
+    """
+
+    def __init__(self, name, filename, handles, mode='a', delete=False):
+        Logfile.__init__(self, name, filename, mode, delete)
+        self.handles = handles
+        self.modes = {}
+
+    def __str__(self):
+        self.handles.flush(self.filename)
+        self.handles.flush(self.errorname)
+        return Logfile.__str__(self)
+
+    def _write_file(self, filename, *data):
+        if not self.do_log:
+            return
+        # The mode applies to the first write only; after that, the file
+        # may only be reopened for appending.
+        mode = self.modes.setdefault(filename, self.mode)
+        self.modes[filename] = 'a'
+        try:
+            self.handles.write(filename, mode, ' '.join(data))
+        except Exception as e:
+            print('Error writing to %s: %s' % (filename, e))
+            self.do_log = False
+            raise
+
+    def _close(self):
+        self.handles.close(self.filename)
+        self.handles.close(self.errorname)
+
+    def aborted(self, exc_info):
+        Logfile.aborted(self, exc_info)
+        self._close()
+
+    def succeeded(self):
+        self._close()
+        Logfile.succeeded(self)
+
+
+def _gzip(data):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _gunzip(data):
+    # Like gzip.decompress(), supports concatenated members.
+    result = []
+    while data:
+        decompressor = zlib.decompressobj(47)
+        result.append(decompressor.decompress(data))
+        data = decompressor.unused_data
+    return b''.join(result)
+
+
+def _unxz(data):
+    # Unlike gzip, lzma rejects empty input; an empty log has no blocks.
+    if not data:
+        return b''
+    return lzma.decompress(data)
+
+
+_codecs = {'gzip': ('.gz', _gzip, _gunzip)}
+if lzma is not None:
+    _codecs['lzma'] = ('.xz', lzma.compress, _unxz)
+
+
+class TranscriptStore(object):
+
+    """
+    Stores transcripts in compressed segment files in the given directory.
+    Every transcript is compressed separately and appended to the current
+    segment; once a segment reaches the maximum size, a new one is
+    started.
+
+    An index file maps the name and the attempt of every transcript to
+    the segment, offset and length of its data, so that a single
+    transcript can be read without decompressing anything else.
+    """
+
+    def __init__(self, logdir, compression='gzip', segment_size=64 << 20):
+        """
+        Constructor. Existing segments and index entries in the directory
+        are preserved.
+
+        :type  logdir: str
+        :param logdir: The directory that holds the segments and the index.
+        :type  compression: str
+        :param compression: 'gzip', or 'lzma' if supported by Python.
+        :type  segment_size: int
+        :param segment_size: The size in bytes at which a segment is rotated.
+        """
+        if compression not in _codecs:
+            raise ValueError('unsupported compression: ' + repr(compression))
+        self.logdir = logdir
+        self.compression = compression
+        self.segment_size = segment_size
+        self.suffix, self.compress, self.decompress = _codecs[compression]
+        self.index_file = os.path.join(logdir, 'index.jsonl')
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.segment = 0
+        if not os.path.exists(logdir):
+            os.mkdir(logdir)
+        if os.path.exists(self.index_file):
+            with open(self.index_file) as fp:
+                for line in fp:
+                    self._add_entry(json.loads(line))
+
+    def _add_entry(self, entry):
+        # Later entries for the same name and attempt replace earlier ones.
+        self.entries[entry['name'], entry['attempt']] = entry
+        self.segment = max(self.segment, entry['segment'])
+
+    def _get_segment_file(self, segment):
+        name = 'transcripts-%06d%s' % (segment, self.suffix)
+        return os.path.join(self.logdir, name)
+
+    def add(self, name, attempt, data, error=None):
+        """
+        Appends the given compressed transcript to the current segment,
+        and adds it to the index.
+
+        :type  name: str
+        :param name: The name of the log.
+        :type  attempt: int
+        :param attempt: The number of the attempt, starting at 1.
+        :type  data: bytes
+        :param data: The transcript, compressed using :class:`compress()`.
+        :type  error: str|None
+        :param error: An error message, if any.
+        :rtype:  dict
+        :return: The index entry.
+        """
+        with self.lock:
+            filename = self._get_segment_file(self.segment)
+            if os.path.exists(filename) \
+                    and os.path.getsize(filename) >= self.segment_size:
+                self.segment += 1
+                filename = self._get_segment_file(self.segment)
+            with open(filename, 'ab') as fp:
+                fp.seek(0, os.SEEK_END)
+                offset = fp.tell()
+                fp.write(data)
+            entry = {'name': name,
+                     'attempt': attempt,
+                     'segment': self.segment,
+                     'offset': offset,
+                     'length': len(data),
+                     'error': error}
+            with open(self.index_file, 'a') as fp:
+                fp.write(json.dumps(entry) + '\n')
+            self._add_entry(entry)
+        return entry
+
+    def get_entry(self, name, attempt=1):
+        """
+        Returns the index entry of the transcript with the given name and
+        attempt, or None if there is no such transcript.
+
+        :type  name: str
+        :param name: The name of the log.
+        :type  attempt: int
+        :param attempt: The number of the attempt, starting at 1.
+        :rtype:  dict|None
+        :return: The index entry.
+        """
+        with self.lock:
+            return self.entries.get((name, attempt))
+
+    def read_raw(self, entry):
+        """
+        Returns the compressed data of the transcript with the given index
+        entry.
+
+        :type  entry: dict
+        :param entry: An index entry.
+        :rtype:  bytes
+        :return: The compressed transcript.
+        """
+        with open(self._get_segment_file(entry['segment']), 'rb') as fp:
+            fp.seek(entry['offset'])
+            return fp.read(entry['length'])
+
+    def read(self, name, attempt=1):
+        """
+        Returns the transcript with the given name and attempt, followed
+        by the error message (if any). Returns None if there is no such
+        transcript.
+
+        :type  name: str
+        :param name: The name of the log.
+        :type  attempt: int
+        :param attempt: The number of the attempt, starting at 1.
+        :rtype:  str|None
+        :return: The transcript.
+        """
+        entry = self.get_entry(name, attempt)
+        if entry is None:
+            return None
+        data = self.decompress(self.read_raw(entry)).decode('utf-8')
+        return data + (entry['error'] or '')
+
+
+class TranscriptLog(Log):
+
+    """
+    A log that is compressed in memory while it is written, and added to
+    a :class:`TranscriptStore` once it ends. Data is compressed in blocks
+    of the given size.
+    """
+
+    def __init__(self, name, attempt, store, block_size=65536):
+        Log.__init__(self, name)
+        self.attempt = attempt
+        self.store = store
+        self.block_size = block_size
+        self.blocks = []
+        self.pending = []
+        self.pending_size = 0
+        self.error = None
+        self.entry = None
+
+    def __str__(self):
+        if self.entry is not None:
+            data = self.store.read_raw(self.entry)
+            pending = ''
+        else:
+            data = b''.join(self.blocks)
+            pending = ''.join(self.pending)
+        data = self.store.decompress(data).decode('utf-8')
+        return data + pending + (self.error or '')
+
+    def _compress_pending(self):
+        if self.pending:
+            data = ''.join(self.pending).encode('utf-8')
+            self.blocks.append(self.store.compress(data))
+            self.pending = []
+            self.pending_size = 0
+
+    def write(self, *data):
+        # Data that is written after the log ended goes into a new entry
+        # in the store.
+        if self.entry is not None:
+            self.blocks = [self.store.read_raw(self.entry)]
+            self.entry = None
+        text = ' '.join(data)
+        self.pending.append(text)
+        self.pending_size += len(text)
+        if self.pending_size >= self.block_size:
+            self._compress_pending()
+
+    def _close(self):
+        self._compress_pending()
+        self.entry = self.store.add(self.name,
+                                    self.attempt,
+                                    b''.join(self.blocks),
+                                    self.error)
+        self.blocks = []
+
+    def aborted(self, exc_info):
+        self.exc_info = exc_info
+        self.did_end = True
+        self.error = format_exception(*self.exc_info)
+        self.write('ERROR:', str(exc_info[1]), '\n')
+        self._close()
+
+    def succeeded(self):
+        Log.succeeded(self)
+        self._close()
+
+
+class SpillFile(object):
+
+    """
+    An anonymous temporary file that stores the content of logs that no
+    longer fit into memory.
+    """
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        """
+        Appends the given text to the file.
+
+        :type  text: str
+        :param text: The text to store.
+        :rtype:  (int, int)
+        :return: The offset and the length of the stored data.
+        """
+        data = text.encode('utf-8')
+        with self.lock:
+            self.file.seek(0, os.SEEK_END)
+            offset = self.file.tell()
+            self.file.write(data)
+        return offset, len(data)
+
+    def read(self, offset, length):
+        """
+        Returns the text that was stored at the given location.
+
+        :type  offset: int
+        :param offset: The offset, as returned by :class:`write()`.
+        :type  length: int
+        :param length: The length, as returned by :class:`write()`.
+        :rtype:  str
+        :return: The stored text.
+        """
+        with self.lock:
+            self.file.seek(offset)
+            return self.file.read(length).decode('utf-8')
+
+
+class SpilledLog(Log):
+
+    """
+    Replaces a completed :class:`Log` whose content was moved to a
+    :class:`SpillFile`. Only the name, the status, and the error messages
+    are kept in memory.
+    """
+
+    def __init__(self, log, spill_file):
+        Log.__init__(self, log.get_name())
+        self.did_end = log.has_ended()
+        self.spill_file = spill_file
+        self.location = spill_file.write(str(log))
+        self.error = log.get_error()
+        self.error_summary = log.get_error(False)
+
+    def __str__(self):
+        # Data that is written after spilling is kept in memory.
+        return self.spill_file.read(*self.location) + self.data.getvalue()
+
+    def get_error(self, include_tb=True):
+        if self.exc_info is not None:
+            return Log.get_error(self, include_tb)
+        return self.error if include_tb else self.error_summary
+
+    def has_error(self):
+        return self.exc_info is not None or self.error is not None
+
+
 class Logger(object):
 
     """
@@ -168,19 +671,76 @@ class Logger(object):
     Logs are kept in memory, and not written to the disk.
     """
 
-    def __init__(self):
+    def __init__(self, max_memory=None):
         """
         Creates a new logger instance. Use the :class:`Exscript.util.log.log_to`
         decorator to send messages to the logger.
+
+        If max_memory is given, completed logs that exceed the given
+        number of characters in total are moved to a temporary file,
+        oldest first. Only their name, status and errors remain in memory.
+
+        :type  max_memory: int|None
+        :param max_memory: The memory budget for completed logs.
         """
         logger_registry[id(self)] = self
-        self.logs = defaultdict(list)
         self.started = 0
         self.success = 0
         self.failed = 0
+        self.max_memory = max_memory
+        self.lock = threading.Lock()
+        self.spill_file = None
+        self._reset()
 
     def _reset(self):
         self.logs = defaultdict(list)
+        # Completed logs by (job_id, attempt index), in completion order.
+        self.succeeded_logs = OrderedDict()
+        self.aborted_logs = OrderedDict()
+        self.in_memory = OrderedDict()  # Map the same keys to a size.
+        self.memory = 0
+
+    def _spill(self, key):
+        if self.spill_file is None:
+            self.spill_file = SpillFile()
+        job_id, n = key
+        log = SpilledLog(self.logs[job_id][n], self.spill_file)
+        self.logs[job_id][n] = log
+        for index in (self.succeeded_logs, self.aborted_logs):
+            if key in index:
+                index[key] = log
+
+    def _log_ended(self, job_id):
+        # Update the indexes, and enforce the memory budget.
+        n = len(self.logs[job_id]) - 1
+        key = job_id, n
+        log = self.logs[job_id][n]
+        with self.lock:
+            self.succeeded_logs.pop(key, None)
+            self.aborted_logs.pop(key, None)
+            if log.has_ended():
+                if log.has_error():
+                    self.aborted_logs[key] = log
+                else:
+                    self.succeeded_logs[key] = log
+
+            if self.max_memory is None or type(log) is not Log:
+                return
+            self.memory -= self.in_memory.pop(key, 0)
+            self.in_memory[key] = log.data.tell()
+            self.memory += self.in_memory[key]
+            while self.memory > self.max_memory:
+                key, size = self.in_memory.popitem(last=False)
+                self.memory -= size
+                self._spill(key)
+
+    def _remove_logs(self, job_id):
+        with self.lock:
+            for n in range(len(self.logs.pop(job_id, ()))):
+                key = job_id, n
+                self.succeeded_logs.pop(key, None)
+                self.aborted_logs.pop(key, None)
+                self.memory -= self.in_memory.pop(key, 0)
 
     def get_succeeded_actions(self):
         """
@@ -198,12 +758,12 @@ class Logger(object):
         return list(chain.from_iterable(iter(self.logs.values())))
 
     def get_succeeded_logs(self):
-        func = lambda x: x.has_ended() and not x.has_error()
-        return list(filter(func, self.get_logs()))
+        with self.lock:
+            return list(self.succeeded_logs.values())
 
     def get_aborted_logs(self):
-        func = lambda x: x.has_ended() and x.has_error()
-        return list(filter(func, self.get_logs()))
+        with self.lock:
+            return list(self.aborted_logs.values())
 
     def _get_log(self, job_id):
         return self.logs[job_id][-1]
@@ -225,11 +785,13 @@ class Logger(object):
         log = self._get_log(job_id)
         log.aborted(exc_info)
         self.failed += 1
+        self._log_ended(job_id)
 
     def log_succeeded(self, job_id):
         log = self._get_log(job_id)
         log.succeeded()
         self.success += 1
+        self._log_ended(job_id)
 
 
 class LoggerProxy(object):
@@ -237,19 +799,65 @@ class LoggerProxy(object):
     """
     An object that has a 1:1 relation to a Logger object in another
     process.
+
+    Messages are not sent one by one. Instead, they are collected per
+    job and sent as a batch once batch_size bytes are pending, before
+    anything else is sent to the logger (e.g. when the job ends), and
+    by a timer thread at most batch_interval seconds after the first
+    message of the batch. Since the timer sends through the given pipe,
+    the pipe must be safe to use from more than one thread.
     """
 
-    def __init__(self, parent, logger_id):
+    def __init__(self, parent, logger_id, batch_size=8192, batch_interval=.5):
         """
         Constructor.
 
         :type parent: multiprocessing.Connection
         :param parent: A pipe to the associated pipe handler.
+        :type  logger_id: int
+        :param logger_id: The id of the Logger in the other process.
+        :type  batch_size: int
+        :param batch_size: The number of bytes after which a batch is sent.
+        :type  batch_interval: float
+        :param batch_interval: The maximum age of a batch in seconds.
+            If 0, every message is sent immediately.
         """
         self.parent = parent
         self.logger_id = logger_id
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.lock = threading.Lock()
+        self.pending = OrderedDict()  # Map job_id to a list of messages.
+        self.pending_bytes = 0
+        self.timer = None
+
+    def _flush(self):
+        # Called with the lock held.
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        batch = [(job_id, ''.join(messages))
+                 for job_id, messages in self.pending.items()]
+        self.parent.send(('log-messages', (self.logger_id, batch)))
+        self.pending.clear()
+        self.pending_bytes = 0
+
+    def _on_timer(self):
+        with self.lock:
+            self.timer = None
+            self._flush()
+
+    def flush(self):
+        """
+        Sends all pending messages to the logger.
+        """
+        with self.lock:
+            self._flush()
 
     def add_log(self, job_id, name, attempt):
+        self.flush()
         self.parent.send(('log-add', (self.logger_id, job_id, name, attempt)))
         response = self.parent.recv()
         if isinstance(response, Exception):
@@ -257,12 +865,24 @@ class LoggerProxy(object):
         return response
 
     def log(self, job_id, message):
-        self.parent.send(('log-message', (self.logger_id, job_id, message)))
+        with self.lock:
+            self.pending.setdefault(job_id, []).append(message)
+            self.pending_bytes += len(message)
+            if self.pending_bytes >= self.batch_size \
+                    or self.batch_interval <= 0:
+                self._flush()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.batch_interval,
+                                             self._on_timer)
+                self.timer.daemon = True
+                self.timer.start()
 
     def log_aborted(self, job_id, exc_info):
+        self.flush()
         self.parent.send(('log-aborted', (self.logger_id, job_id, exc_info)))
 
     def log_succeeded(self, job_id):
+        self.flush()
         self.parent.send(('log-succeeded', (self.logger_id, job_id)))
 
 
@@ -306,9 +926,122 @@ class FileLogger(Logger):
     def log_aborted(self, job_id, exc_info):
         Logger.log_aborted(self, job_id, exc_info)
         if self.clearmem:
-            self.logs.pop(job_id)
+            self._remove_logs(job_id)
+
+    def log_succeeded(self, job_id):
+        Logger.log_succeeded(self, job_id)
+        if self.clearmem:
+            self._remove_logs(job_id)
+
+
+class BufferedFileLogger(FileLogger):
+
+    """
+    Like :class:`FileLogger`, but keeps a bounded number of log files open
+    and buffers the data that is written to them. This avoids opening and
+    closing the file for every packet that is received when many
+    connections are active.
+
+    The logs are written to the same files as with the
+    :class:`FileLogger`. Once a log ends, its files are flushed and
+    closed.
+    """
+
+    def __init__(self,
+                 logdir,
+                 mode='a',
+                 delete=False,
+                 clearmem=True,
+                 max_handles=128,
+                 flush_size=65536,
+                 flush_interval=1.0):
+        """
+        Like :class:`FileLogger.__init__()`, but also accepts the
+        arguments of :class:`HandleCache.__init__()`.
+        """
+        FileLogger.__init__(self, logdir, mode, delete, clearmem)
+        self.handles = HandleCache(max_handles, flush_size, flush_interval)
+
+    def add_log(self, job_id, name, attempt):
+        if attempt > 1:
+            name += '_retry%d' % (attempt - 1)
+        filename = os.path.join(self.logdir, name + '.log')
+        log = BufferedLogfile(name,
+                              filename,
+                              self.handles,
+                              self.mode,
+                              self.delete)
+        log.started()
+        self.logs[job_id].append(log)
+        return log
+
+    def flush(self):
+        """
+        Writes all pending data to the disk.
+        """
+        self.handles.flush()
+
+    def close(self):
+        """
+        Flushes and closes all files. Logs that did not end yet are
+        reopened for appending if more data is written to them.
+        """
+        self.handles.close()
+
+
+class TranscriptLogger(Logger):
+
+    """
+    A Logger that stores logs compressed in a :class:`TranscriptStore`.
+    This is more suitable than :class:`FileLogger` for large numbers of
+    long transcripts, such as configuration backups.
+    """
+
+    def __init__(self,
+                 logdir,
+                 compression='gzip',
+                 segment_size=64 << 20,
+                 block_size=65536,
+                 clearmem=True):
+        """
+        The logdir, compression and segment_size arguments are passed to
+        :class:`TranscriptStore.__init__()`. Logs are compressed in blocks
+        of block_size bytes while they are written.
+        If clearmem is True, the logger does not store a reference to
+        the log in it; use :class:`get_transcript()` to read it.
+        """
+        Logger.__init__(self)
+        self.store = TranscriptStore(logdir, compression, segment_size)
+        self.block_size = block_size
+        self.clearmem = clearmem
+
+    def add_log(self, job_id, name, attempt):
+        log = TranscriptLog(name, attempt, self.store, self.block_size)
+        log.started()
+        self.logs[job_id].append(log)
+        self.started += 1
+        return log
+
+    def log_aborted(self, job_id, exc_info):
+        Logger.log_aborted(self, job_id, exc_info)
+        if self.clearmem:
+            self._remove_logs(job_id)
 
     def log_succeeded(self, job_id):
         Logger.log_succeeded(self, job_id)
         if self.clearmem:
-            self.logs.pop(job_id)
+            self._remove_logs(job_id)
+
+    def get_transcript(self, name, attempt=1):
+        """
+        Returns the transcript of the log with the given name and attempt,
+        or None if no such log has ended.
+
+        :type  name: str
+        :param name: The name of the log.
+        :type  attempt: int
+        :param attempt: The number of the attempt, starting at 1.
+        :rtype:  str|None
+        :return: The transcript.
+        """
+        return self.store.read(name, attempt)
@@ -0,0 +1,409 @@
+#
+# Copyright (C) 2010-2017 Samuel Abels
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Live statistics of a running queue.
+"""
+from __future__ import absolute_import, division
+from builtins import object, str
+import json
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from .servers.httpd import HTTPd, RequestHandler
+try:
+    from threading import get_ident
+except ImportError:  # Python 2
+    from thread import get_ident
+
+#: The default upper bounds of histogram buckets, in seconds.
+DEFAULT_BUCKETS = (.1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class Counter(object):
+
+    """
+    A counter that may be incremented from any number of threads
+    without a lock. Each thread increments its own slot, so no update
+    is ever lost; the slots are summed up when the counter is read.
+    """
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+        self.slots = {}
+
+    def increment(self, value=1):
+        """
+        Adds the given value to the counter.
+
+        :type  value: int
+        :param value: The value to add.
+        """
+        ident = get_ident()
+        self.slots[ident] = self.slots.get(ident, 0) + value
+
+    def get(self):
+        """
+        Returns the current value of the counter.
+
+        :rtype:  int
+        :return: The sum of all increments.
+        """
+        return sum(list(self.slots.values()))
+
+
+class Histogram(object):
+
+    """
+    Counts observed values in buckets with fixed upper bounds. Like
+    :class:`Counter`, each thread updates its own slot, so observing a
+    value does not take a lock.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Constructor.
+
+        :type  buckets: list[float]
+        :param buckets: The upper bounds of the buckets, in ascending order.
+        """
+        self.buckets = tuple(buckets)
+        self.slots = {}
+
+    def observe(self, value):
+        """
+        Counts the given value in the first bucket whose upper bound is
+        at least the value.
+
+        :type  value: float
+        :param value: The observed value.
+        """
+        ident = get_ident()
+        slot = self.slots.get(ident)
+        if slot is None:
+            # One count per bucket plus the overflow bucket, the sum of
+            # the values, and the number of values.
+            slot = self.slots[ident] = [0] * (len(self.buckets) + 3)
+        slot[bisect_left(self.buckets, value)] += 1
+        slot[-2] += value
+        slot[-1] += 1
+
+    def get(self):
+        """
+        Returns the cumulative count of each bucket, the sum of all
+        values, and the number of values. The counts are a list of
+        (upper_bound, count) tuples, the last having an upper bound
+        of float('inf').
+
+        :rtype:  (list[(float, int)], float, int)
+        :return: The bucket counts, the sum, and the count.
+        """
+        total = [0] * (len(self.buckets) + 3)
+        for slot in list(self.slots.values()):
+            for n, value in enumerate(slot):
+                total[n] += value
+        counts = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), total):
+            cumulative += count
+            counts.append((bound, cumulative))
+        return counts, total[-2], total[-1]
+
+
+def _format_bound(bound):
+    if bound == float('inf'):
+        return '+Inf'
+    return repr(float(bound))
+
+
+def _escape(value):
+    value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return value.replace('\n', '\\n')
+
+
+class _MetricsHandler(RequestHandler):
+
+    def setup(self):
+        RequestHandler.setup(self)
+        # Metrics are public, unless an account was added to the server.
+        if not self.server.accounts:
+            self.authenticated = True
+
+    def handle_GET(self):
+        metrics = self.server.user_data
+        if self.path == '/metrics':
+            body = metrics.to_prometheus()
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        elif self.path == '/metrics.json':
+            body = metrics.to_json()
+            content_type = 'application/json'
+        else:
+            return RequestHandler.handle_GET(self)
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.end_headers()
+        self.wfile.write(body.encode('utf8'))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Metrics(object):
+
+    """
+    Collects live statistics of a :class:`Exscript.Queue` from the
+    events of its workqueue: job throughput, queue depth, active
+    sessions, retries, and latency histograms per driver and per phase
+    of a job (see :mod:`Exscript.util.timing`). Usage::
+
+        queue = Queue(max_threads=50)
+        metrics = Metrics(queue)
+        metrics.serve(port=9099)
+        queue.run(hosts, do_something)
+
+    The statistics are then available at http://127.0.0.1:9099/metrics
+    in the Prometheus text format, and at /metrics.json as JSON.
+
+    The events are emitted by the threads that run the jobs; to keep
+    them from contending on a lock, all counters are lock-free.
+    Note that collecting the latencies enables the timing of jobs,
+    which costs a message to the parent process per job.
+    """
+
+    def __init__(self, queue, buckets=DEFAULT_BUCKETS, window=60):
+        """
+        Constructor.
+
+        :type  queue: :class:`Exscript.Queue`
+        :param queue: The queue that is observed.
+        :type  buckets: list[float]
+        :param buckets: The upper bounds of the latency histograms.
+        :type  window: int
+        :param window: The number of seconds over which the throughput
+            is averaged.
+        """
+        self.queue = queue
+        self.buckets = buckets
+        self.window = window
+        self.start = time.time()
+        self.started = Counter()
+        self.succeeded = Counter()
+        self.errors = Counter()
+        self.failed = Counter()
+        self.completions = deque(maxlen=10000)
+        self.job_latency = {}
+        self.span_latency = {}
+
+        workqueue = queue.workqueue
+        workqueue.job_started_event.listen(self._on_job_started)
+        workqueue.job_error_event.listen(self._on_job_error)
+        workqueue.job_succeeded_event.listen(self._on_job_succeeded)
+        workqueue.job_aborted_event.listen(self._on_job_aborted)
+        queue.job_timing_event.listen(self._on_job_timing)
+
+    def _on_job_started(self, job):
+        self.started.increment()
+
+    def _on_job_error(self, job, exc_info):
+        self.errors.increment()
+
+    def _on_job_succeeded(self, job):
+        self.succeeded.increment()
+        self.completions.append(time.time())
+
+    def _on_job_aborted(self, job):
+        self.failed.increment()
+        self.completions.append(time.time())
+
+    def _observe(self, histograms, label, value):
+        histogram = histograms.get(label)
+        if histogram is None:
+            histogram = histograms.setdefault(label, Histogram(self.buckets))
+        histogram.observe(value)
+
+    def _on_job_timing(self, job_name, attempt, spans):
+        for span in spans:
+            if span['name'] == 'job':
+                driver = span.get('driver') or 'unknown'
+                self._observe(self.job_latency, driver, span['duration'])
+            else:
+                self._observe(self.span_latency,
+                              span['name'],
+                              span['duration'])
+
+    def get_throughput(self):
+        """
+        Returns the number of jobs that were completed per second,
+        averaged over the window that was passed to the constructor.
+
+        :rtype:  float
+        :return: The number of jobs per second.
+        """
+        now = time.time()
+        since = now - self.window
+        completions = list(self.completions)
+        recent = [t for t in completions if t >= since]
+        if len(recent) == self.completions.maxlen:
+            # The window holds more completions than are remembered.
+            since = recent[0]
+        else:
+            since = max(since, self.start)
+        if now <= since:
+            return 0.0
+        return len(recent) / (now - since)
+
+    def get_values(self):
+        """
+        Returns all statistics as a dictionary.
+
+        :rtype:  dict
+        :return: The statistics.
+        """
+        workqueue = self.queue.workqueue
+        active = len(workqueue.get_running_jobs())
+        started = self.started.get()
+        errors = self.errors.get()
+        failed = self.failed.get()
+        retries = max(errors - failed, 0)
+
+        def histograms(latency):
+            result = {}
+            for label, histogram in sorted(latency.items()):
+                counts, total, count = histogram.get()
+                result[label] = {'buckets': [(_format_bound(b), c)
+                                             for b, c in counts],
+                                 'sum': total,
+                                 'count': count}
+            return result
+
+        return {'uptime': time.time() - self.start,
+                'queue_depth': max(workqueue.get_length() - active, 0),
+                'active_sessions': active,
+                'throughput': self.get_throughput(),
+                'jobs_started': started,
+                'jobs_succeeded': self.succeeded.get(),
+                'jobs_failed': failed,
+                'job_errors': errors,
+                'job_retries': retries,
+                'retry_rate': retries / started if started else 0.0,
+                'job_duration_seconds': histograms(self.job_latency),
+                'span_duration_seconds': histograms(self.span_latency)}
+
+    def to_json(self):
+        """
+        Returns all statistics as a JSON string.
+
+        :rtype:  str
+        :return: The statistics.
+        """
+        return json.dumps(self.get_values(), sort_keys=True)
+
+    def to_prometheus(self):
+        """
+        Returns all statistics in the Prometheus text format.
+
+        :rtype:  str
+        :return: The statistics.
+        """
+        values = self.get_values()
+        lines = []
+
+        def add(name, kind, help, value):
+            lines.append('# HELP exscript_%s %s' % (name, help))
+            lines.append('# TYPE exscript_%s %s' % (name, kind))
+            lines.append('exscript_%s %s' % (name, value))
+
+        def add_histograms(name, label, help, histograms):
+            name = 'exscript_' + name
+            lines.append('# HELP %s %s' % (name, help))
+            lines.append('# TYPE %s histogram' % name)
+            for value, histogram in sorted(histograms.items()):
+                labels = '%s="%s"' % (label, _escape(value))
+                for bound, count in histogram['buckets']:
+                    lines.append('%s_bucket{%s,le="%s"} %d' % (name,
+                                                               labels,
+                                                               bound,
+                                                               count))
+                lines.append('%s_sum{%s} %r' % (name,
+                                                labels,
+                                                float(histogram['sum'])))
+                lines.append('%s_count{%s} %d' % (name,
+                                                  labels,
+                                                  histogram['count']))
+
+        add('uptime_seconds', 'gauge',
+            'Seconds since the collection of statistics started.',
+            repr(values['uptime']))
+        add('queue_depth', 'gauge',
+            'Number of jobs that are waiting to be started.',
+            values['queue_depth'])
+        add('active_sessions', 'gauge',
+            'Number of jobs that are currently running.',
+            values['active_sessions'])
+        add('throughput', 'gauge',
+            'Number of jobs completed per second.',
+            repr(values['throughput']))
+        add('jobs_started_total', 'counter',
+            'Number of job attempts that were started.',
+            values['jobs_started'])
+        add('jobs_succeeded_total', 'counter',
+            'Number of jobs that succeeded.',
+            values['jobs_succeeded'])
+        add('jobs_failed_total', 'counter',
+            'Number of jobs that failed after their last attempt.',
+            values['jobs_failed'])
+        add('job_errors_total', 'counter',
+            'Number of job attempts that raised an error.',
+            values['job_errors'])
+        add('job_retries_total', 'counter',
+            'Number of job attempts that are retried.',
+            values['job_retries'])
+        add_histograms('job_duration_seconds', 'driver',
+                       'Duration of job attempts per driver.',
+                       values['job_duration_seconds'])
+        add_histograms('span_duration_seconds', 'span',
+                       'Duration of the phases of job attempts.',
+                       values['span_duration_seconds'])
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=9099, address='127.0.0.1'):
+        """
+        Serves the statistics on the given port, in a daemon thread.
+        The returned server is an :class:`Exscript.servers.HTTPd`; to
+        require a login, add an account to it. Call its shutdown() method
+        to stop serving.
+
+        :type  port: int
+        :param port: The TCP port number.
+        :type  address: str
+        :param address: The address on which to listen.
+        :rtype:  :class:`Exscript.servers.HTTPd`
+        :return: The running server.
+        """
+        server = HTTPd((address, port), _MetricsHandler, user_data=self)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return server
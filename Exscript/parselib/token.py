@@ -95,6 +95,14 @@ class Token(object):
         for child in self.get_children():
             child.value(context)
 
+    def compile(self):
+        """
+        Returns a function that takes the same argument as value(), and
+        has the same effect. Tokens that are evaluated often override
+        this to return a closure that avoids walking the token tree.
+        """
+        return self.value
+
     def mark_start(self):
         self.start = self.lexer.current_char
         if self.start >= self.end:
@@ -21,6 +21,7 @@
 # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 from __future__ import absolute_import
+import sys
 from .. import Account
 from ..util.cast import to_host
 from ..util.url import Url
@@ -28,6 +29,10 @@ from .protocol import Protocol
 from .telnet import Telnet
 from .ssh2 import SSH2
 from .dummy import Dummy
+if sys.version_info >= (3, 5):
+    from .asyncprotocol import AsyncProtocol
+    from .asynctelnet import AsyncTelnet
+    from .asyncssh2 import AsyncSSH2
 
 protocol_map = {'dummy':  Dummy,
                 'pseudo': Dummy,
@@ -0,0 +1,455 @@
+#
+# Copyright (C) 2010-2017 Samuel Abels
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Base class for protocol adapters that run on an asyncio event loop.
+"""
+from __future__ import absolute_import, unicode_literals
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from ..util.impl import Context, _Context
+from ..util.crypt import otp
+from ..util.cast import to_regexs
+from .protocol import Protocol
+from .matcher import PromptSet
+from .exception import ProtocolException, LoginFailure, TimeoutException, \
+        DriverReplacedException, ExpectCancelledException
+
+_account_executor = None
+_account_executor_lock = threading.Lock()
+
+
+def _get_account_executor():
+    # Waiting for an account lock must not occupy a thread of the default
+    # executor: the session that holds the account needs that executor
+    # to run the driver hooks before it can release the account.
+    global _account_executor
+    with _account_executor_lock:
+        if _account_executor is None:
+            _account_executor = ThreadPoolExecutor(
+                max_workers=64,
+                thread_name_prefix='Exscript-account')
+        return _account_executor
+
+
+class _SyncProxy(object):
+
+    """
+    Exposes an :class:`AsyncProtocol` to blocking code (such as the
+    drivers) that runs in an executor thread. Every method call is
+    executed in the event loop, and coroutines are awaited before the
+    result is returned to the calling thread.
+    """
+
+    def __init__(self, conn, loop):
+        self._conn = conn
+        self._loop = loop
+
+    @staticmethod
+    async def _call(func, args, kwargs):
+        result = func(*args, **kwargs)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    def __getattr__(self, name):
+        attr = getattr(self._conn, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            coro = self._call(attr, args, kwargs)
+            return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+        return call
+
+
+class AsyncProtocol(Protocol):
+
+    """
+    Like :class:`Protocol`, but all methods that wait for the remote host
+    are coroutines, e.g.::
+
+        conn = AsyncTelnet()
+        await conn.connect('localhost')
+        await conn.login(account)
+        await conn.execute('show version')
+
+    Drivers, prompts, and the OS guesser are shared with the blocking
+    adapters. Driver hooks such as :class:`Driver.init_terminal()` are
+    blocking code, so they are run in the default executor of the event
+    loop, with every call they make being forwarded back into the loop.
+    Waiting for an account happens in a separate executor, so that
+    sessions that wait for a locked account can not starve the session
+    that holds it.
+    """
+
+    def __init__(self, loop=None, **kwargs):
+        """
+        .. HINT::
+            Also supports all keyword arguments that :class:`Protocol` supports.
+
+        :type  loop: asyncio.AbstractEventLoop
+        :keyword loop: The event loop. Defaults to the current event loop.
+        """
+        Protocol.__init__(self, **kwargs)
+        self.loop = loop
+        self.eof = False
+        self.cancel = False
+        self._data_waiter = None
+
+    def _get_loop(self):
+        if self.loop is None:
+            self.loop = asyncio.get_event_loop()
+        return self.loop
+
+    def _run_in_executor(self, func, *args, **kwargs):
+        return self._get_loop().run_in_executor(None,
+                                                partial(func, *args, **kwargs))
+
+    def _wakeup(self):
+        waiter = self._data_waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def _data_received(self, data):
+        """
+        To be called by subclasses whenever data was received from the
+        remote host.
+        """
+        self._receive_cb(data, False)
+        self.buffer.append(data)
+        self._wakeup()
+
+    def _eof_received(self):
+        """
+        To be called by subclasses when the remote host closed the
+        connection.
+        """
+        self.eof = True
+        self._wakeup()
+
+    async def _wait_for_data(self):
+        self._data_waiter = self._get_loop().create_future()
+        try:
+            await asyncio.wait_for(self._data_waiter, self.timeout)
+        except asyncio.TimeoutError:
+            error = 'Timeout while waiting for response from device'
+            raise TimeoutException(error)
+        finally:
+            self._data_waiter = None
+
+    async def _get_account_async(self, account):
+        # Acquiring an account may block, e.g. when waiting for an account
+        # from a pool.
+        if isinstance(account, (Context, _Context)):
+            return self._get_account(account)
+        func = partial(self._get_account, account)
+        return await self._get_loop().run_in_executor(_get_account_executor(),
+                                                      func)
+
+    async def _connect_hook(self, host, port):
+        """
+        Should be overwritten.
+        """
+        raise NotImplementedError()
+
+    async def connect(self, hostname=None, port=None):
+        """
+        Like :class:`Protocol.connect()`, but a coroutine.
+        """
+        if hostname is not None:
+            self.host = hostname
+        conn = await self._connect_hook(self.host, port)
+        self.os_guesser.protocol_info(self.get_remote_version())
+        self._update_auto_driver()
+        if self.get_banner():
+            self.os_guesser.data_received(self.get_banner(), False)
+        return conn
+
+    async def autoinit(self):
+        """
+        Like :class:`Protocol.autoinit()`, but a coroutine.
+        """
+        proxy = _SyncProxy(self, self._get_loop())
+        await self._run_in_executor(self.get_driver().init_terminal, proxy)
+
+    async def login(self, account=None, app_account=None, flush=True):
+        """
+        Like :class:`Protocol.login()`, but a coroutine.
+        """
+        with (await self._get_account_async(account)) as account:
+            if app_account is None:
+                app_account = account
+            await self.authenticate(account, flush=False)
+            if self.get_driver().supports_auto_authorize():
+                await self.expect_prompt()
+            await self.auto_app_authorize(app_account, flush=flush)
+
+    async def authenticate(self, account=None, app_account=None, flush=True):
+        """
+        Like :class:`Protocol.authenticate()`, but a coroutine.
+        """
+        with (await self._get_account_async(account)) as account:
+            if app_account is None:
+                app_account = account
+
+            if not self.proto_authenticated:
+                await self.protocol_authenticate(account)
+            await self.app_authenticate(app_account, flush=flush)
+
+    async def _protocol_authenticate(self, user, password):
+        pass
+
+    async def _protocol_authenticate_by_key(self, user, key):
+        pass
+
+    async def protocol_authenticate(self, account=None):
+        """
+        Like :class:`Protocol.protocol_authenticate()`, but a coroutine.
+        """
+        with (await self._get_account_async(account)) as account:
+            user = account.get_name()
+            password = account.get_password()
+            key = account.get_key()
+            if key is None:
+                self._dbg(1, "Attempting to authenticate %s." % user)
+                await self._protocol_authenticate(user, password)
+            else:
+                self._dbg(1, "Authenticate %s with key." % user)
+                await self._protocol_authenticate_by_key(user, key)
+        self.proto_authenticated = True
+
+    async def _app_authenticate(self,
+                                account,
+                                password,
+                                flush=True,
+                                bailout=False):
+        user = account.get_name()
+
+        while True:
+            # Wait for the prompt.
+            prompt_set = self._get_login_prompts()
+            try:
+                index, match = await self._waitfor(prompt_set)
+            except TimeoutException:
+                if self.response is None:
+                    self.response = ''
+                msg = "Buffer: %s" % repr(self.response)
+                raise TimeoutException(msg)
+            except DriverReplacedException:
+                # Driver replaced, retry.
+                self._dbg(1, 'AsyncProtocol.app_authenticate(): driver replaced')
+                continue
+            except ExpectCancelledException:
+                self._dbg(1, 'AsyncProtocol.app_authenticate(): expect cancelled')
+                raise
+            except EOFError:
+                self._dbg(1, 'AsyncProtocol.app_authenticate(): EOF')
+                raise
+
+            # Login error detected.
+            section, prompt = prompt_set.get(index)
+            if section == 'login-error':
+                raise LoginFailure("Login failed")
+
+            # User name prompt.
+            elif section == 'username':
+                self._dbg(1, "Username prompt %s received." % index)
+                await self.expect(prompt)  # consume the prompt from the buffer
+                self.send(user + '\r')
+                continue
+
+            # s/key prompt.
+            elif section == 'skey':
+                self._dbg(1, "S/Key prompt received.")
+                await self.expect(prompt)  # consume the prompt from the buffer
+                seq = int(match.group(1))
+                seed = match.group(2)
+                self.otp_requested_event(account, seq, seed)
+                self._dbg(2, "Seq: %s, Seed: %s" % (seq, seed))
+                phrase = otp(password, seed, seq)
+
+                # A password prompt is now required.
+                await self.expect(self.get_password_prompt())
+                self.send(phrase + '\r')
+                self._dbg(1, "Password sent.")
+                if bailout:
+                    break
+                continue
+
+            # Cleartext password prompt.
+            elif section == 'password':
+                self._dbg(1, "Cleartext password prompt received.")
+                await self.expect(prompt)  # consume the prompt from the buffer
+                self.send(password + '\r')
+                if bailout:
+                    break
+                continue
+
+            # Shell prompt.
+            elif section == 'cli':
+                self._dbg(1, 'Shell prompt received.')
+                if flush:
+                    await self.expect_prompt()
+                break
+
+            else:
+                assert False  # No such section
+
+    async def app_authenticate(self, account=None, flush=True, bailout=False):
+        """
+        Like :class:`Protocol.app_authenticate()`, but a coroutine.
+        """
+        with (await self._get_account_async(account)) as account:
+            user = account.get_name()
+            password = account.get_password()
+            self._dbg(1, "Attempting to app-authenticate %s." % user)
+            await self._app_authenticate(account, password, flush, bailout)
+        self.app_authenticated = True
+
+    async def app_authorize(self, account=None, flush=True, bailout=False):
+        """
+        Like :class:`Protocol.app_authorize()`, but a coroutine.
+        """
+        with (await self._get_account_async(account)) as account:
+            user = account.get_name()
+            password = account.get_authorization_password()
+            if password is None:
+                password = account.get_password()
+            self._dbg(1, "Attempting to app-authorize %s." % user)
+            await self._app_authenticate(account, password, flush, bailout)
+        self.app_authorized = True
+
+    async def auto_app_authorize(self, account=None, flush=True, bailout=False):
+        """
+        Like :class:`Protocol.auto_app_authorize()`, but a coroutine.
+        """
+        with (await self._get_account_async(account)) as account:
+            self._dbg(1, 'Calling driver.auto_authorize().')
+            proxy = _SyncProxy(self, self._get_loop())
+            await self._run_in_executor(self.get_driver().auto_authorize,
+                                        proxy,
+                                        account,
+                                        flush,
+                                        bailout)
+
+    async def execute(self, command, consume=True):
+        """
+        Like :class:`Protocol.execute()`, but a coroutine.
+        """
+        self.send(command + '\r')
+        return await self.expect_prompt(consume)
+
+    async def _domatch(self, prompt, flush):
+        self._dbg(1, "Expecting a prompt")
+        self._dbg(2, "Expected pattern: " +
+                  repr([repr(p.pattern) for p in prompt]))
+        self.matcher.reset()
+        while not self.cancel:
+            # Check whether what's buffered matches the prompt.
+            driver = self.get_driver()
+            result = self.matcher.search(prompt,
+                                         driver.search_window_size,
+                                         self._get_cleanup(driver))
+            if result is None:
+                if self.eof:
+                    error = 'EOF while waiting for response from device'
+                    raise ProtocolException(error)
+                await self._wait_for_data()
+                continue
+
+            n, match, start, end = result
+            if flush:
+                self.response = self.buffer.pop(start)
+                self.buffer.pop(end - start)
+            else:
+                self.response = self.buffer.head(start)
+            return n, match
+
+        # Ending up here, self.cancel_expect() was called.
+        self.cancel = False
+        if self.driver_replaced:
+            self.driver_replaced = False
+            raise DriverReplacedException()
+        raise ExpectCancelledException()
+
+    async def _waitfor(self, prompt):
+        if isinstance(prompt, PromptSet):
+            re_list = prompt
+        else:
+            re_list = to_regexs(prompt)
+        patterns = [p.pattern for p in re_list]
+        self._dbg(2, 'waiting for: ' + repr(patterns))
+        return await self._domatch(re_list, False)
+
+    async def waitfor(self, prompt):
+        """
+        Like :class:`Protocol.waitfor()`, but a coroutine.
+        """
+        while True:
+            try:
+                result = await self._waitfor(prompt)
+            except DriverReplacedException:
+                continue  # retry
+            return result
+
+    async def _expect(self, prompt):
+        return await self._domatch(to_regexs(prompt), True)
+
+    async def expect(self, prompt):
+        """
+        Like :class:`Protocol.expect()`, but a coroutine.
+        """
+        while True:
+            try:
+                result = await self._expect(prompt)
+            except DriverReplacedException:
+                continue  # retry
+            return result
+
+    async def expect_prompt(self, consume=True):
+        """
+        Like :class:`Protocol.expect_prompt()`, but a coroutine.
+        """
+        if consume:
+            result = await self.expect(self.get_prompt())
+        else:
+            self._dbg(1, "DO NOT CONSUME PROMPT!")
+            result = await self.waitfor(self.get_prompt())
+        self._check_response_for_errors()
+        return result
+
+    def cancel_expect(self):
+        """
+        Like :class:`Protocol.cancel_expect()`. Wakes up any coroutine
+        that is currently waiting for data.
+        """
+        self.cancel = True
+        self._wakeup()
+
+    async def close(self, force=False):
+        """
+        Like :class:`Protocol.close()`, but a coroutine.
+        """
+        Protocol.close(self, force)
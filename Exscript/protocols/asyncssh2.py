@@ -0,0 +1,91 @@
+#
+# Copyright (C) 2010-2017 Samuel Abels
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+SSH version 2 support on top of asyncio, based on paramiko.
+"""
+from __future__ import absolute_import, unicode_literals
+from .asyncprotocol import AsyncProtocol
+from .ssh2 import SSH2
+
+
+class AsyncSSH2(AsyncProtocol, SSH2):
+
+    """
+    The secure shell protocol version 2 adapter for asyncio.
+
+    Paramiko is a blocking library, so connecting and protocol-level
+    authentication are run in the default executor of the event loop.
+    Once the shell is open, incoming data is read from the event loop
+    without blocking.
+    """
+
+    def __init__(self, loop=None, **kwargs):
+        AsyncProtocol.__init__(self, loop=loop, **kwargs)
+        SSH2.__init__(self, **kwargs)
+
+    def _reconnect(self):
+        SSH2.close(self, force=True)
+        self.client = self._paramiko_connect()
+
+    def _shell_readable(self):
+        chunks = []
+        while self.shell.recv_ready():
+            chunks.append(self.shell.recv(65536))
+        if chunks:
+            self._data_received(b''.join(chunks).decode(self.encoding))
+        if self.shell.eof_received or self.shell.closed:
+            self._get_loop().remove_reader(self.shell.fileno())
+            self._eof_received()
+
+    def _start_reading(self):
+        self._get_loop().add_reader(self.shell.fileno(), self._shell_readable)
+
+    async def _connect_hook(self, hostname, port):
+        return await self._run_in_executor(SSH2._connect_hook,
+                                           self,
+                                           hostname,
+                                           port)
+
+    async def _protocol_authenticate(self, user, password):
+        await self._run_in_executor(SSH2._protocol_authenticate,
+                                    self,
+                                    user,
+                                    password)
+        self._start_reading()
+
+    async def _protocol_authenticate_by_key(self, user, key):
+        await self._run_in_executor(SSH2._protocol_authenticate_by_key,
+                                    self,
+                                    user,
+                                    key)
+        self._start_reading()
+
+    async def close(self, force=False):
+        if self.shell is None:
+            await super(AsyncSSH2, self).close()
+            return
+        if not force and not self.eof:
+            await self._wait_for_data()
+        if not self.eof:
+            self._get_loop().remove_reader(self.shell.fileno())
+        await self._run_in_executor(SSH2.close, self, True)
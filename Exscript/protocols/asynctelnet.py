@@ -0,0 +1,172 @@
+#
+# Copyright (C) 2010-2017 Samuel Abels
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+The Telnet protocol, on top of asyncio.
+"""
+from __future__ import absolute_import, unicode_literals
+import asyncio
+from ..util.tty import get_terminal_size
+from . import telnetlib
+from .telnetlib import IAC, DO, DONT, WILL, WONT, SB, SE
+from .asyncprotocol import AsyncProtocol
+
+
+def _complete_length(data):
+    """
+    Returns the length of the longest prefix of the given raw data that
+    does not end in the middle of an IAC sequence.
+    """
+    pos = 0
+    end = len(data)
+    while True:
+        pos = data.find(IAC, pos)
+        if pos == -1:
+            return end
+        if pos + 1 >= end:
+            return pos
+        command = data[pos+1:pos+2]
+        if command in (DO, DONT, WILL, WONT):
+            if pos + 2 >= end:
+                return pos
+            pos += 3
+        elif command == SB:
+            sb_end = data.find(SE, pos + 3)
+            if sb_end == -1:
+                return pos
+            pos = sb_end + 1
+        else:
+            pos += 2
+
+
+class _TransportSocket(object):
+
+    """
+    Lets telnetlib send its negotiation replies through an asyncio
+    transport.
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    def send(self, data):
+        self.transport.write(data)
+        return len(data)
+
+    def close(self):
+        self.transport.close()
+
+
+class _TelnetStream(asyncio.Protocol):
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def connection_made(self, transport):
+        self.conn.tn.sock = _TransportSocket(transport)
+
+    def data_received(self, data):
+        self.conn._telnet_data_received(data)
+
+    def connection_lost(self, exc):
+        self.conn._eof_received()
+
+
+class AsyncTelnet(AsyncProtocol):
+
+    """
+    The Telnet protocol adapter for asyncio. Option negotiation is
+    handled by the same code as in :class:`Telnet`.
+
+    interact() is not supported.
+    """
+
+    def __init__(self, **kwargs):
+        AsyncProtocol.__init__(self, **kwargs)
+        self.tn = None
+        self.transport = None
+        self.rawq = b''
+
+    def _telnet_data_received(self, data):
+        # Pass on complete IAC sequences only; telnetlib would otherwise
+        # block waiting for the rest of the sequence.
+        data = self.rawq + data
+        length = _complete_length(data)
+        self.rawq = data[length:]
+        if not length:
+            return
+        self.tn.rawq = data[:length]
+        self.tn.irawq = 0
+        self.tn.process_rawq()
+        self.tn.read_very_lazy()  # Data was passed on in the callback.
+
+    async def _connect_hook(self, hostname, port):
+        assert self.tn is None
+        rows, cols = get_terminal_size()
+        self.tn = telnetlib.Telnet(encoding=self.encoding,
+                                   termsize=(rows, cols),
+                                   termtype=self.termtype,
+                                   stderr=self.stderr,
+                                   receive_callback=self._data_received)
+        self.tn.host = hostname
+        self.tn.port = port or 23
+        if self.debug >= 5:
+            self.tn.set_debuglevel(1)
+        coro = self._get_loop().create_connection(lambda: _TelnetStream(self),
+                                                  hostname,
+                                                  port or 23)
+        try:
+            self.transport, stream = await asyncio.wait_for(
+                coro, self.connect_timeout or None)
+        except BaseException:
+            # Allow for another attempt.
+            self.tn = None
+            raise
+        return True
+
+    def send(self, data):
+        self._dbg(4, 'Sending %s' % repr(data))
+        try:
+            self.tn.write(data)
+        except Exception:
+            self._dbg(1, 'Error while writing to connection')
+            raise
+
+    def _set_terminal_size(self, rows, cols):
+        self.tn.set_window_size(rows, cols)
+
+    async def close(self, force=False):
+        if self.tn is None:
+            return
+        if not force:
+            while not self.eof:
+                try:
+                    await self._wait_for_data()
+                except Exception:
+                    break
+            self.response = str(self.buffer)
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        self.tn = None
+        self.buffer.clear()
+        await super(AsyncTelnet, self).close()
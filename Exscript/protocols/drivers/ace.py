@@ -41,6 +41,7 @@ class ACEDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'ace')
+        self.max_confidence = 90
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
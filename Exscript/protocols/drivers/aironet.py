@@ -40,6 +40,7 @@ class AironetDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'aironet')
+        self.max_confidence = 90
         self.user_re = _user_re
         self.prompt_re = _prompt_re
 
@@ -35,6 +35,7 @@ class AIXDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'aix')
+        self.max_confidence = 75
         self.user_re = _user_re
         self.password_re = _password_re
 
@@ -39,6 +39,7 @@ class ArborPeakflowDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'arbor_peakflow')
+        self.max_confidence = 97
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
@@ -42,6 +42,7 @@ class ArubaDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'aruba')
+        self.max_confidence = 88
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
@@ -43,6 +43,7 @@ class BrocadeDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'brocade')
+        self.max_confidence = 95
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
@@ -18,6 +18,7 @@ class CienaSAOSDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'cienasaos')
+        self.max_confidence = 90
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
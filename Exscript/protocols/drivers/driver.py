@@ -88,6 +88,9 @@ class Driver(object):
         self.error_re = _error_re
         self.login_error_re = _login_fail_re
         self.reconnect_between_auth_methods = False
+        self.search_window_size = 150
+        # The highest confidence that the check_*_for_os() methods return.
+        self.max_confidence = 100
 
     def check_protocol_for_os(self, string):
         return 0
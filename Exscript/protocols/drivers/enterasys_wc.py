@@ -41,6 +41,7 @@ class EnterasysWCDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'enterasys_wc')
+        self.max_confidence = 85
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
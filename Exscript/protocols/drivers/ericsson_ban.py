@@ -43,6 +43,7 @@ class EricssonBanDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'ericsson_ban')
+        self.max_confidence = 90
 
         self.user_re = _user_re
         self.password_re = _password_re
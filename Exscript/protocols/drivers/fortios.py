@@ -56,6 +56,7 @@ class FortiOSDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'fortios')
+        self.max_confidence = 50
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
@@ -41,6 +41,7 @@ class HPProCurveDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'hp_pro_curve')
+        self.max_confidence = 95
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
@@ -56,9 +57,6 @@ class HPProCurveDriver(Driver):
         return 0
 
     def clean_response_for_re_match(self, response):
-        start = response[:10].find('\x1b')
-        if start != -1:
-            response = response[start:]
         for regexp, sub in self.clean_res_re:
             response = regexp.subn(sub, response)[0]
         i = response.find('\x1b')
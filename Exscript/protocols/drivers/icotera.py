@@ -12,6 +12,7 @@ class IcoteraDriver(Driver):
         Constructor of the IcoteraDriver.
         """
         Driver.__init__(self, 'icotera')
+        self.max_confidence = 80
         self.user_re = [re.compile(r'user ?name: ?$', re.I)]
         self.password_re = [re.compile(r'(?:[\r\n]Password: ?|last resort password:)$')]
         self.prompt_re = [re.compile(r'.*?>\s*$')]
@@ -44,6 +44,7 @@ class IOSDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'ios')
+        self.max_confidence = 80
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
@@ -36,6 +36,7 @@ class IOSXRDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'ios_xr')
+        self.max_confidence = 95
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
@@ -40,6 +40,7 @@ class NXOSDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'nxos')
+        self.max_confidence = 95
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
@@ -36,6 +36,7 @@ class OneOSDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'one_os')
+        self.max_confidence = 40
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
@@ -35,6 +35,7 @@ class ShellDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'shell')
+        self.max_confidence = 70
         self.user_re = _user_re
         self.password_re = _password_re
 
@@ -37,6 +37,7 @@ class SmartEdgeOSDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'smart_edge_os')
+        self.max_confidence = 60
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
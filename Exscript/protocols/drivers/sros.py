@@ -33,6 +33,7 @@ class SROSDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'sros')
+        self.max_confidence = 95
         self.prompt_re = _prompt_re
 
     def check_head_for_os(self, string):
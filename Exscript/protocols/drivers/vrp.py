@@ -37,6 +37,7 @@ class VRPDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'vrp')
+        self.max_confidence = 80
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
@@ -42,6 +42,7 @@ class VxworksDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'vxworks')
+        self.max_confidence = 90
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
@@ -42,6 +42,7 @@ class ZteDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'zte')
+        self.max_confidence = 90
         self.user_re = _user_re
         self.password_re = _password_re
         self.prompt_re = _prompt_re
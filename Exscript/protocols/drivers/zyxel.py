@@ -36,6 +36,7 @@ class ZyxelDriver(Driver):
 
     def __init__(self):
         Driver.__init__(self, 'zyxel')
+        self.max_confidence = 90
         self.prompt_re = _prompt_re
 
     def check_response_for_os(self, string):
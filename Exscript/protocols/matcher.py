@@ -0,0 +1,270 @@
+#
+# Copyright (C) 2010-2017 Samuel Abels
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Incremental matching of prompts against a protocol's buffer.
+"""
+from __future__ import absolute_import, unicode_literals
+import re
+import threading
+from builtins import object
+from collections import deque
+from ..util.cast import to_regexs
+
+#: The number of combined regular expressions that are cached.
+cache_size = 256
+
+_combined = {}
+_combined_lock = threading.Lock()
+_uncombinable_re = re.compile(r'\\[1-9]|\(\?[aiLmsux]+\)')
+_global_flags = re.L | re.U | getattr(re, 'A', 0)
+_scoped_flags = ((re.I, 'i'), (re.M, 'm'), (re.S, 's'))
+
+
+def _scoped(flags):
+    return ''.join(c for flag, c in _scoped_flags if flags & flag)
+
+
+def combine(prompts):
+    """
+    Returns a single regular expression that matches wherever any of the
+    given regular expressions matches. Every expression is wrapped in a
+    group named after its index (_p0, _p1, ...), so the lastgroup
+    attribute of a match tells which one matched.
+
+    Returns None if there is only one regular expression, or if they can
+    not be combined; e.g. because they use different flags or numbered
+    back references. Results are cached.
+
+    :type  prompts: list[re.RegexObject]
+    :param prompts: A list of compiled regular expressions.
+    :rtype:  re.RegexObject|None
+    :return: The combined regular expression, or None.
+    """
+    if len(prompts) < 2:
+        return None
+    key = tuple(prompts)
+    regex = _combined.get(key)
+    if regex is not None or key in _combined:
+        return regex
+
+    # Flags that can not be scoped to a group must be the same for all.
+    regex = None
+    flags = prompts[0].flags & _global_flags
+    try:
+        if all(p.flags & (_global_flags | re.X) == flags for p in prompts) \
+                and not any(_uncombinable_re.search(p.pattern)
+                            for p in prompts):
+            pattern = '|'.join('(?P<_p%d>(?%s:%s))' % (n,
+                                                       _scoped(p.flags),
+                                                       p.pattern)
+                               for n, p in enumerate(prompts))
+            regex = re.compile(pattern, flags)
+    except (re.error, TypeError):
+        pass
+
+    with _combined_lock:
+        if len(_combined) >= cache_size:
+            _combined.clear()
+        _combined[key] = regex
+    return regex
+
+
+class PromptMatcher(object):
+
+    """
+    Searches the data in a :class:`Exscript.util.buffer.MonitoredBuffer`
+    for prompts. The matcher remembers how far the buffer was already
+    searched, so that repeated searches during a wait only examine data
+    that arrived since the last search, plus a bounded overlap that
+    catches prompts spanning two reads.
+
+    If a clean-up function is used, every piece of incoming data is
+    cleaned only once, and the result is kept for as long as it is
+    inside the search window.
+    """
+
+    def __init__(self, buffer):
+        """
+        Constructor.
+
+        :type  buffer: MonitoredBuffer
+        :param buffer: The buffer that is searched.
+        """
+        self.buffer = buffer
+        self.searched = 0
+        self.cleanup = None
+        self.cleaned = deque()
+        self.cleaned_end = 0
+
+    def reset(self):
+        """
+        Starts a new search. The next call to :class:`search()` examines
+        only the overlap at the end of the buffer, as if everything before
+        had already been searched.
+        """
+        self.searched = self.buffer.offset() + self.buffer.size()
+
+    def _clean(self, start, end, cleanup):
+        # Drop everything that is no longer needed, or that was cleaned
+        # by a different function.
+        cleaned = self.cleaned
+        if cleanup != self.cleanup \
+                or not start <= self.cleaned_end <= end:
+            self.cleanup = cleanup
+            cleaned.clear()
+            self.cleaned_end = start
+        while cleaned and cleaned[0][1] <= start:
+            cleaned.popleft()
+
+        # Clean the data that was received since the last call. An
+        # incomplete tail is left in place and cleaned with the next chunk.
+        if self.cleaned_end < end:
+            text, incomplete_tail = cleanup(
+                self.buffer.tail(end - self.cleaned_end))
+            stop = max(self.cleaned_end, end - len(incomplete_tail))
+            if stop > self.cleaned_end:
+                cleaned.append((self.cleaned_end, stop, text))
+                self.cleaned_end = stop
+
+        # Assemble the search window.
+        window = []
+        pieces = []
+        offset = 0
+        for chunk_start, chunk_end, text in cleaned:
+            if chunk_start < start:
+                text = text[-(chunk_end - start):]
+                chunk_start = start
+            window.append(text)
+            pieces.append((offset, chunk_start, chunk_end, len(text)))
+            offset += len(text)
+        return ''.join(window), pieces
+
+    def _to_stream_offset(self, pieces, pos):
+        # Positions inside a cleaned chunk are mapped to the raw data by
+        # aligning both at the end of the chunk.
+        for offset, chunk_start, chunk_end, length in pieces:
+            if pos <= offset + length:
+                return max(chunk_start, chunk_end - (offset + length - pos))
+        return pieces[-1][2] if pieces else self.cleaned_end
+
+    def search(self, prompts, window=150, cleanup=None):
+        """
+        Searches the data that was appended to the buffer since the last
+        search, including the given number of bytes before it, for the
+        first of the given prompts that matches.
+
+        The clean-up function is passed a string and returns a tuple
+        containing the cleaned string and an incomplete tail that needs
+        more data before it can be cleaned.
+
+        Passing a :class:`PromptSet` avoids combining the prompts on
+        every search.
+
+        :type  prompts: list[re.RegexObject]|PromptSet
+        :param prompts: A list of compiled regular expressions.
+        :type  window: int
+        :param window: The size of the overlap with the last search.
+        :type  cleanup: callable
+        :param cleanup: A function that prepares the data for matching.
+        :rtype:  tuple(int, re.MatchObject, int, int)|None
+        :return: The index of the regular expression that matched, the
+            match object, and the start and end position of the match
+            in the buffer. None if no prompt matched.
+        """
+        head = self.buffer.offset()
+        end = head + self.buffer.size()
+        start = max(head, min(self.searched, end) - window)
+        self.searched = end
+        if cleanup is None:
+            text = self.buffer.tail(end - start)
+        else:
+            text, pieces = self._clean(start, end, cleanup)
+
+        # Most searches happen while the response is still incomplete;
+        # a single pass over the data is enough to rule them out. If
+        # there is a match, only the expressions that precede the one
+        # that matched can take precedence.
+        if isinstance(prompts, PromptSet):
+            regex = prompts.regex
+            prompts = prompts.prompts
+        else:
+            regex = combine(prompts)
+        if regex is not None:
+            hit = regex.search(text)
+            if hit is None:
+                return None
+            prompts = prompts[:int(hit.lastgroup[2:]) + 1]
+
+        for n, regex in enumerate(prompts):
+            match = regex.search(text)
+            if match is not None:
+                break
+        else:
+            return None
+
+        if cleanup is None:
+            return n, match, start - head + match.start(), \
+                start - head + match.end()
+        return n, match, \
+            self._to_stream_offset(pieces, match.start()) - head, \
+            self._to_stream_offset(pieces, match.end()) - head
+
+
+class PromptSet(object):
+
+    """
+    A precompiled set of prompts, grouped into named sections, such as
+    the prompts that are expected during a login. All prompts are
+    combined into a single regular expression, so that the whole set
+    is searched in one pass.
+    """
+
+    def __init__(self, sections):
+        """
+        Constructor.
+
+        :type  sections: list[(str, str|re.RegexObject|list)]
+        :param sections: A list of section names and prompts.
+        """
+        self.map = []
+        self.prompts = []
+        for section, prompts in sections:
+            for prompt in to_regexs(prompts):
+                self.map.append((section, prompt))
+                self.prompts.append(prompt)
+        self.regex = combine(self.prompts)
+
+    def __iter__(self):
+        return iter(self.prompts)
+
+    def get(self, index):
+        """
+        Returns the section name and the prompt with the given index, as
+        returned by :class:`PromptMatcher.search()`.
+
+        :type  index: int
+        :param index: The index of the prompt.
+        :rtype:  (str, re.RegexObject)
+        :return: The name of the section, and the prompt.
+        """
+        return self.map[index]
@@ -22,7 +22,18 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 from __future__ import print_function
 from builtins import object
-from Exscript.protocols.drivers import drivers
+from Exscript.protocols.drivers import drivers, Driver
+
+
+def _overrides(driver, name):
+    # Drivers that do not implement a check always return 0, which can
+    # never beat the initial guess.
+    func = getattr(type(driver), name)
+    return func.__code__ is not getattr(Driver, name).__code__
+
+
+def _max_confidence(check):
+    return check.__self__.max_confidence
 
 
 class OsGuesser(object):
@@ -41,10 +52,18 @@ class OsGuesser(object):
     def __init__(self):
         self.info = {}
         self.debug = False
-        self.protocol_os_map = [d._check_protocol for d in drivers]
-        self.auth_os_map = [d._check_head for d in drivers]
-        self.os_map = [d._check_response for d in drivers]
+        self.protocol_os_map = [d._check_protocol for d in drivers
+                                if _overrides(d, 'check_protocol_for_os')]
+        self.auth_os_map = [d._check_head for d in drivers
+                            if _overrides(d, 'check_head_for_os')]
+        self.os_map = [d._check_response for d in drivers
+                       if _overrides(d, 'check_response_for_os')]
         self.auth_buffer = ''
+        self.head_size = 4096
+        self.overlap = 512
+        # A guess is final once no driver can return a higher confidence.
+        self.sure = max([_max_confidence(f)
+                         for f in self.auth_os_map + self.os_map] or [0])
         self.set('os', 'unknown', 0)
 
     def reset(self, auth_buffer=''):
@@ -100,6 +119,11 @@ class OsGuesser(object):
             return value
         return None
 
+    def _candidates(self, os_map):
+        # Drivers that can not beat the current guess are skipped.
+        confidence = self.info['os'][0]
+        return [f for f in os_map if _max_confidence(f) > confidence]
+
     def data_received(self, data, app_authentication_done):
         # If the authentication procedure is complete, use the normal
         # "runtime" matchers.
@@ -109,12 +133,28 @@ class OsGuesser(object):
                 self.set_from_match('os', self.os_map, data)
             return
 
-        # Else, check the head that we collected so far.
+        # Stop looking if we are already sure.
+        if self.get('os', self.sure) is not None:
+            return
+
+        # Else, check the head that we collected so far. Once the head is
+        # too large, only the new data and the lines before it are kept.
+        # They are prefixed with a newline to prevent patterns that are
+        # anchored at the start from matching.
         self.auth_buffer += data
+        end = len(self.auth_buffer) - len(data) - self.overlap
+        if end > 0 and len(self.auth_buffer) > self.head_size:
+            start = max(self.auth_buffer.rfind('\n', 0, end),
+                        self.auth_buffer.rfind('\r', 0, end))
+            if start < end - self.overlap:
+                start = end - 1
+            self.auth_buffer = '\n' + self.auth_buffer[start + 1:]
         if self.debug:
             print("DEBUG: Matching buffer:", repr(self.auth_buffer))
-        self.set_from_match('os', self.auth_os_map, self.auth_buffer)
-        self.set_from_match('os', self.os_map,      self.auth_buffer)
+        self.set_from_match('os', self._candidates(self.auth_os_map),
+                            self.auth_buffer)
+        self.set_from_match('os', self._candidates(self.os_map),
+                            self.auth_buffer)
 
     def protocol_info(self, data):
         if self.debug:
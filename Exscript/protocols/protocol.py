@@ -42,10 +42,13 @@ from ..util.crypt import otp
 from ..util.event import Event
 from ..util.cast import to_regexs
 from ..util.tty import get_terminal_size
+from ..util import timing
 from .drivers import driver_map, Driver
 from .osguesser import OsGuesser
+from .matcher import PromptMatcher, PromptSet
 from .exception import InvalidCommandException, LoginFailure, \
-        TimeoutException, DriverReplacedException, ExpectCancelledException
+        TimeoutException, DriverReplacedException, ExpectCancelledException, \
+        ProtocolException
 
 try:
     import termios
@@ -211,6 +214,8 @@ class Protocol(object):
           timing issues (this is a race condition that I'm not going to
           detail here).
     """
+    #: The family of the addresses that the protocol can connect to.
+    address_family = socket.AF_UNSPEC
 
     def __init__(self,
                  driver=None,
@@ -256,7 +261,9 @@ class Protocol(object):
         self.data_received_event = Event()
         self.otp_requested_event = Event()
         self.os_guesser = OsGuesser()
-        self.auto_driver = driver_map[self.guess_os()]
+        self.auto_os = None
+        self.auto_driver = None
+        self._update_auto_driver()
         self.proto_authenticated = False
         self.app_authenticated = False
         self.app_authorized = False
@@ -265,8 +272,10 @@ class Protocol(object):
         self.manual_prompt_re = None
         self.manual_error_re = None
         self.manual_login_error_re = None
+        self.login_prompts = {}
         self.driver_replaced = False
         self.host = None
+        self.address = None
         self.port = None
         self.last_account = None
         self.termtype = termtype
@@ -278,6 +287,7 @@ class Protocol(object):
         self.logfile = logfile
         self.response = None
         self.buffer = MonitoredBuffer()
+        self.matcher = PromptMatcher(self.buffer)
         self.account_factory = account_factory
         self.banner_timeout = banner_timeout
         self.encoding = encoding
@@ -325,6 +335,15 @@ class Protocol(object):
         msg = 'Protocol: driver replaced: %s -> %s' % (old.name, new.name)
         self._dbg(1, msg)
 
+    def _update_auto_driver(self):
+        # Look up the driver only if the guess has changed.
+        os = self.guess_os()
+        if os == self.auto_os:
+            return False
+        self.auto_os = os
+        self.auto_driver = driver_map[os]
+        return True
+
     def _receive_cb(self, data, remove_cr=True):
         # Clean the data up.
         text = data.replace('\r', '') if remove_cr else data
@@ -337,10 +356,10 @@ class Protocol(object):
         # Check whether a better driver is found based on the incoming data.
         old_driver = self.get_driver()
         self.os_guesser.data_received(data, self.is_app_authenticated())
-        self.auto_driver = driver_map[self.guess_os()]
-        new_driver = self.get_driver()
-        if old_driver != new_driver:
-            self._driver_replaced_notify(old_driver, new_driver)
+        if self._update_auto_driver():
+            new_driver = self.get_driver()
+            if old_driver != new_driver:
+                self._driver_replaced_notify(old_driver, new_driver)
 
         # Send signals to subscribers.
         self.data_received_event(data)
@@ -438,6 +457,7 @@ class Protocol(object):
         :param regex: The pattern that, when matched, causes an error.
         """
         self.manual_user_re = regex if regex is None else to_regexs(regex)
+        self.login_prompts.clear()
 
     def get_username_prompt(self):
         """
@@ -460,6 +480,7 @@ class Protocol(object):
         :param regex: The pattern that, when matched, causes an error.
         """
         self.manual_password_re = regex if regex is None else to_regexs(regex)
+        self.login_prompts.clear()
 
     def get_password_prompt(self):
         """
@@ -485,6 +506,7 @@ class Protocol(object):
         :param prompt: The pattern that matches the prompt of the remote host.
         """
         self.manual_prompt_re = prompt if prompt is None else to_regexs(prompt)
+        self.login_prompts.clear()
 
     def get_prompt(self):
         """
@@ -531,6 +553,7 @@ class Protocol(object):
         :param error: The pattern that, when matched, causes an error.
         """
         self.manual_login_error_re = error if error is None else to_regexs(error)
+        self.login_prompts.clear()
 
     def get_login_error_prompt(self):
         """
@@ -588,7 +611,7 @@ class Protocol(object):
         """
         raise NotImplementedError()
 
-    def connect(self, hostname=None, port=None):
+    def connect(self, hostname=None, port=None, address=None):
         """
         Opens the connection to the remote host or IP address.
 
@@ -596,12 +619,18 @@ class Protocol(object):
         :param hostname: The remote host or IP address.
         :type  port: int
         :param port: The remote TCP port number.
+        :type  address: string
+        :param address: The IP address of the host, if it was already
+            resolved. The socket connects to this address, while the
+            hostname is still used to look up host keys, and in messages.
         """
         if hostname is not None:
             self.host = hostname
-        conn = self._connect_hook(self.host, port)
+        self.address = address
+        with timing.span('connect'):
+            conn = self._connect_hook(self.host, port)
         self.os_guesser.protocol_info(self.get_remote_version())
-        self.auto_driver = driver_map[self.guess_os()]
+        self._update_auto_driver()
         if self.get_banner():
             self.os_guesser.data_received(self.get_banner(), False)
         return conn
@@ -693,12 +722,13 @@ class Protocol(object):
             user = account.get_name()
             password = account.get_password()
             key = account.get_key()
-            if key is None:
-                self._dbg(1, "Attempting to authenticate %s." % user)
-                self._protocol_authenticate(user, password)
-            else:
-                self._dbg(1, "Authenticate %s with key." % user)
-                self._protocol_authenticate_by_key(user, key)
+            with timing.span('protocol_authenticate'):
+                if key is None:
+                    self._dbg(1, "Attempting to authenticate %s." % user)
+                    self._protocol_authenticate(user, password)
+                else:
+                    self._dbg(1, "Authenticate %s with key." % user)
+                    self._protocol_authenticate_by_key(user, key)
         self.proto_authenticated = True
 
     def is_protocol_authenticated(self):
@@ -711,6 +741,25 @@ class Protocol(object):
         """
         return self.proto_authenticated
 
+    def _get_login_prompts(self):
+        # Wait for any prompt. Once a match is found, we need to be able
+        # to find out which type of prompt was matched, so we build a
+        # structure to allow for mapping the match index back to the
+        # prompt type. It is cached per driver, and dropped whenever one
+        # of the prompts is changed.
+        driver = self.get_driver()
+        prompt_set = self.login_prompts.get(driver)
+        if prompt_set is not None:
+            return prompt_set
+        prompts = (('login-error', self.get_login_error_prompt()),
+                   ('username',    self.get_username_prompt()),
+                   ('skey',        [_skey_re]),
+                   ('password',    self.get_password_prompt()),
+                   ('cli',         self.get_prompt()))
+        prompt_set = PromptSet(prompts)
+        self.login_prompts[driver] = prompt_set
+        return prompt_set
+
     def _app_authenticate(self,
                           account,
                           password,
@@ -719,25 +768,10 @@ class Protocol(object):
         user = account.get_name()
 
         while True:
-            # Wait for any prompt. Once a match is found, we need to be able
-            # to find out which type of prompt was matched, so we build a
-            # structure to allow for mapping the match index back to the
-            # prompt type.
-            prompts = (('login-error', self.get_login_error_prompt()),
-                       ('username',    self.get_username_prompt()),
-                       ('skey',        [_skey_re]),
-                       ('password',    self.get_password_prompt()),
-                       ('cli',         self.get_prompt()))
-            prompt_map = []
-            prompt_list = []
-            for section, sectionprompts in prompts:
-                for prompt in sectionprompts:
-                    prompt_map.append((section, prompt))
-                    prompt_list.append(prompt)
-
             # Wait for the prompt.
+            prompt_set = self._get_login_prompts()
             try:
-                index, match = self._waitfor(prompt_list)
+                index, match = self._waitfor(prompt_set)
             except TimeoutException:
                 if self.response is None:
                     self.response = ''
@@ -755,7 +789,7 @@ class Protocol(object):
                 raise
 
             # Login error detected.
-            section, prompt = prompt_map[index]
+            section, prompt = prompt_set.get(index)
             if section == 'login-error':
                 raise LoginFailure("Login failed")
 
@@ -838,7 +872,8 @@ class Protocol(object):
             user = account.get_name()
             password = account.get_password()
             self._dbg(1, "Attempting to app-authenticate %s." % user)
-            self._app_authenticate(account, password, flush, bailout)
+            with timing.span('app_authenticate'):
+                self._app_authenticate(account, password, flush, bailout)
         self.app_authenticated = True
 
     def is_app_authenticated(self):
@@ -872,7 +907,8 @@ class Protocol(object):
             if password is None:
                 password = account.get_password()
             self._dbg(1, "Attempting to app-authorize %s." % user)
-            self._app_authenticate(account, password, flush, bailout)
+            with timing.span('app_authorize'):
+                self._app_authenticate(account, password, flush, bailout)
         self.app_authorized = True
 
     def auto_app_authorize(self, account=None, flush=True, bailout=False):
@@ -941,17 +977,61 @@ class Protocol(object):
         :return: The index of the prompt regular expression that matched,
           and the match object.
         """
-        self.send(command + '\r')
-        return self.expect_prompt(consume)
+        with timing.span('execute', command=command):
+            self.send(command + '\r')
+            return self.expect_prompt(consume)
 
-    def _domatch(self, prompt, flush):
+    def _fill_buffer(self):
         """
-        Should be overwritten.
+        Should be overwritten. Waits for data from the remote host and
+        appends it to the buffer. Returns False on EOF.
         """
         raise NotImplementedError()
 
+    def _get_cleanup(self, driver):
+        if type(driver).clean_response_for_re_match \
+                == Driver.clean_response_for_re_match:
+            return None
+        return driver.clean_response_for_re_match
+
+    def _domatch(self, prompt, flush):
+        self._dbg(1, "Expecting a prompt")
+        self._dbg(2, "Expected pattern: " +
+                  repr([repr(p.pattern) for p in prompt]))
+        self.matcher.reset()
+        while not self.cancel:
+            # Check whether what's buffered matches the prompt. Data that
+            # was received since the last check is searched completely.
+            driver = self.get_driver()
+            result = self.matcher.search(prompt,
+                                         driver.search_window_size,
+                                         self._get_cleanup(driver))
+            if result is None:
+                if not self._fill_buffer():
+                    error = 'EOF while waiting for response from device'
+                    raise ProtocolException(error)
+                continue
+
+            n, match, start, end = result
+            if flush:
+                self.response = self.buffer.pop(start)
+                self.buffer.pop(end - start)
+            else:
+                self.response = self.buffer.head(start)
+            return n, match
+
+        # Ending up here, self.cancel_expect() was called.
+        self.cancel = False
+        if self.driver_replaced:
+            self.driver_replaced = False
+            raise DriverReplacedException()
+        raise ExpectCancelledException()
+
     def _waitfor(self, prompt):
-        re_list = to_regexs(prompt)
+        if isinstance(prompt, PromptSet):
+            re_list = prompt
+        else:
+            re_list = to_regexs(prompt)
         patterns = [p.pattern for p in re_list]
         self._dbg(2, 'waiting for: ' + repr(patterns))
         return self._domatch(re_list, False)
@@ -1050,7 +1130,10 @@ class Protocol(object):
         else:
             self._dbg(1, "DO NOT CONSUME PROMPT!")
             result = self.waitfor(self.get_prompt())
+        self._check_response_for_errors()
+        return result
 
+    def _check_response_for_errors(self):
         # We skip the first line because it contains the echo of the command
         # sent.
         self._dbg(5, "Checking %s for errors" % repr(self.response))
@@ -1062,8 +1145,6 @@ class Protocol(object):
                 self._dbg(5, "error prompt (%s) matches %s" % args)
                 raise InvalidCommandException('Device said:\n' + self.response)
 
-        return result
-
     def add_monitor(self, pattern, callback, limit=80):
         """
         Calls the given function whenever the given pattern matches the
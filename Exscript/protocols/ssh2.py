@@ -27,7 +27,6 @@ from __future__ import absolute_import, unicode_literals
 from builtins import str
 import sys
 import os
-import time
 import select
 import socket
 import paramiko
@@ -40,11 +39,13 @@ from paramiko import util
 from paramiko.ssh_exception import SSHException, AuthenticationException, \
         BadHostKeyException, BadAuthenticationType
 from ..util.tty import get_terminal_size
+from ..util.impl import monotonic
+from ..util.wakeup import Wakeup
+from ..util import timing
 from ..util.crypt import otp
 from ..key import PrivateKey
 from .protocol import Protocol, _skey_re
-from .exception import ProtocolException, LoginFailure, TimeoutException, \
-        DriverReplacedException, ExpectCancelledException
+from .exception import ProtocolException, LoginFailure, TimeoutException
 
 # Workaround for paramiko error; avoids a warning message.
 util.log_to_file(os.devnull)
@@ -65,6 +66,7 @@ class SSH2(Protocol):
     The secure shell protocol version 2 adapter, based on Paramiko.
     """
     KEEPALIVE_INTERVAL = 2.5 * 60    # Two and a half minutes
+    RECV_SIZE = 65536
 
     def __init__(self, **kwargs):
         Protocol.__init__(self, **kwargs)
@@ -72,6 +74,7 @@ class SSH2(Protocol):
         self.client = None
         self.shell = None
         self.cancel = False
+        self.wakeup = None
 
         # Since each protocol may be created in it's own thread, we must
         # re-initialize the random number generator to make sure that
@@ -150,7 +153,9 @@ class SSH2(Protocol):
 
     def _paramiko_connect(self):
         # Find supported address families.
-        addrinfo = socket.getaddrinfo(self.host, self.port)
+        with timing.span('resolve'):
+            addrinfo = socket.getaddrinfo(self.address or self.host,
+                                          self.port)
         for family, socktype, proto, canonname, sockaddr in addrinfo:
             af = family
             addr = sockaddr
@@ -163,12 +168,14 @@ class SSH2(Protocol):
             self.sock.settimeout(self.connect_timeout or None)
         except:
             pass
-        self.sock.connect(addr)
+        with timing.span('tcp_connect'):
+            self.sock.connect(addr)
 
         # Init the paramiko protocol.
         t = paramiko.Transport(self.sock)
         t.banner_timeout = self.banner_timeout
-        t.start_client()
+        with timing.span('ssh_handshake'):
+            t.start_client()
 
         # Check system host keys.
         server_key = t.get_remote_server_key()
@@ -295,8 +302,7 @@ class SSH2(Protocol):
             # attempts after failing one. So in this hack, we
             # re-connect after each attempt...
             if self.get_driver().reconnect_between_auth_methods:
-                self.close(force=True)
-                self.client = self._paramiko_connect()
+                self._reconnect()
 
             self._dbg(1, 'Authenticating with %s' % method.__name__)
             try:
@@ -317,6 +323,10 @@ class SSH2(Protocol):
                 errors.append(msg)
         raise LoginFailure('Login failed: ' + '; '.join(errors))
 
+    def _reconnect(self):
+        self.close(force=True)
+        self.client = self._paramiko_connect()
+
     def _paramiko_shell(self):
         rows, cols = get_terminal_size()
 
@@ -372,69 +382,46 @@ class SSH2(Protocol):
         self.shell.sendall(data)
 
     def _wait_for_data(self):
-        end = time.time() + self.timeout
-        while True:
-            readable, writeable, excp = select.select([self.shell], [], [], 1)
-            if readable:
-                return True
-            if time.time() > end:
+        if self.wakeup is None:
+            self.wakeup = Wakeup()
+        end = monotonic() + self.timeout
+        while not self.cancel:
+            remaining = end - monotonic()
+            if remaining <= 0:
                 return False
+            readable, writeable, excp = select.select([self.shell, self.wakeup],
+                                                      [], [],
+                                                      remaining)
+            if self.shell in readable:
+                return True
+            if self.wakeup in readable:
+                self.wakeup.clear()
+        return True
 
     def _fill_buffer(self):
         # Wait for a response of the device.
         if not self._wait_for_data():
             error = 'Timeout while waiting for response from device'
             raise TimeoutException(error)
+        if self.cancel:
+            return True
 
-        # Read the response.
-        data = self.shell.recv(200)
+        # Read all of the response that is available.
+        data = self.shell.recv(self.RECV_SIZE)
         if not data:
             return False
-        data = data.decode(self.encoding)
+        chunks = [data]
+        while self.shell.recv_ready():
+            chunks.append(self.shell.recv(self.RECV_SIZE))
+        data = b''.join(chunks).decode(self.encoding)
         self._receive_cb(data, False)
         self.buffer.append(data)
         return True
 
-    def _domatch(self, prompt, flush):
-        self._dbg(1, "Expecting a prompt")
-        self._dbg(2, "Expected pattern: " +
-                  repr([repr(p.pattern) for p in prompt]))
-        search_window_size = 150
-        while not self.cancel:
-            # Check whether what's buffered matches the prompt.
-            driver = self.get_driver()
-            search_window = self.buffer.tail(search_window_size)
-            search_window, incomplete_tail = driver.clean_response_for_re_match(
-                search_window)
-            match = None
-            for n, regex in enumerate(prompt):
-                match = regex.search(search_window)
-                if match is not None:
-                    break
-
-            if not match:
-                if not self._fill_buffer():
-                    error = 'EOF while waiting for response from device'
-                    raise ProtocolException(error)
-                continue
-
-            end = self.buffer.size() - len(search_window) + match.start()
-            if flush:
-                self.response = self.buffer.pop(end)
-                self.buffer.pop(match.end() - match.start())
-            else:
-                self.response = self.buffer.head(end)
-            return n, match
-
-        # Ending up here, self.cancel_expect() was called.
-        self.cancel = False
-        if self.driver_replaced:
-            self.driver_replaced = False
-            raise DriverReplacedException()
-        raise ExpectCancelledException()
-
     def cancel_expect(self):
         self.cancel = True
+        if self.wakeup is not None:
+            self.wakeup.wake()
 
     def _set_terminal_size(self, rows, cols):
         self.shell.resize_pty(cols, rows)
@@ -454,5 +441,8 @@ class SSH2(Protocol):
         self.client = None
         self.sock.close()
         self.sock = None
+        if self.wakeup is not None:
+            self.wakeup.close()
+            self.wakeup = None
         self.buffer.clear()
         super(SSH2, self).close()
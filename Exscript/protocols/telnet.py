@@ -26,11 +26,11 @@ The Telnet protocol.
 from __future__ import absolute_import, unicode_literals
 from future import standard_library
 standard_library.install_aliases()
+import socket
 from ..util.tty import get_terminal_size
 from . import telnetlib
 from .protocol import Protocol
-from .exception import ProtocolException, TimeoutException, \
-        DriverReplacedException, ExpectCancelledException
+from .exception import TimeoutException
 
 
 class Telnet(Protocol):
@@ -38,10 +38,12 @@ class Telnet(Protocol):
     """
     The Telnet protocol adapter.
     """
+    address_family = socket.AF_INET
 
     def __init__(self, **kwargs):
         Protocol.__init__(self, **kwargs)
         self.tn = None
+        self.cancel = False
 
     def _telnetlib_received(self, data):
         self._receive_cb(data, False)
@@ -50,14 +52,15 @@ class Telnet(Protocol):
     def _connect_hook(self, hostname, port):
         assert self.tn is None
         rows, cols = get_terminal_size()
-        self.tn = telnetlib.Telnet(hostname,
-                                   port or 23,
-                                   encoding=self.encoding,
-                                   connect_timeout=self.connect_timeout,
-                                   termsize=(rows, cols),
-                                   termtype=self.termtype,
-                                   stderr=self.stderr,
-                                   receive_callback=self._telnetlib_received)
+        tn = telnetlib.Telnet(encoding=self.encoding,
+                              connect_timeout=self.connect_timeout,
+                              termsize=(rows, cols),
+                              termtype=self.termtype,
+                              stderr=self.stderr,
+                              receive_callback=self._telnetlib_received)
+        tn.open(self.address or hostname, port or 23)
+        tn.host = hostname
+        self.tn = tn
         if self.debug >= 5:
             self.tn.set_debuglevel(1)
         return self.tn is not None
@@ -70,39 +73,30 @@ class Telnet(Protocol):
             self._dbg(1, 'Error while writing to connection')
             raise
 
-    def _domatch(self, prompt, flush):
-        func = self.tn.expect if flush else self.tn.waitfor
-        # Wait for a prompt.
-        clean = self.get_driver().clean_response_for_re_match
-        self.response = None
-        try:
-            result, match, self.response = func(
-                prompt, self.timeout, cleanup=clean)
-        except Exception:
-            self._dbg(1, 'Error while waiting for ' + repr(prompt))
-            raise
-
-        if match:
-            self._dbg(2, "Got a prompt, match was %s" % repr(match.group()))
-            self.buffer.pop(len(self.response))
-
-        self._dbg(5, "Response was %s" % repr(self.response))
-
-        if result == -1:
-            error = 'Error while waiting for response from device'
-            raise TimeoutException(error)
-        if result == -2:
-            if not self.driver_replaced:
-                raise ExpectCancelledException()
-            self.driver_replaced = False
-            raise DriverReplacedException()
-        if self.response is None:
-            raise ProtocolException('whoops - response is None')
-
-        return result, match
+    def _fill_buffer(self):
+        # Wait for a response of the device, unless there is unprocessed
+        # data left.
+        tn = self.tn
+        if not tn.rawq:
+            if not tn._wait_for_data(self.timeout):
+                error = 'Timeout while waiting for response from device'
+                raise TimeoutException(error)
+            if tn.cancel_expect:
+                tn.cancel_expect = False
+                return True
+            tn.fill_rawq()
+            if tn.eof:
+                return False
+
+        # Received data is passed to _telnetlib_received(), so drop the
+        # copy that telnetlib keeps.
+        tn.process_rawq()
+        tn.read_very_lazy()
+        return True
 
     def cancel_expect(self):
-        self.tn.cancel_expect = True
+        self.cancel = True
+        self.tn.cancel_wait()
 
     def _set_terminal_size(self, rows, cols):
         self.tn.set_window_size(rows, cols)
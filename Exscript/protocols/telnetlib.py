@@ -67,14 +67,15 @@ from builtins import object
 
 # Imported modules
 import sys
-import time
 import socket
 import select
 import struct
 from io import StringIO
+from ..util.impl import monotonic
+from ..util.wakeup import Wakeup
+from ..util import timing
 
 __all__ = ["Telnet"]
-py2 = sys.version_info[0] == 2
 
 # Tunable parameters
 DEBUGLEVEL = 0
@@ -82,6 +83,9 @@ DEBUGLEVEL = 0
 # Telnet protocol defaults
 TELNET_PORT = 23
 
+# The maximum number of bytes read from the socket at once.
+RECV_SIZE = 16384
+
 # Telnet protocol characters (don't change)
 IAC = chr(255).encode('latin-1')  # "Interpret As Command"
 DONT = chr(254).encode('latin-1')
@@ -210,6 +214,7 @@ class Telnet(object):
         self.port = port
         self.sock = None
         self.cancel_expect = False
+        self.wakeup = None
         self.rawq = b''
         self.irawq = 0
         self.cookedq = StringIO()
@@ -222,6 +227,7 @@ class Telnet(object):
         self.termtype = kwargs.get('termtype', 'dumb')
         self.data_callback = kwargs.get('receive_callback', None)
         self.data_callback_kwargs = {}
+        self.recv_size = kwargs.get('recv_size', RECV_SIZE)
         if host:
             self.open(host, port)
 
@@ -240,12 +246,15 @@ class Telnet(object):
         self.host = host
         self.port = port
         msg = "getaddrinfo returns an empty list"
-        for res in socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM):
+        with timing.span('resolve'):
+            addrinfo = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)
+        for res in addrinfo:
             af, socktype, proto, canonname, sa = res
             try:
                 self.sock = socket.socket(af, socktype, proto)
                 self.sock.settimeout(self.connect_timeout)
-                self.sock.connect(sa)
+                with timing.span('tcp_connect'):
+                    self.sock.connect(sa)
             except socket.error as msg_:
                 msg = '{} => telnet://{}:{}'.format(msg_, host, port)
                 if self.sock:
@@ -283,6 +292,9 @@ class Telnet(object):
         """Close the connection."""
         if self.sock:
             self.sock.close()
+        if self.wakeup is not None:
+            self.wakeup.close()
+            self.wakeup = None
         self.sock = 0
         self.eof = 1
 
@@ -412,23 +424,29 @@ class Telnet(object):
         Set self.eof when connection is closed.  Don't block unless in
         the midst of an IAC sequence.
         """
-        buf = b''
+        buf = []
         try:
             while self.rawq:
-                # Handle non-IAC first (normal data).
-                char = self.rawq_getchar()
-                if char != IAC:
-                    buf = buf + char
+                # Handle non-IAC first (normal data). Everything up to the
+                # next IAC is passed on in one go.
+                start = self.irawq
+                end = self.rawq.find(IAC, start)
+                if end == -1:
+                    end = len(self.rawq)
+                if end > start:
+                    buf.append(self.rawq[start:end])
+                    self._rawq_skip(end - start)
                     continue
 
                 # Interpret the command byte that follows after the IAC code.
+                self._rawq_skip(1)
                 command = self.rawq_getchar()
                 if command == theNULL:
                     self.msg('IAC NOP')
                     continue
                 elif command == IAC:
                     self.msg('IAC DATA')
-                    buf = buf + command
+                    buf.append(command)
                     continue
 
                 # DO: Indicates the request that the other party perform,
@@ -465,16 +483,14 @@ class Telnet(object):
                     # We only handle the TTYPE command, so skip all other
                     # commands.
                     if opt != TTYPE:
-                        while self.rawq_getchar() != SE:
-                            pass
+                        self._rawq_skip_past(SE)
                         continue
 
                     # We also only handle the SEND_TTYPE option of TTYPE,
                     # so skip everything else.
                     subopt = self.rawq_getchar()
                     if subopt != SEND_TTYPE:
-                        while self.rawq_getchar() != SE:
-                            pass
+                        self._rawq_skip_past(SE)
                         continue
 
                     # Mandatory end of the IAC subcommand.
@@ -502,11 +518,38 @@ class Telnet(object):
                     self.msg('IAC %d not recognized' % ord(command))
         except EOFError:  # raised by self.rawq_getchar()
             pass
-        buf = buf.decode(self.encoding)
+
+        # NUL bytes are padding (e.g. after a CR), and are dropped.
+        buf = b''.join(buf).replace(theNULL, b'').decode(self.encoding)
         self.cookedq.write(buf)
         if self.data_callback is not None:
             self.data_callback(buf, **self.data_callback_kwargs)
 
+    def _rawq_skip(self, n):
+        """Remove the given number of bytes from the raw queue."""
+        self.irawq += n
+        if self.irawq >= len(self.rawq):
+            self.rawq = b''
+            self.irawq = 0
+
+    def _rawq_skip_past(self, char):
+        """Remove everything up to and including the given byte from the
+        raw queue.
+
+        Block if the byte is not yet in the queue.  Raise EOFError
+        when connection is closed.
+
+        """
+        while True:
+            pos = self.rawq.find(char, self.irawq)
+            if pos != -1:
+                self._rawq_skip(pos - self.irawq + 1)
+                return
+            self.rawq = b''
+            self.irawq = 0
+            if self.rawq_getchar() == char:
+                return
+
     def rawq_getchar(self):
         """Get next char from raw queue.
 
@@ -519,15 +562,8 @@ class Telnet(object):
             if self.eof:
                 raise EOFError
 
-        # headaches for Py2/Py3 compatibility...
-        c = self.rawq[self.irawq]
-        if not py2:
-            c = c.to_bytes((c.bit_length()+7)//8, 'big')
-
-        self.irawq += 1
-        if self.irawq >= len(self.rawq):
-            self.rawq = b''
-            self.irawq = 0
+        c = self.rawq[self.irawq:self.irawq+1]
+        self._rawq_skip(1)
         return c
 
     def fill_rawq(self):
@@ -540,9 +576,7 @@ class Telnet(object):
         if self.irawq >= len(self.rawq):
             self.rawq = b''
             self.irawq = 0
-        # The buffer size should be fairly small so as to avoid quadratic
-        # behavior in process_rawq() above.
-        buf = self.sock.recv(64)
+        buf = self.sock.recv(self.recv_size)
         self.msg("recv %s", repr(buf))
         self.eof = (not buf)
         self.rawq = self.rawq + buf
@@ -596,14 +630,39 @@ class Telnet(object):
             else:
                 self.stdout.flush()
 
+    def cancel_wait(self):
+        """Cancel the current call to waitfor() or expect().
+
+        May be called from another thread, or from the receive callback.
+        The waiting call returns (-2, None, '') as soon as possible.
+
+        """
+        self.cancel_expect = True
+        if self.wakeup is not None:
+            self.wakeup.wake()
+
     def _wait_for_data(self, timeout):
-        end = time.time() + timeout
-        while True:
-            readable, writeable, excp = select.select([self.sock], [], [], 1)
-            if readable:
-                return True
-            if time.time() > end:
+        """Wait until data is available on the socket, or until
+        cancel_wait() was called.
+
+        Return False if the timeout expired first.
+
+        """
+        if self.wakeup is None:
+            self.wakeup = Wakeup()
+        end = monotonic() + timeout
+        while not self.cancel_expect:
+            remaining = end - monotonic()
+            if remaining <= 0:
                 return False
+            readable, writeable, excp = select.select([self.sock, self.wakeup],
+                                                      [], [],
+                                                      remaining)
+            if self.sock in readable:
+                return True
+            if self.wakeup in readable:
+                self.wakeup.clear()
+        return True
 
     def _waitfor(self, relist, timeout=None, flush=False, cleanup=None):
         re = None
@@ -662,6 +721,8 @@ class Telnet(object):
             if timeout is not None:
                 if not self._wait_for_data(timeout):  # Workaround for the problem with select() below.
                     break
+                if self.cancel_expect:
+                    continue
                 # The following will sometimes lock even if data is available
                 # and I have no idea why. Do NOT reverse this unless you are sure
                 # that you found the reason. The error is rare, but it does happen.
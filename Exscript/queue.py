@@ -30,14 +30,18 @@ import sys
 import os
 import gc
 import select
+import time
 import threading
 import weakref
 from functools import partial
 from multiprocessing import Pipe
-from .util.cast import to_hosts
+from .util.cast import to_hosts, iter_hosts
 from .util.tty import get_terminal_size
+from .util.ipv4 import is_ip
 from .util.impl import format_exception, serializeable_sys_exc_info
 from .util.decorator import get_label
+from .util.event import Event
+from .util import timing
 from .account import AccountManager, AccountProxy
 from .logger import logger_registry, LoggerProxy
 from .workqueue import WorkQueue, Task
@@ -49,10 +53,12 @@ def _account_factory(accm, host, account):
         account = host.get_account()
 
     # Specific account requested?
-    if account:
-        acquired = AccountProxy.for_account_hash(accm, account.__hash__())
-    else:
-        acquired = AccountProxy.for_host(accm, host)
+    with timing.span('acquire_account'):
+        if account:
+            acquired = AccountProxy.for_account_hash(accm,
+                                                     account.__hash__())
+        else:
+            acquired = AccountProxy.for_host(accm, host)
 
     # Thread-local accounts don't need a remote proxy.
     if acquired:
@@ -61,22 +67,91 @@ def _account_factory(accm, host, account):
     return account
 
 
+def _is_iterator(obj):
+    return hasattr(obj, '__iter__') \
+        and not isinstance(obj, str) \
+        and iter(obj) is obj
+
+
+def _needs_resolution(host, resolver):
+    if resolver is None or host.get_protocol() in ('dummy', 'pseudo'):
+        return False
+    address = host.get_address()
+    return ':' not in address and not is_ip(address)
+
+
+class _LockedPipe(object):
+
+    # The LoggerProxy of a job sends batches from a timer thread, while
+    # the job itself uses the same pipe.
+
+    def __init__(self, pipe):
+        self.pipe = pipe
+        self.lock = threading.Lock()
+
+    def send(self, obj):
+        with self.lock:
+            self.pipe.send(obj)
+
+    def recv(self):
+        return self.pipe.recv()
+
+
+def _resolve_address(to_parent, hostname, family):
+    # The lookup runs in the parent, which holds the resolver's cache.
+    with timing.span('resolve'):
+        to_parent.send(('resolve-address', (hostname, family)))
+        return to_parent.recv()
+
+
+def _run_function(func, job, host, conn, *args, **kwargs):
+    try:
+        return func(job, host, conn, *args, **kwargs)
+    finally:
+        # Drivers may be detected while the function runs, so the driver
+        # is only known afterwards. It is reported with the job's timings.
+        job.data['driver'] = conn.get_driver().name
+
+
 def _prepare_connection(func):
     """
     A decorator that unpacks the host and connection from the job argument
     and passes them as separate arguments to the wrapped function.
     """
-    def _wrapped(job, *args, **kwargs):
+    def _connect_and_run(job, *args, **kwargs):
         job_id = id(job)
-        to_parent = job.data['pipe']
+        to_parent = _LockedPipe(job.data['pipe'])
         host = job.data['host']
-
-        # Create a protocol adapter.
+        pool = job.data.get('connection_pool')
         mkaccount = partial(_account_factory, to_parent, host)
-        pargs = {'account_factory': mkaccount,
-                 'stdout':          job.data['stdout']}
-        pargs.update(host.get_options())
-        conn = prepare(host, **pargs)
+
+        # Reuse a pooled connection, or create a new protocol adapter.
+        conn = pool.checkout(host) if pool is not None else None
+        if conn is None:
+            pargs = {'account_factory': mkaccount,
+                     'stdout':          job.data['stdout']}
+            pargs.update(host.get_options())
+            conn = prepare(host, **pargs)
+            if job.data.get('resolve'):
+                address = _resolve_address(to_parent,
+                                           host.get_address(),
+                                           conn.address_family)
+            else:
+                address = None
+            connect = partial(conn.connect,
+                              host.get_address(),
+                              host.get_tcp_port(),
+                              address=address)
+        else:
+            conn.account_factory = mkaccount
+            conn.stdout = job.data['stdout']
+            connect = None
+
+        # Hand the connection back to the pool, or close it.
+        if pool is not None:
+            release = partial(pool.checkin, host, conn)
+        else:
+            release = partial(conn.close, force=True)
 
         # Connect and run the function.
         log_options = get_label(func, 'log_to')
@@ -87,22 +162,63 @@ def _prepare_connection(func):
             proxy.add_log(job_id, job.name, job.failures + 1)
             conn.data_received_event.listen(log_cb)
             try:
-                conn.connect(host.get_address(), host.get_tcp_port())
-                result = func(job, host, conn, *args, **kwargs)
-                conn.close(force=True)
+                if connect is not None:
+                    connect()
+                result = _run_function(func, job, host, conn, *args, **kwargs)
             except:
+                conn.data_received_event.disconnect(log_cb)
                 proxy.log_aborted(job_id, serializeable_sys_exc_info())
+                if pool is not None:
+                    conn.close(force=True)
                 raise
-            else:
-                proxy.log_succeeded(job_id)
-            finally:
-                conn.data_received_event.disconnect(log_cb)
+
+            # The log must be complete before the connection is handed
+            # back; another job may check it out right away. It is only
+            # marked as succeeded once the connection was handed back.
+            conn.data_received_event.disconnect(log_cb)
+            try:
+                release()
+            except:
+                proxy.log_aborted(job_id, serializeable_sys_exc_info())
+                if pool is not None:
+                    conn.close(force=True)
+                raise
+            proxy.log_succeeded(job_id)
         else:
-            conn.connect(host.get_address(), host.get_tcp_port())
-            result = func(job, host, conn, *args, **kwargs)
-            conn.close(force=True)
+            try:
+                if connect is not None:
+                    connect()
+                result = _run_function(func, job, host, conn, *args, **kwargs)
+                release()
+            except:
+                if pool is not None:
+                    conn.close(force=True)
+                raise
         return result
 
+    def _wrapped(job, *args, **kwargs):
+        spans = job.data.get('timings')
+        if spans is None:
+            return _connect_and_run(job, *args, **kwargs)
+
+        # Collect the spans of the job, and hand them to the parent
+        # once it is done.
+        recorder = timing.start_recording()
+        if job.failures == 0:
+            recorder.spans.extend(spans)
+        try:
+            with recorder.span('job') as job_span:
+                try:
+                    return _connect_and_run(job, *args, **kwargs)
+                finally:
+                    job_span.attrs['driver'] = job.data.pop('driver', None)
+        finally:
+            timing.stop_recording()
+            to_parent = job.data['pipe']
+            attempt = job.failures + 1
+            to_parent.send(('job-timing', (job.name, attempt, recorder.spans)))
+            to_parent.recv()
+
     return _wrapped
 
 
@@ -127,10 +243,12 @@ class _PipeHandler(threading.Thread):
     sub-process to access the accounts and communicate status information.
     """
 
-    def __init__(self, account_manager):
+    def __init__(self, account_manager, timing_event=None, resolver=None):
         threading.Thread.__init__(self)
         self.daemon = True
         self.accm = account_manager
+        self.timing_event = timing_event
+        self.resolver = resolver
         self.to_child, self.to_parent = Pipe()
 
     def _send_account(self, account):
@@ -160,17 +278,28 @@ class _PipeHandler(threading.Thread):
                 self._send_account(account)
             elif command == 'release-account':
                 account = self.accm.get_account_from_hash(arg)
-                account.release()
+                self.accm.release_account(account)
                 self.to_child.send('ok')
             elif command == 'log-add':
                 log = _call_logger('add_log', *arg)
                 self.to_child.send(log)
             elif command == 'log-message':
                 _call_logger('log', *arg)
+            elif command == 'log-messages':
+                logger_id, batch = arg
+                logger = logger_registry.get(logger_id)
+                if logger:
+                    for job_id, message in batch:
+                        logger.log(job_id, message)
             elif command == 'log-aborted':
                 _call_logger('log_aborted', *arg)
             elif command == 'log-succeeded':
                 _call_logger('log_succeeded', *arg)
+            elif command == 'resolve-address':
+                self.to_child.send(self.resolver.resolve(*arg))
+            elif command == 'job-timing':
+                self.timing_event(*arg)
+                self.to_child.send('ok')
             else:
                 raise Exception('invalid command on pipe: ' + repr(command))
         except Exception as e:
@@ -201,7 +330,11 @@ class Queue(object):
                  host_driver=None,
                  exc_cb=None,
                  stdout=sys.stdout,
-                 stderr=sys.stderr):
+                 stderr=sys.stderr,
+                 connection_pool=None,
+                 max_jobs_per_worker=None,
+                 lookahead=None,
+                 resolver=None):
         """
         Constructor. All arguments should be passed as keyword arguments.
         Depending on the verbosity level, the following types
@@ -229,7 +362,8 @@ class Queue(object):
         :type  verbose: int
         :param verbose: The verbosity level.
         :type  mode: str
-        :param mode: 'multiprocessing' or 'threading'
+        :param mode: 'threading', 'multiprocessing', 'thread-pool' or
+            'process-pool'
         :type  max_threads: int
         :param max_threads: The maximum number of concurrent threads.
         :type  host_driver: str
@@ -240,16 +374,39 @@ class Queue(object):
         :param stdout: The output channel, defaults to sys.stdout.
         :type  stderr: file
         :param stderr: The error channel, defaults to sys.stderr.
-        """
-        self.workqueue = WorkQueue(mode=mode)
+        :type  connection_pool: ConnectionPool
+        :param connection_pool: Reuse authenticated connections across jobs.
+            Only supported in 'threading' and 'thread-pool' mode.
+        :type  max_jobs_per_worker: int
+        :param max_jobs_per_worker: In 'process-pool' mode, the number of
+            jobs after which a worker process is replaced.
+        :type  lookahead: int
+        :param lookahead: When run() is passed an iterator of hosts, the
+            maximum number of jobs that are queued or running while the
+            iterator is read. Defaults to twice max_threads.
+        :type  resolver: Resolver
+        :param resolver: Resolves the hostnames of queued hosts in the
+            background. Each job connects to the resolved IP address, but
+            keeps the hostname, e.g. to look up SSH host keys. By default,
+            each protocol resolves the hostname when it connects.
+        """
+        if connection_pool is not None \
+                and mode not in ('threading', 'thread-pool'):
+            raise ValueError('connection pooling requires threading mode')
+        self.workqueue = WorkQueue(mode=mode,
+                                   max_jobs_per_worker=max_jobs_per_worker)
         self.account_manager = AccountManager()
         self.pipe_handlers = weakref.WeakValueDictionary()
+        self.loggers = weakref.WeakValueDictionary()
         self.domain = domain
         self.verbose = verbose
         self.stdout = stdout
         self.stderr = stderr
         self.host_driver = host_driver
         self.exc_cb = exc_cb
+        self.connection_pool = connection_pool
+        self.lookahead = lookahead
+        self.resolver = resolver
         self.devnull = open(os.devnull, 'w')
         self.channel_map = {'fatal_errors': self.stderr,
                             'debug':        self.stdout}
@@ -259,7 +416,15 @@ class Queue(object):
         self.status_bar_length = 0
         self.set_max_threads(max_threads)
 
+        # Emitted with the job name, the number of the attempt, and the
+        # list of spans (see Exscript.util.timing) after each attempt of
+        # a job. Spans are only collected while a handler is connected.
+        self.job_timing_event = Event()
+
         # Listen to what the workqueue is doing.
+        self.workqueue.worker_init_event.listen(self._on_worker_init)
+        self.workqueue.worker_started_event.listen(self._on_worker_started)
+        self.workqueue.worker_destroy_event.listen(self._on_worker_destroy)
         self.workqueue.job_init_event.listen(self._on_job_init)
         self.workqueue.job_started_event.listen(self._on_job_started)
         self.workqueue.job_error_event.listen(self._on_job_error)
@@ -323,7 +488,9 @@ class Queue(object):
 
             pipe.close()
         """
-        child = _PipeHandler(self.account_manager)
+        child = _PipeHandler(self.account_manager,
+                             self.job_timing_event,
+                             self.resolver)
         self.pipe_handlers[id(child)] = child
         child.start()
         return child.to_parent
@@ -380,14 +547,51 @@ class Queue(object):
             return
         self._print('debug', msg)
 
+    def _on_worker_init(self, data):
+        # Pooled workers share one pipe for all of their jobs. The handler
+        # is not registered in self.pipe_handlers, because it lives as long
+        # as the worker, not as long as the job.
+        child = _PipeHandler(self.account_manager,
+                             self.job_timing_event,
+                             self.resolver)
+        child.start()
+        data['pipe'] = child.to_parent
+        data['stdout'] = self.channel_map['connection']
+
+    def _on_worker_started(self, data):
+        # The worker process has its own copy of the pipe.
+        data['pipe'].close()
+
+    def _on_worker_destroy(self, data):
+        data['pipe'].close()
+
     def _on_job_init(self, job):
         if job.data is None:
             job.data = {}
-        job.data['pipe'] = self._create_pipe()
+        if self.workqueue.pool is None:
+            job.data['pipe'] = self._create_pipe()
         job.data['stdout'] = self.channel_map['connection']
+        job.data['connection_pool'] = self.connection_pool
+
+        # Spans that are measured in the main loop are passed to the job,
+        # which adds its own.
+        if self.job_timing_event.n_subscribers() > 0:
+            recorder = timing.start_recording()
+        else:
+            recorder = None
+        try:
+            enqueued = job.data.get('enqueued')
+            if recorder is not None and enqueued is not None:
+                recorder.add('queue_wait', enqueued, time.time())
+        finally:
+            if recorder is not None:
+                timing.stop_recording()
+                job.data['timings'] = recorder.spans
 
     def _on_job_destroy(self, job):
-        job.data['pipe'].close()
+        pipe = job.data.get('pipe')
+        if pipe is not None:
+            pipe.close()
 
     def _on_job_started(self, job):
         self._del_status_bar()
@@ -439,7 +643,7 @@ class Queue(object):
         """
         return self.workqueue.get_max_threads()
 
-    def add_account_pool(self, pool, match=None):
+    def add_account_pool(self, pool, match=None, policies=None):
         """
         Adds a new account pool. If the given match argument is
         None, the pool the default pool. Otherwise, the match argument is
@@ -492,12 +696,20 @@ class Queue(object):
         hostname does not start with 'foo', the function returns False, and
         Exscript takes the 'default-user' account from the default pool.
 
+        To protect the authentication server of a pool from login storms,
+        pass policies that are enforced whenever an account is taken
+        from the pool::
+
+            policies = TokenBucket(20), ConcurrencyLimit(50)
+
         :type  pool: AccountPool
         :param pool: The account pool that is added.
         :type  match: callable
         :param match: A callback to check if the pool should be used.
+        :type  policies: AccountPolicy|list[AccountPolicy]
+        :param policies: Passed to :class:`AccountPool.add_policy()`.
         """
-        self.account_manager.add_pool(pool, match)
+        self.account_manager.add_pool(pool, match, policies)
 
     def add_account(self, account):
         """
@@ -548,6 +760,9 @@ class Queue(object):
 
         self._dbg(2, 'Shutting down queue...')
         self.workqueue.shutdown(True)
+        if self.connection_pool is not None:
+            self.connection_pool.close_all()
+        self._close_loggers()
         self._dbg(2, 'Queue shut down.')
         self._del_status_bar()
 
@@ -566,6 +781,9 @@ class Queue(object):
         finally:
             self._dbg(2, 'Destroying queue...')
             self.workqueue.destroy()
+            if self.connection_pool is not None:
+                self.connection_pool.close_all()
+            self._close_loggers()
             self.account_manager.reset()
             self.completed = 0
             self.total = 0
@@ -588,14 +806,55 @@ class Queue(object):
         self._dbg(2, 'Queue reset.')
         self._del_status_bar()
 
+    def _prepare_account(self, account):
+        # Jobs in a child process receive a copy of the host's account.
+        # To serialize logins across processes, the copy is locked in the
+        # parent through AccountProxy, which needs to look up the account
+        # by hash (see _account_factory()).
+        if account is None or 'process' not in self.workqueue.mode:
+            return
+        if self.account_manager.get_account_from_hash(hash(account)) is None:
+            self.account_manager.register_account(account)
+
+    def _add_logger(self, callback):
+        log_options = get_label(callback, 'log_to')
+        if log_options is None:
+            return
+        logger = logger_registry.get(log_options['logger_id'])
+        if logger is not None:
+            self.loggers[id(logger)] = logger
+
+    def _close_loggers(self):
+        # Loggers that keep files open (such as the BufferedFileLogger)
+        # release them once the queue is done.
+        for logger in list(self.loggers.values()):
+            close = getattr(logger, 'close', None)
+            if close is not None:
+                close()
+
     def _run(self, hosts, callback, queue_function, *args):
-        hosts = to_hosts(hosts, default_domain=self.domain)
-        self.total += len(hosts)
+        # An iterator (such as the generators in Exscript.util.file) is
+        # consumed while the jobs run, so that the first job starts
+        # before the last host is read. Lists are converted right away.
+        if _is_iterator(hosts):
+            hosts = iter_hosts(hosts, default_domain=self.domain)
+            lookahead = self.lookahead or 2 * self.get_max_threads()
+        else:
+            hosts = to_hosts(hosts, default_domain=self.domain)
+            lookahead = None
+        self._add_logger(callback)
         callback = _prepare_connection(callback)
         task = Task(self.workqueue)
         for host in hosts:
+            if lookahead is not None:
+                self.workqueue.wait_until_length(lookahead - 1)
+            self.total += 1
+            self._prepare_account(host.get_account())
             name = host.get_name()
-            data = {'host': host}
+            data = {'host': host, 'enqueued': time.time()}
+            if _needs_resolution(host, self.resolver):
+                self.resolver.prefetch(host.get_address())
+                data['resolve'] = True
             job_id = queue_function(callback, name, *args, data=data)
             if job_id is not None:
                 task.add_job_id(job_id)
@@ -620,7 +879,15 @@ class Queue(object):
         Returns an object that represents the queued task, and that may be
         passed to is_completed() to check the status.
 
-        :type  hosts: string|list(string)|Host|list(Host)
+        If hosts is an iterator, such as the generator returned by
+        :class:`Exscript.util.file.iter_hosts_from_file()`, it is read
+        while the jobs are running; this method then blocks until the
+        last host was enqueued, keeping no more than the given lookahead
+        (see the constructor) of jobs in the queue. Do not pass an
+        iterator from within a running job, as it may then wait for
+        itself.
+
+        :type  hosts: string|list(string)|Host|list(Host)|iterator
         :param hosts: A hostname or Host object, or a list of them.
         :type  function: function
         :param function: The function to execute.
@@ -636,7 +903,7 @@ class Queue(object):
         Like run(), but only appends hosts that are not already in the
         queue.
 
-        :type  hosts: string|list(string)|Host|list(Host)
+        :type  hosts: string|list(string)|Host|list(Host)|iterator
         :param hosts: A hostname or Host object, or a list of them.
         :type  function: function
         :param function: The function to execute.
@@ -654,7 +921,7 @@ class Queue(object):
         """
         Like run(), but adds the task to the front of the queue.
 
-        :type  hosts: string|list(string)|Host|list(Host)
+        :type  hosts: string|list(string)|Host|list(Host)|iterator
         :param hosts: A hostname or Host object, or a list of them.
         :type  function: function
         :param function: The function to execute.
@@ -675,7 +942,7 @@ class Queue(object):
         existing host is moved to the top of the queue instead of enqueuing
         the new one.
 
-        :type  hosts: string|list(string)|Host|list(Host)
+        :type  hosts: string|list(string)|Host|list(Host)|iterator
         :param hosts: A hostname or Host object, or a list of them.
         :type  function: function
         :param function: The function to execute.
@@ -695,7 +962,7 @@ class Queue(object):
         Like priority_run(), but starts the task immediately even if that
         max_threads is exceeded.
 
-        :type  hosts: string|list(string)|Host|list(Host)
+        :type  hosts: string|list(string)|Host|list(Host)|iterator
         :param hosts: A hostname or Host object, or a list of them.
         :type  function: function
         :param function: The function to execute.
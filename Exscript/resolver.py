@@ -0,0 +1,188 @@
+#
+# Copyright (C) 2010-2017 Samuel Abels
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Resolving hostnames before connecting.
+"""
+from __future__ import absolute_import
+from builtins import object
+import time
+import socket
+import threading
+from collections import deque
+
+
+def getaddrinfo(hostname):
+    """
+    Returns the addresses that the system's resolver returns for the
+    given hostname, in the order returned by the system. This is the
+    default lookup function of :class:`Resolver`.
+
+    :type  hostname: str
+    :param hostname: A hostname.
+    :rtype:  list[str]
+    :return: A list of IPv4 and IPv6 addresses.
+    """
+    addresses = []
+    for info in socket.getaddrinfo(hostname, None, 0, socket.SOCK_STREAM):
+        address = info[4][0]
+        if address not in addresses:
+            addresses.append(address)
+    return addresses
+
+
+def _get_family(address):
+    if ':' in address:
+        return socket.AF_INET6
+    return socket.AF_INET
+
+
+class Resolver(object):
+
+    """
+    Resolves hostnames in a bounded number of background threads, and
+    caches the addresses for a limited time. Lookups that fail are not
+    cached.
+    """
+
+    def __init__(self, max_threads=10, ttl=300, timeout=10,
+                 lookup=getaddrinfo):
+        """
+        Constructor.
+
+        :type  max_threads: int
+        :param max_threads: The maximum number of concurrent lookups.
+        :type  ttl: int
+        :param ttl: The number of seconds for which an address is cached.
+        :type  timeout: float
+        :param timeout: The maximum number of seconds that resolve()
+            waits for a lookup.
+        :type  lookup: callable
+        :param lookup: A function that is called with a hostname and
+            returns a list of addresses, or raises an exception. Pass a
+            stub to avoid network access, e.g. in tests.
+        """
+        self.max_threads = max_threads
+        self.ttl = ttl
+        self.timeout = timeout
+        self.lookup = lookup
+        self.lock = threading.Lock()
+        self.cache = {}      # hostname -> (addresses, expiry time)
+        self.pending = {}    # hostname -> threading.Event
+        self.requests = deque()
+        self.threads = 0
+
+    def _get_cached(self, hostname):
+        try:
+            addresses, expires = self.cache[hostname]
+        except KeyError:
+            return None
+        if expires < time.time():
+            del self.cache[hostname]
+            return None
+        return addresses
+
+    def _lookup(self, hostname):
+        try:
+            addresses = self.lookup(hostname)
+        except Exception:
+            # The protocol resolves the hostname again when connecting,
+            # and reports the error.
+            addresses = None
+        with self.lock:
+            if addresses:
+                self.cache[hostname] = addresses, time.time() + self.ttl
+            event = self.pending.pop(hostname, None)
+        if event is not None:
+            event.set()
+
+    def _worker(self):
+        while True:
+            with self.lock:
+                if not self.requests:
+                    self.threads -= 1
+                    return
+                hostname = self.requests.popleft()
+            self._lookup(hostname)
+
+    def _prefetch(self, hostname):
+        # Returns an event that is set once the lookup is complete, or
+        # None if the address is cached. Expects the lock to be held.
+        if self._get_cached(hostname) is not None:
+            return None
+        event = self.pending.get(hostname)
+        if event is not None:
+            return event
+        event = self.pending[hostname] = threading.Event()
+        self.requests.append(hostname)
+        if self.threads >= self.max_threads:
+            return event
+        self.threads += 1
+        thread = threading.Thread(target=self._worker)
+        thread.daemon = True
+        thread.start()
+        return event
+
+    def prefetch(self, hostname):
+        """
+        Starts resolving the given hostname in the background, unless
+        its address is already cached or being resolved.
+
+        :type  hostname: str
+        :param hostname: A hostname.
+        """
+        with self.lock:
+            self._prefetch(hostname)
+
+    def resolve(self, hostname, family=socket.AF_UNSPEC):
+        """
+        Returns the address of the given hostname. If the address is
+        not cached, this method starts a lookup in the background (if
+        none is in progress yet), and waits for it no longer than the
+        timeout that was passed to the constructor.
+
+        :type  hostname: str
+        :param hostname: A hostname.
+        :type  family: int
+        :param family: The address family, e.g. socket.AF_INET. By
+            default, the first address of any family is returned.
+        :rtype:  str|None
+        :return: The address, or None if the lookup failed, timed out,
+            or returned no address of the given family.
+        """
+        with self.lock:
+            event = self._prefetch(hostname)
+        if event is not None:
+            event.wait(self.timeout)
+        with self.lock:
+            addresses = self._get_cached(hostname) or []
+        for address in addresses:
+            if family == socket.AF_UNSPEC or _get_family(address) == family:
+                return address
+        return None
+
+    def clear(self):
+        """
+        Removes all addresses from the cache.
+        """
+        with self.lock:
+            self.cache = {}
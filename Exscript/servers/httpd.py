@@ -122,7 +122,8 @@ def _require_authenticate(func):
         # Check the digest string.
         location = u'%s:%s' % (self.command, self.path)
         location = md5hex(location.encode('utf8'))
-        pwhash = md5hex('%s:%s:%s' % (username, self.server.realm, password))
+        pwhash = u'%s:%s:%s' % (username, self.server.realm, password)
+        pwhash = md5hex(pwhash.encode('utf8'))
 
         if 'qop' in cred:
             info = (cred['nonce'],
@@ -26,8 +26,13 @@ A buffer object.
 from __future__ import absolute_import
 from builtins import object
 from builtins import str
-from io import StringIO
+from collections import deque
 from .cast import to_regexs
+from .impl import deprecation
+
+# Appended data is merged into the last chunk while that chunk is smaller
+# than this, to avoid piling up tiny chunks when reading byte by byte.
+_MERGE_SIZE = 4096
 
 
 class MonitoredBuffer(object):
@@ -35,18 +40,27 @@ class MonitoredBuffer(object):
     """
     A specialized string buffer that allows for monitoring
     the content using regular expression-triggered callbacks.
+
+    The data is stored as a list of chunks, so appending to and popping
+    from the buffer does not copy its content. Every byte has a fixed
+    position in the stream of data that passed through the buffer (see
+    :class:`offset()`), which allows for searching only the data that
+    was added since the last search.
     """
 
     def __init__(self, io=None):
         """
         Constructor.
-        The data is stored in the given file-like object. If no object is
-        given, or the io argument is None, a new StringIO is used.
 
         :type  io: file-like object
-        :param io: A file-like object that is used for storing the data.
-        """
-        self.io = StringIO(u'') if io is None else io
+        :param io: Deprecated and ignored; the data is always kept in
+            memory.
+        """
+        if io is not None:
+            deprecation('the io argument of MonitoredBuffer is ignored')
+        self.chunks = deque()
+        self.length = 0
+        self.stream_offset = 0
         self.monitors = []
         self.clear()
 
@@ -54,7 +68,7 @@ class MonitoredBuffer(object):
         """
         Returns the content of the buffer.
         """
-        return self.io.getvalue()
+        return u''.join(self.chunks)
 
     def size(self):
         """
@@ -63,7 +77,19 @@ class MonitoredBuffer(object):
         :rtype: int
         :return: The size of the buffer in bytes.
         """
-        return self.io.tell()
+        return self.length
+
+    def offset(self):
+        """
+        Returns the position of the first byte of the buffer in the stream
+        of all data that was ever appended, i.e. the number of bytes that
+        were removed from the head of the buffer so far. The position of
+        the end of the buffer is offset() + size().
+
+        :rtype: int
+        :return: The stream offset of the head of the buffer.
+        """
+        return self.stream_offset
 
     def head(self, bytes):
         """
@@ -73,11 +99,13 @@ class MonitoredBuffer(object):
         :type  bytes: int
         :param bytes: The number of bytes to return.
         """
-        oldpos = self.io.tell()
-        self.io.seek(0)
-        head = self.io.read(bytes)
-        self.io.seek(oldpos)
-        return head
+        head = []
+        for chunk in self.chunks:
+            if bytes <= 0:
+                break
+            head.append(chunk[:bytes])
+            bytes -= len(chunk)
+        return u''.join(head)
 
     def tail(self, bytes):
         """
@@ -87,8 +115,13 @@ class MonitoredBuffer(object):
         :type  bytes: int
         :param bytes: The number of bytes to return.
         """
-        self.io.seek(max(0, self.size() - bytes))
-        return self.io.read()
+        tail = []
+        for chunk in reversed(self.chunks):
+            if bytes <= 0:
+                break
+            tail.append(chunk[-bytes:])
+            bytes -= len(chunk)
+        return u''.join(reversed(tail))
 
     def pop(self, bytes):
         """
@@ -97,13 +130,18 @@ class MonitoredBuffer(object):
         :type  bytes: int
         :param bytes: The number of bytes to return and remove.
         """
-        self.io.seek(0)
-        head = self.io.read(bytes)
-        tail = self.io.read()
-        self.io.seek(0)
-        self.io.write(tail)
-        self.io.truncate()
-        return head
+        head = []
+        chunks = self.chunks
+        while bytes > 0 and chunks:
+            chunk = chunks.popleft()
+            if len(chunk) > bytes:
+                chunks.appendleft(chunk[bytes:])
+                chunk = chunk[:bytes]
+            head.append(chunk)
+            bytes -= len(chunk)
+            self.length -= len(chunk)
+            self.stream_offset += len(chunk)
+        return u''.join(head)
 
     def append(self, data):
         """
@@ -113,32 +151,41 @@ class MonitoredBuffer(object):
         :type  data: str
         :param data: The data that is appended.
         """
-        self.io.write(data)
+        if not data:
+            return
+        chunks = self.chunks
+        if chunks and len(chunks[-1]) < _MERGE_SIZE:
+            chunks[-1] += data
+        else:
+            chunks.append(data)
+        self.length += len(data)
         if not self.monitors:
             return
 
         # Check whether any of the monitoring regular expressions matches.
         # If it does, we need to disable that monitor until the matching
         # data is no longer in the buffer. We accomplish this by keeping
-        # track of the position of the last matching byte.
-        buf = str(self)
+        # track of the stream offset of the last matching byte, so only
+        # the new data and a limited lookback are ever searched.
+        end = self.stream_offset + self.length
+        data_start = end - len(data)
         for item in self.monitors:
             regex_list, callback, bytepos, limit = item
-            bytepos = max(bytepos, len(buf) - limit)
+            start = max(bytepos, data_start - limit, self.stream_offset)
+            window = self.tail(end - start)
             for i, regex in enumerate(regex_list):
-                match = regex.search(buf, bytepos)
+                match = regex.search(window)
                 if match is not None:
-                    item[2] = match.end()
+                    item[2] = start + match.end()
                     callback(i, match)
 
     def clear(self):
         """
         Removes all data from the buffer.
         """
-        self.io.seek(0)
-        self.io.truncate()
-        for item in self.monitors:
-            item[2] = 0
+        self.stream_offset += self.length
+        self.chunks.clear()
+        self.length = 0
 
     def add_monitor(self, pattern, callback, limit=80):
         """
@@ -146,14 +193,15 @@ class MonitoredBuffer(object):
         buffer.
 
         Arguments passed to the callback are the index of the match, and
-        the match object of the regular expression.
+        the match object of the regular expression. The match object
+        refers to the searched part of the buffer only.
 
         :type  pattern: str|re.RegexObject|list(str|re.RegexObject)
         :param pattern: One or more regular expressions.
         :type  callback: callable
         :param callback: The function that is called.
         :type  limit: int
-        :param limit: The maximum size of the tail of the buffer
-                      that is searched, in number of bytes.
+        :param limit: The maximum number of bytes preceding newly appended
+                      data that are searched along with it.
         """
         self.monitors.append([to_regexs(pattern), callback, 0, limit])
@@ -80,8 +80,27 @@ def to_hosts(hosts, default_protocol='telnet', default_domain=''):
     :rtype:  list[Host]
     :return: A list of Host objects.
     """
-    return [to_host(h, default_protocol, default_domain)
-            for h in to_list(hosts)]
+    return list(iter_hosts(hosts, default_protocol, default_domain))
+
+
+def iter_hosts(hosts, default_protocol='telnet', default_domain=''):
+    """
+    Like to_hosts(), but returns a generator that converts one host at a
+    time, so that the given hosts may also be a (possibly very long)
+    iterator such as the one returned by
+    :class:`Exscript.util.file.iter_hosts_from_file()`.
+
+    :type  hosts: string|Host|list(string)|list(Host)|iterable
+    :param hosts: One or more hosts or hostnames.
+    :type  default_protocol: str
+    :param default_protocol: Passed to the Host constructor.
+    :type  default_domain: str
+    :param default_domain: Appended to each hostname that has no domain.
+    :rtype:  generator[Host]
+    :return: The Host objects.
+    """
+    for host in to_list(hosts):
+        yield to_host(host, default_protocol, default_domain)
 
 
 def to_regex(regex, flags=0):
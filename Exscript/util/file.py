@@ -93,11 +93,53 @@ def get_hosts_from_file(filename,
     :rtype:  list[Host]
     :return: The newly created host instances.
     """
-    # Open the file.
+    return list(iter_hosts_from_file(filename,
+                                     default_protocol,
+                                     default_domain,
+                                     remove_duplicates,
+                                     encoding))
+
+
+def iter_hosts_from_file(filename,
+                         default_protocol='telnet',
+                         default_domain='',
+                         remove_duplicates=False,
+                         encoding='utf-8'):
+    """
+    Like get_hosts_from_file(), but returns a generator that reads the
+    file while it is consumed, creating one host at a time. Passing the
+    result to :class:`Exscript.Queue.run()` starts the first job without
+    waiting for the rest of the file.
+
+    :type  filename: string
+    :param filename: A full filename.
+    :type  default_protocol: str
+    :param default_protocol: Passed to the Host constructor.
+    :type  default_domain: str
+    :param default_domain: Appended to each hostname that has no domain.
+    :type  remove_duplicates: bool
+    :param remove_duplicates: Whether duplicates are removed.
+    :type  encoding: str
+    :param encoding: The encoding of the file.
+    :rtype:  generator[Host]
+    :return: The newly created host instances.
+    """
+    # Open the file. This is done before the first host is requested, so
+    # that a missing file is reported right away.
     if not os.path.exists(filename):
         raise IOError('No such file: %s' % filename)
-
-    hosts = []
+    return _iter_hosts_from_file(filename,
+                                 default_protocol,
+                                 default_domain,
+                                 remove_duplicates,
+                                 encoding)
+
+
+def _iter_hosts_from_file(filename,
+                          default_protocol,
+                          default_domain,
+                          remove_duplicates,
+                          encoding):
     with codecs.open(filename, 'r', encoding) as file_handle:
         # Read the hostnames.
         have = set()
@@ -105,12 +147,11 @@ def get_hosts_from_file(filename,
             hostname = line.split('#')[0].strip()
             if hostname == '':
                 continue
-            if remove_duplicates and hostname in have:
-                continue
-            have.add(hostname)
-            hosts.append(to_host(hostname, default_protocol, default_domain))
-
-    return hosts
+            if remove_duplicates:
+                if hostname in have:
+                    continue
+                have.add(hostname)
+            yield to_host(hostname, default_protocol, default_domain)
 
 
 def get_hosts_from_csv(filename,
@@ -151,11 +192,40 @@ def get_hosts_from_csv(filename,
     :rtype:  list[Host]
     :return: The newly created host instances.
     """
-    # Open the file.
+    return list(iter_hosts_from_csv(filename,
+                                    default_protocol,
+                                    default_domain,
+                                    encoding))
+
+
+def iter_hosts_from_csv(filename,
+                        default_protocol='telnet',
+                        default_domain='',
+                        encoding='utf-8'):
+    """
+    Like get_hosts_from_csv(), but returns a generator that reads the
+    file while it is consumed. A host is produced as soon as the first
+    line of the next host is read, so only one host is held in memory
+    at a time.
+
+    :type  filename: string
+    :param filename: A full filename.
+    :type  default_protocol: str
+    :param default_protocol: Passed to the Host constructor.
+    :type  default_domain: str
+    :param default_domain: Appended to each hostname that has no domain.
+    :type  encoding: str
+    :param encoding: The encoding of the file.
+    :rtype:  generator[Host]
+    :return: The newly created host instances.
+    """
+    # Open the file and check the header before the first host is
+    # requested, so that errors are reported right away.
     if not os.path.exists(filename):
         raise IOError('No such file: %s' % filename)
 
-    with codecs.open(filename, 'r', encoding) as file_handle:
+    file_handle = codecs.open(filename, 'r', encoding)
+    try:
         # Read and check the header.
         header = file_handle.readline().rstrip()
         if re.search(r'^(?:hostname|address)\b', header) is None:
@@ -166,14 +236,27 @@ def get_hosts_from_csv(filename,
             msg = 'Syntax error in CSV file header:'
             msg += ' Make sure to separate columns by tabs.'
             raise Exception(msg)
-        varnames = [str(v) for v in header.split('\t')]
-        varnames.pop(0)
-
-        # Walk through all lines and create a map that maps hostname to
-        # definitions.
+    except:
+        file_handle.close()
+        raise
+    varnames = [str(v) for v in header.split('\t')]
+    varnames.pop(0)
+    return _iter_hosts_from_csv(file_handle,
+                                varnames,
+                                default_protocol,
+                                default_domain)
+
+
+def _iter_hosts_from_csv(file_handle,
+                         varnames,
+                         default_protocol,
+                         default_domain):
+    with file_handle:
+        # Walk through all lines and collect the definitions of each host.
+        # Consecutive lines with the same address belong to the same host.
         last_uri = ''
         line_re = re.compile(r'[\r\n]*$')
-        hosts = []
+        host = None
         for line in file_handle:
             if line.strip() == '':
                 continue
@@ -182,12 +265,12 @@ def get_hosts_from_csv(filename,
             values = line.split('\t')
             uri = values.pop(0).strip()
 
-            # Add the hostname to our list.
+            # Start the next host.
             if uri != last_uri:
-                # print "Reading hostname", hostname_url, "from csv."
+                if host is not None:
+                    yield host
                 host = to_host(uri, default_protocol, default_domain)
                 last_uri = uri
-                hosts.append(host)
 
             # Define variables according to the definition.
             for i, varname in enumerate(varnames):
@@ -200,7 +283,8 @@ def get_hosts_from_csv(filename,
                 else:
                     host.append(varname, value)
 
-    return hosts
+        if host is not None:
+            yield host
 
 
 def load_lib(filename):
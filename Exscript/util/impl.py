@@ -25,10 +25,15 @@ Development tools.
 """
 from builtins import object
 import sys
+import time
 import warnings
 import traceback
 from functools import wraps
 
+#: A clock that is not affected by system clock updates, for measuring
+#: timeouts. Falls back to time.time() on Python 2.
+monotonic = getattr(time, 'monotonic', time.time)
+
 
 def add_label(obj, name, **kwargs):
     """
@@ -63,7 +63,7 @@ def is_ip(string):
     mo = re.match(r'(\d+)\.(\d+)\.(\d+)\.(\d+)', string)
     if mo is None:
         return False
-    return all(int(group) in list(range(256)) for group in mo.groups())
+    return all(int(group) < 256 for group in mo.groups())
 
 
 def normalize_ip(ip):
@@ -0,0 +1,108 @@
+#
+# Copyright (C) 2010-2017 Samuel Abels
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Pluggable synchronization primitives.
+"""
+from __future__ import absolute_import
+from builtins import object
+import threading
+import multiprocessing
+
+
+class SyncBackend(object):
+
+    """
+    Creates the locks and conditions that are used by objects that may
+    be shared between threads, or between processes.
+    """
+
+    def __init__(self, name, module):
+        """
+        Constructor.
+
+        :type  name: str
+        :param name: The name of the backend.
+        :type  module: module
+        :param module: A module that provides Lock, RLock and Condition.
+        """
+        self.name = name
+        self.module = module
+
+    def lock(self):
+        """
+        Returns a new, non-recursive lock.
+        """
+        return self.module.Lock()
+
+    def rlock(self):
+        """
+        Returns a new, recursive lock.
+        """
+        return self.module.RLock()
+
+    def condition(self, lock=None):
+        """
+        Returns a new condition variable that uses the given lock.
+
+        :type  lock: object
+        :param lock: A lock that was created by the same backend, or None.
+        """
+        return self.module.Condition(lock)
+
+
+backends = {'threading': SyncBackend('threading', threading),
+            'multiprocessing': SyncBackend('multiprocessing', multiprocessing)}
+_default = [backends['threading']]
+
+
+def get_backend(backend=None):
+    """
+    Returns the backend with the given name. If None is given, the
+    default backend is returned.
+
+    :type  backend: str|SyncBackend|None
+    :param backend: A backend, or the name of a backend.
+    :rtype:  SyncBackend
+    :return: The backend.
+    """
+    if backend is None:
+        return _default[0]
+    if isinstance(backend, SyncBackend):
+        return backend
+    try:
+        return backends[backend]
+    except KeyError:
+        raise ValueError('unknown sync backend: ' + repr(backend))
+
+
+def set_default_backend(backend):
+    """
+    Changes the backend that is used by objects that are created
+    without an explicit backend.
+    Threading primitives are the default; the 'multiprocessing' backend
+    is only needed if an object is shared with forked processes.
+
+    :type  backend: str|SyncBackend
+    :param backend: A backend, or the name of a backend.
+    """
+    _default[0] = get_backend(backend)
@@ -23,11 +23,96 @@
 """
 Executing Exscript templates on a connection.
 """
+import os
+import copy
+import threading
+from collections import OrderedDict
 from Exscript import stdlib
 from Exscript.interpreter import Parser
 
 
-def _compile(conn, filename, template, parser_kwargs, **kwargs):
+class TemplateCache(object):
+
+    """
+    Keeps compiled templates, so that a template that is executed on
+    many connections is only lexed and parsed once.
+
+    A compiled template holds state while it is executed, so it can only
+    be used by one thread at a time. The cache therefore keeps a list of
+    idle copies for each template; executing a template on several
+    connections at the same time compiles one copy per concurrent
+    execution. When more than max_templates different templates are
+    cached, the least recently used one is dropped.
+    """
+
+    def __init__(self, max_templates=64):
+        """
+        Constructor.
+
+        :type  max_templates: int
+        :param max_templates: The maximum number of cached templates.
+        """
+        self.max_templates = max_templates
+        self.lock = threading.Lock()
+        self.templates = OrderedDict()  # Map key to a list of idle copies.
+        self.hits = 0
+        self.misses = 0
+
+    def checkout(self, key, compile_func):
+        """
+        Returns an idle compiled template for the given key, removing it
+        from the cache. If there is none, compile_func is called to
+        compile a new one.
+
+        :type  key: object
+        :param key: A hashable key that identifies the template.
+        :type  compile_func: callable
+        :param compile_func: Returns a new compiled template.
+        :rtype:  Exscript.interpreter.Program
+        :return: The compiled template.
+        """
+        with self.lock:
+            idle = self.templates.pop(key, None)
+            if idle is not None:
+                self.templates[key] = idle
+                if idle:
+                    self.hits += 1
+                    return idle.pop()
+            self.misses += 1
+        return compile_func()
+
+    def checkin(self, key, compiled):
+        """
+        Returns a compiled template that was obtained using
+        :class:`checkout()` to the cache.
+
+        :type  key: object
+        :param key: The key that was passed to checkout().
+        :type  compiled: Exscript.interpreter.Program
+        :param compiled: The compiled template.
+        """
+        with self.lock:
+            idle = self.templates.pop(key, None)
+            if idle is None:
+                idle = []
+                while len(self.templates) >= self.max_templates:
+                    self.templates.popitem(last=False)
+            self.templates[key] = idle
+            idle.append(compiled)
+
+    def clear(self):
+        """
+        Removes all compiled templates from the cache.
+        """
+        with self.lock:
+            self.templates.clear()
+
+#: The cache that is used by :class:`eval()`, :class:`paste()`, and the
+#: functions that read the template from a file.
+cache = TemplateCache()
+
+
+def _get_builtins(conn, filename):
     if conn:
         hostname = conn.get_host()
         account = conn.last_account
@@ -35,16 +120,18 @@ def _compile(conn, filename, template, parser_kwargs, **kwargs):
     else:
         hostname = 'undefined'
         username = None
+    return dict(__filename__=[filename or 'undefined'],
+                __username__=[username],
+                __hostname__=[hostname],
+                __connection__=conn)
 
+
+def _compile(conn, filename, template, parser_kwargs, **kwargs):
     # Init the parser.
     parser = Parser(**parser_kwargs)
 
     # Define the built-in variables and functions.
-    builtin = dict(__filename__=[filename or 'undefined'],
-                   __username__=[username],
-                   __hostname__=[hostname],
-                   __connection__=conn)
-    parser.define_object(**builtin)
+    parser.define_object(**_get_builtins(conn, filename))
     parser.define_object(**stdlib.functions)
 
     # Allow for overriding built-in variables.
@@ -54,9 +141,54 @@ def _compile(conn, filename, template, parser_kwargs, **kwargs):
     return parser.parse(template, parser.variables.get('__filename__')[0])
 
 
+def _get_key(source, parser_kwargs, kwargs):
+    # Variables are bound when the template is executed, but the parser
+    # checks that they are defined, and whether functions are secure.
+    names = tuple(sorted((name, value if callable(value) else None)
+                         for name, value in kwargs.items()))
+    key = source, tuple(sorted(parser_kwargs.items())), names
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _execute(conn, filename, source, read, parser_kwargs, kwargs):
+    def compile_template():
+        return _compile(None, filename, read(), parser_kwargs, **kwargs)
+
+    # Bind the variables like Parser.define() does.
+    parser = Parser()
+    parser.define_object(**_get_builtins(conn, filename))
+    parser.define(**kwargs)
+    variables = copy.deepcopy(parser.variables)
+
+    key = _get_key(source, parser_kwargs, kwargs)
+    if key is None:
+        return compile_template().execute(variables=variables)
+    compiled = cache.checkout(key, compile_template)
+    try:
+        return compiled.execute(variables=variables)
+    finally:
+        cache.checkin(key, compiled)
+
+
 def _run(conn, filename, template, parser_kwargs, **kwargs):
-    compiled = _compile(conn, filename, template, parser_kwargs, **kwargs)
-    return compiled.execute()
+    source = 'string', filename, template
+    return _execute(conn, filename, source, lambda: template,
+                    parser_kwargs, kwargs)
+
+
+def _run_file(conn, filename, parser_kwargs, name, **kwargs):
+    # The file is only read if it changed since it was compiled.
+    stat = os.stat(filename)
+    source = 'file', os.path.abspath(filename), stat.st_mtime, stat.st_size
+
+    def read():
+        with open(filename, 'r') as fp:
+            return fp.read()
+    return _execute(conn, name, source, read, parser_kwargs, kwargs)
 
 
 def test(string, **kwargs):
@@ -126,6 +258,9 @@ def eval(conn, string, strip_command=True, **kwargs):
 
     By setting strip_command to True, the first line is ommitted.
 
+    The compiled template is kept in :data:`cache`, so executing the
+    same template on many connections compiles it only once.
+
     :type  conn: Exscript.protocols.Protocol
     :param conn: The connection on which to run the template.
     :type  string: string
@@ -156,8 +291,7 @@ def eval_file(conn, filename, strip_command=True, **kwargs):
     :param kwargs: Variables to define in the template.
     """
     parser_args = {'strip_command': strip_command}
-    with open(filename, 'r') as fp:
-        return _run(conn, filename, fp.read(), parser_args, **kwargs)
+    return _run_file(conn, filename, parser_args, filename, **kwargs)
 
 
 def paste(conn, string, **kwargs):
@@ -196,5 +330,4 @@ def paste_file(conn, filename, **kwargs):
     :type  kwargs: dict
     :param kwargs: Variables to define in the template.
     """
-    with open(filename, 'r') as fp:
-        return _run(conn, None, fp.read(), {'no_prompt': True}, **kwargs)
+    return _run_file(conn, filename, {'no_prompt': True}, None, **kwargs)
@@ -0,0 +1,207 @@
+#
+# Copyright (C) 2010-2017 Samuel Abels
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Measuring where the time of a job goes.
+"""
+from __future__ import absolute_import
+from builtins import object
+import json
+import time
+import threading
+
+_local = threading.local()
+
+
+class _NoSpan(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span(object):
+    __slots__ = ('recorder', 'name', 'attrs', 'start')
+
+    def __init__(self, recorder, name, attrs):
+        self.recorder = recorder
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.recorder.add(self.name, self.start, time.time(), **self.attrs)
+
+
+class Recorder(object):
+
+    """
+    Collects the timing spans of one job. A span is a dictionary that
+    contains at least the name of the span, the start time (in seconds
+    since the epoch), and the duration (in seconds).
+    """
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+        self.spans = []
+
+    def add(self, name, start, end, **attrs):
+        """
+        Adds a span that was measured elsewhere.
+
+        :type  name: str
+        :param name: The name of the span.
+        :type  start: float
+        :param start: The start time, as returned by time.time().
+        :type  end: float
+        :param end: The end time, as returned by time.time().
+        :type  attrs: dict
+        :param attrs: Additional values that are stored in the span.
+        """
+        attrs['name'] = name
+        attrs['start'] = start
+        attrs['duration'] = end - start
+        self.spans.append(attrs)
+
+    def span(self, name, **attrs):
+        """
+        Returns a context manager that adds a span covering the block
+        that it wraps. If the block raises an exception, the name of the
+        exception class is stored in the 'error' value of the span.
+
+        :type  name: str
+        :param name: The name of the span.
+        :type  attrs: dict
+        :param attrs: Additional values that are stored in the span.
+        :rtype:  object
+        :return: A context manager.
+        """
+        return _Span(self, name, attrs)
+
+
+def start_recording():
+    """
+    Starts collecting the spans of the current thread in a new
+    :class:`Recorder`, which is returned.
+
+    :rtype:  Recorder
+    :return: The recorder of the current thread.
+    """
+    recorder = _local.recorder = Recorder()
+    return recorder
+
+
+def stop_recording():
+    """
+    Stops collecting the spans of the current thread.
+
+    :rtype:  Recorder|None
+    :return: The recorder of the current thread, if any.
+    """
+    recorder = getattr(_local, 'recorder', None)
+    _local.recorder = None
+    return recorder
+
+
+def span(name, **attrs):
+    """
+    Like :class:`Recorder.span()`, using the recorder of the current
+    thread. If the thread is not recording, the returned context manager
+    does nothing, so that the cost of an unused span is a lookup of a
+    thread-local variable.
+
+    :type  name: str
+    :param name: The name of the span.
+    :type  attrs: dict
+    :param attrs: Additional values that are stored in the span.
+    :rtype:  object
+    :return: A context manager.
+    """
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is None:
+        return _NO_SPAN
+    return _Span(recorder, name, attrs)
+
+
+class JsonLinesExporter(object):
+
+    """
+    Writes the timings of each job to a file, one JSON object per line.
+    To use it, connect it to the :class:`Exscript.Queue.job_timing_event`::
+
+        exporter = JsonLinesExporter('timings.jsonl')
+        queue.job_timing_event.connect(exporter)
+
+    Each line looks like this::
+
+        {"job": "myhost", "attempt": 1, "spans": [{"name": "connect", ...}]}
+    """
+
+    def __init__(self, filename, mode='a'):
+        """
+        Constructor.
+
+        :type  filename: str
+        :param filename: The name of the file.
+        :type  mode: str
+        :param mode: The mode in which the file is opened.
+        """
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.file = open(filename, mode)
+
+    def __call__(self, job_name, attempt, spans):
+        """
+        Writes the given spans.
+
+        :type  job_name: str
+        :param job_name: The name of the job.
+        :type  attempt: int
+        :param attempt: The number of the attempt, starting with 1.
+        :type  spans: list[dict]
+        :param spans: The spans of the job.
+        """
+        line = json.dumps({'job': job_name,
+                           'attempt': attempt,
+                           'spans': spans})
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+
+    def close(self):
+        """
+        Closes the file.
+        """
+        with self.lock:
+            self.file.close()
@@ -47,6 +47,13 @@ def _get_terminal_size(fd):
     return rows, cols
 
 
+def _isatty(fd):
+    try:
+        return os.isatty(fd)
+    except (OSError, ValueError):
+        return False
+
+
 def get_terminal_size(default_rows=25, default_cols=80):
     """
     Returns the number of lines and columns of the current terminal.
@@ -112,21 +119,25 @@ def get_terminal_size(default_rows=25, default_cols=80):
         finally:
             os.close(fd)
 
-    # Try `stty size`
-    with open(os.devnull, 'w') as devnull:
-        try:
-            process = Popen(['stty', 'size'], stderr=devnull, stdout=PIPE,
-                            close_fds=True)
-        except (OSError, ValueError):
-            pass
-        else:
-            errcode = process.wait()
-            output = process.stdout.read()
+    # Try `stty size`. stty reads the terminal from stdin, so don't
+    # bother forking it if stdin is not a terminal.
+    if _isatty(0):
+        with open(os.devnull, 'w') as devnull:
             try:
-                rows, cols = output.split()
-                return int(rows), int(cols)
-            except (ValueError, TypeError):
+                process = Popen(['stty', 'size'],
+                                stderr=devnull,
+                                stdout=PIPE,
+                                close_fds=True)
+            except (OSError, ValueError):
                 pass
+            else:
+                errcode = process.wait()
+                output = process.stdout.read()
+                try:
+                    rows, cols = output.split()
+                    return int(rows), int(cols)
+                except (ValueError, TypeError):
+                    pass
 
     # Try environment variables.
     try:
@@ -56,6 +56,9 @@ _WELL_KNOWN_PORTS = {
     'imap':  143
 }
 
+# Matches a bare hostname or IPv4 address, which needs no further parsing.
+_PLAIN_HOSTNAME_RE = re.compile(r'[\w.-]+\Z')
+
 def _unquote(string):
     """_unquote('abc%20def') -> 'abc def'."""
     result = string.split('%')
@@ -187,8 +190,16 @@ class Url(object):
         if url is None:
             raise TypeError('Expected string but got' + type(url))
 
-        # Extract the protocol name from the URL.
+        # Fast path for a plain hostname or IP address.
         result = Url()
+        if _PLAIN_HOSTNAME_RE.match(url):
+            result.protocol = default_protocol
+            result.vars = OrderedDefaultDict(list)
+            result.hostname = url
+            result.port = _WELL_KNOWN_PORTS.get(default_protocol)
+            return result
+
+        # Extract the protocol name from the URL.
         match = re.match(r'(\w+)://', url)
         result.protocol = match.group(1) if match else default_protocol
         # Now remove the query from the url.
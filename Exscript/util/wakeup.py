@@ -0,0 +1,107 @@
+#
+# Copyright (C) 2010-2017 Samuel Abels
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Waking up threads that are blocked in select().
+"""
+from __future__ import absolute_import
+from builtins import object
+import errno
+import socket
+
+
+def _socketpair():
+    if hasattr(socket, 'socketpair'):
+        return socket.socketpair()
+
+    # Windows on Python < 3.5 has no socketpair().
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        writer = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        writer.connect(listener.getsockname())
+        reader, addr = listener.accept()
+    finally:
+        listener.close()
+    return reader, writer
+
+
+class Wakeup(object):
+
+    """
+    An object that can be passed to select.select() and that becomes
+    readable when :class:`wake()` is called, e.g. from another thread or
+    from a callback. Usage::
+
+        wakeup = Wakeup()
+        readable, w, x = select.select([sock, wakeup], [], [], timeout)
+        if wakeup in readable:
+            wakeup.clear()
+    """
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+        self.reader, self.writer = _socketpair()
+        self.reader.setblocking(False)
+        self.writer.setblocking(False)
+
+    def fileno(self):
+        """
+        Returns the file descriptor that becomes readable on wake().
+
+        :rtype:  int
+        :return: The file descriptor.
+        """
+        return self.reader.fileno()
+
+    def wake(self):
+        """
+        Makes the file descriptor readable, waking up any select() call
+        that is waiting for it.
+        """
+        try:
+            self.writer.send(b'\0')
+        except socket.error as e:
+            # If the socket buffer is full, the reader is awake anyway.
+            if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                raise
+
+    def clear(self):
+        """
+        Resets the file descriptor to not readable.
+        """
+        while True:
+            try:
+                if not self.reader.recv(4096):
+                    return
+            except socket.error:
+                return
+
+    def close(self):
+        """
+        Closes the file descriptors.
+        """
+        self.reader.close()
+        self.writer.close()
@@ -92,6 +92,34 @@ Thread = _make_process_class(threading.Thread, 'Thread')
 Process = _make_process_class(multiprocessing.Process, 'Process')
 
 
+class Inline(object):
+
+    """
+    Like Thread and Process, but runs the function in the thread that
+    calls start(), and passes the result to a callback instead of a pipe.
+    Used by the worker pools, which provide their own threads or processes.
+    """
+
+    def __init__(self, id, function, name, data):
+        self.id = id
+        self.function = function
+        self.name = name
+        self.failures = 0
+        self.data = data
+
+    def start(self, callback):
+        """
+        Runs the associated function, then calls the callback with None
+        on success, or with the (serializable) exception info.
+        """
+        try:
+            self.function(self)
+        except:
+            callback(serializeable_sys_exc_info())
+        else:
+            callback(None)
+
+
 class Job(object):
     __slots__ = ('id',
                  'func',
@@ -33,7 +33,7 @@ multiprocessing.process._cleanup = lambda: None
 
 class MainLoop(threading.Thread):
 
-    def __init__(self, collection, job_cls):
+    def __init__(self, collection, job_cls, pool=None):
         threading.Thread.__init__(self)
         self.job_init_event = Event()
         self.job_started_event = Event()
@@ -43,6 +43,7 @@ class MainLoop(threading.Thread):
         self.queue_empty_event = Event()
         self.collection = collection
         self.job_cls = job_cls
+        self.pool = pool
         self.debug = 5
         self.daemon = True
 
@@ -91,6 +92,13 @@ class MainLoop(threading.Thread):
     def get_queue_length(self):
         return len(self.collection)
 
+    def _start_job(self, job):
+        if self.pool is None:
+            job.start(self.job_cls, self._on_job_completed)
+        else:
+            self.pool.start(job, self._on_job_completed)
+        self.job_started_event(job.child)
+
     def _on_job_completed(self, job, exc_info):
         # This function is called in a sub-thread, so we need to be
         # careful that we are not in a lock while sending an event.
@@ -118,8 +126,7 @@ class MainLoop(threading.Thread):
             # Remove the watcher from the queue, and re-enque if needed.
             if exc_info and job.failures < job.times:
                 self._dbg(1, 'Restarting job "%s"' % job.name)
-                job.start(self.job_cls, self._on_job_completed)
-                self.job_started_event(job.child)
+                self._start_job(job)
             else:
                 self.collection.task_done(job)
 
@@ -134,7 +141,6 @@ class MainLoop(threading.Thread):
                 break  # self.collection.stop() was called.
 
             self.job_init_event(job)
-            job.start(self.job_cls, self._on_job_completed)
-            self.job_started_event(job.child)
+            self._start_job(job)
             self._dbg(1, 'Job "%s" started.' % job.name)
         self._dbg(2, 'Main loop terminated.')
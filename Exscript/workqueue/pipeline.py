@@ -213,6 +213,15 @@ class Pipeline(object):
             while len(self) > 0:
                 self.condition.wait()
 
+    def wait_for_length(self, length):
+        """
+        Waits until no more than the given number of tasks are queued
+        or running.
+        """
+        with self.condition:
+            while len(self) > length:
+                self.condition.wait()
+
     def with_lock(self, function, *args, **kwargs):
         with self.condition:
             return function(self, *args, **kwargs)
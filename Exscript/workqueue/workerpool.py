@@ -0,0 +1,523 @@
+#
+# Copyright (C) 2010-2017 Samuel Abels
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Pools of long-lived workers that run jobs from the workqueue.
+"""
+from __future__ import absolute_import
+import pickle
+import weakref
+import threading
+import multiprocessing
+from collections import deque
+from functools import partial
+from multiprocessing import Pipe
+from ..util.event import Event
+from ..util.impl import monotonic, serializeable_sys_exc_info
+from .job import Inline
+
+
+def _merge_data(job_data, worker_data):
+    if not worker_data:
+        return job_data
+    data = dict(job_data or {})
+    data.update(worker_data)
+    return data
+
+
+def _error_info(message):
+    try:
+        raise Exception(message)
+    except Exception:
+        return serializeable_sys_exc_info()
+
+
+def _pickle_data(data, exclude):
+    # Returns the job data in pickled form, leaving out the keys that the
+    # worker provides itself. Returns None if the data can not be pickled.
+    if isinstance(data, dict):
+        data = dict((k, v) for k, v in data.items() if k not in exclude)
+    try:
+        return pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+
+
+def _serve(functions, collection, conn, worker_data, max_jobs):
+    """
+    The main loop of a worker process. The functions were registered
+    before the worker was forked, so only a key is sent along with the
+    pickled job data. Jobs with data that can not be pickled are looked
+    up by id in the copy of the collection that the worker inherited.
+    """
+    n_jobs = 0
+    while max_jobs is None or n_jobs < max_jobs:
+        try:
+            request = conn.recv()
+        except (EOFError, IOError):
+            break
+        if request is None:
+            break
+        job_id, name, failures, func_key, blob = request
+        func = functions.get(func_key)
+        if func is not None and blob is not None:
+            data = pickle.loads(blob)
+        else:
+            job = collection.id2item.get(job_id)
+            if job is None:
+                # Enqueued after this worker was forked.
+                conn.send(('unknown', job_id, None))
+                continue
+            func, data = job.func, job.data
+        data = _merge_data(data, worker_data)
+        child = Inline(job_id, func, name, data)
+        child.failures = failures
+        child.start(lambda result: conn.send(('done', job_id, result)))
+        n_jobs += 1
+    conn.close()
+
+
+class _Worker(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.job = None
+        self.callback = None
+        self.spawned_for = None
+        self.stopping = False
+        self.n_jobs = 0
+        self.busy = 0.0
+        self.started = monotonic()
+        self.job_started = None
+
+    def begin(self, job, callback):
+        self.job = job
+        self.callback = callback
+        self.job_started = monotonic()
+
+    def end(self):
+        job, callback = self.job, self.callback
+        if job is not None:
+            self.busy += monotonic() - self.job_started
+        self.job = None
+        self.callback = None
+        self.job_started = None
+        return job, callback
+
+    def get_stats(self, now):
+        busy = self.busy
+        if self.job_started is not None:
+            busy += now - self.job_started
+        uptime = now - self.started
+        return {'name':        self.name,
+                'jobs':        self.n_jobs,
+                'busy':        busy,
+                'uptime':      uptime,
+                'utilization': busy / uptime if uptime > 0 else 0.0}
+
+
+class _ProcessWorker(_Worker):
+
+    def __init__(self, pool, data):
+        self.data = data
+        self.functions = set(pool.functions)
+        self.conn, child_conn = Pipe()
+        self.process = multiprocessing.Process(target=_serve,
+                                               args=(dict(pool.functions),
+                                                     pool.collection,
+                                                     child_conn,
+                                                     data,
+                                                     pool.max_jobs))
+        self.process.daemon = True
+        self.process.start()
+        child_conn.close()
+        _Worker.__init__(self, self.process.name)
+        self.reader = threading.Thread(target=pool._read, args=(self,))
+        self.reader.daemon = True
+        self.reader.start()
+
+    def get_stats(self, now):
+        stats = _Worker.get_stats(self, now)
+        stats['pid'] = self.process.pid
+        return stats
+
+    def send(self, request):
+        try:
+            self.conn.send(request)
+        except (EOFError, IOError, ValueError):
+            return False
+        return True
+
+
+class ProcessPool(object):
+
+    """
+    Runs jobs in a set of long-lived worker processes, instead of forking
+    a new process for every job.
+
+    Workers are forked when a job is started and no idle worker is
+    available, so the number of workers follows the number of concurrently
+    running jobs. Job functions are often closures that can not be
+    pickled, so each function is registered with the pool when the first
+    job that uses it is started, and workers that are forked afterwards
+    inherit it. A worker that knows the function of a job then receives
+    only the pickled job data. If the data can not be pickled, the worker
+    looks the job up in the copy of the queue that it inherited; only
+    if it does not know the job either, the job is passed to a freshly
+    forked worker.
+
+    Per-worker resources (such as the pipe over which a worker talks to
+    the account manager) may be attached using the worker_init_event:
+    listeners receive a dictionary that is merged into the data of every
+    job the worker runs. The worker_started_event is sent with the same
+    dictionary once the worker was forked, e.g. to close the parent's
+    end of a pipe, and the worker_destroy_event after the worker exited.
+    """
+
+    def __init__(self, collection, max_jobs_per_worker=None):
+        """
+        Constructor.
+
+        :type  collection: Pipeline
+        :param collection: The collection that holds the jobs.
+        :type  max_jobs_per_worker: int
+        :param max_jobs_per_worker: Replace a worker after this many jobs.
+            None means that workers are never replaced.
+        """
+        self.collection = collection
+        self.max_jobs = max_jobs_per_worker
+        self.worker_init_event = Event()
+        self.worker_started_event = Event()
+        self.worker_destroy_event = Event()
+        self.lock = threading.Lock()
+        self.workers = []
+        self.idle = []
+        self.functions = {}  # Map a key to a function of a running job.
+        self.func_refs = {}  # Map a key to the number of running jobs.
+        self.func2key = weakref.WeakKeyDictionary()
+        self.next_key = 0
+
+    def _register(self, func):
+        # Must be called with the lock held. A function keeps its key for
+        # as long as it is alive, so workers recognize it in later jobs.
+        # Keys are never reused for another function.
+        try:
+            key = self.func2key.get(func)
+        except TypeError:
+            key = None
+        if key is None:
+            key = self.next_key
+            self.next_key += 1
+            try:
+                self.func2key[func] = key
+            except TypeError:
+                pass  # Not weakly referenceable; gets a new key next time.
+        if key not in self.functions:
+            self.functions[key] = func
+            self.func_refs[key] = 0
+        self.func_refs[key] += 1
+        return key
+
+    def _unregister(self, key):
+        # Must be called with the lock held.
+        self.func_refs[key] -= 1
+        if self.func_refs[key] == 0:
+            del self.func_refs[key]
+            del self.functions[key]
+
+    def _spawn(self):
+        # Must be called with the lock held, so that no other worker
+        # inherits the child end of the new worker's pipe.
+        data = {}
+        self.worker_init_event(data)
+        worker = _ProcessWorker(self, data)
+        self.worker_started_event(data)
+        self.workers.append(worker)
+        return worker
+
+    def _remove(self, worker):
+        # Must be called with the lock held.
+        if worker in self.workers:
+            self.workers.remove(worker)
+        if worker in self.idle:
+            self.idle.remove(worker)
+
+    def _get_idle(self, func_key):
+        # Must be called with the lock held.
+        for n in range(len(self.idle) - 1, -1, -1):
+            if func_key in self.idle[n].functions:
+                return self.idle.pop(n)
+        return None
+
+    def _dispatch(self, job, callback, fresh=False):
+        while True:
+            with self.lock:
+                worker = None if fresh else self._get_idle(job.child.key)
+                if worker is None:
+                    worker = self._spawn()
+                    worker.spawned_for = job.id
+                worker.begin(job, callback)
+            blob = _pickle_data(job.data, worker.data)
+            request = job.id, job.name, job.failures, job.child.key, blob
+            if worker.send(request):
+                return
+            # The worker died while it was idle.
+            with self.lock:
+                worker.end()
+                self._remove(worker)
+
+    def _on_response(self, worker, status, result):
+        with self.lock:
+            job, callback = worker.end()
+            if status == 'done':
+                worker.n_jobs += 1
+                self._unregister(job.child.key)
+            retire = worker.stopping \
+                or (self.max_jobs is not None
+                    and worker.n_jobs >= self.max_jobs) \
+                or len(self.idle) >= self.collection.get_max_working()
+            if retire:
+                self._remove(worker)
+            else:
+                self.idle.append(worker)
+        if retire:
+            worker.send(None)
+
+        if status == 'done':
+            callback(result)
+        elif worker.spawned_for != job.id:
+            self._dispatch(job, callback, fresh=True)
+        else:
+            with self.lock:
+                self._unregister(job.child.key)
+            callback(_error_info('job %s not found in worker' % job.id))
+
+    def _read(self, worker):
+        while True:
+            try:
+                status, job_id, result = worker.conn.recv()
+            except (EOFError, IOError):
+                break
+            self._on_response(worker, status, result)
+
+        with self.lock:
+            job, callback = worker.end()
+            self._remove(worker)
+            if job is not None:
+                self._unregister(job.child.key)
+        worker.conn.close()
+        worker.process.join()
+        self.worker_destroy_event(worker.data)
+        if job is not None:
+            msg = 'worker %s exited with code %s' % (worker.name,
+                                                    worker.process.exitcode)
+            callback(_error_info(msg))
+
+    def start(self, job, on_complete):
+        """
+        Runs the given job in a worker process. The on_complete callback
+        is invoked with the job and the exception info (None on success).
+
+        :type  job: Job
+        :param job: The job to run.
+        :type  on_complete: callable
+        :param on_complete: Called when the job is completed.
+        """
+        job.child = Inline(job.id, job.func, job.name, job.data)
+        job.child.failures = job.failures
+        with self.lock:
+            job.child.key = self._register(job.func)
+        self._dispatch(job, partial(on_complete, job))
+
+    def get_stats(self):
+        """
+        Returns a list of dictionaries that describe each worker. The
+        dictionaries contain the name and pid of the worker, the number
+        of jobs that it completed, the time that it spent running jobs
+        ('busy'), its age ('uptime'), and busy / uptime ('utilization').
+
+        :rtype:  list[dict]
+        :return: A dictionary per worker.
+        """
+        now = monotonic()
+        with self.lock:
+            return [w.get_stats(now) for w in self.workers]
+
+    def shutdown(self, wait=True):
+        """
+        Stops all workers. Workers that are currently running a job exit
+        once the job is completed. The pool may still be used afterwards;
+        new workers are started as needed.
+
+        :type  wait: bool
+        :param wait: Whether to wait until all workers have exited.
+        """
+        with self.lock:
+            workers = list(self.workers)
+            idle = self.idle
+            self.idle = []
+            self.workers = []
+            for worker in workers:
+                worker.stopping = True
+        for worker in idle:
+            worker.send(None)
+        if wait:
+            for worker in workers:
+                worker.reader.join()
+
+
+class _ThreadWorker(_Worker):
+
+    def __init__(self, pool, data):
+        self.data = data
+        self.thread = threading.Thread(target=pool._serve, args=(self,))
+        self.thread.daemon = True
+        _Worker.__init__(self, self.thread.name)
+        self.thread.start()
+
+
+class ThreadPool(object):
+
+    """
+    Runs jobs in a set of persistent worker threads, instead of starting
+    a new thread (plus a watcher thread and a pipe) for every job.
+
+    Like :class:`ProcessPool`, the pool grows with the number of
+    concurrently running jobs, and idle workers exceeding the maximum
+    number of working jobs of the collection exit. Results are passed
+    to the completion callback directly by the worker thread.
+
+    The worker_init_event and worker_destroy_event work as in
+    :class:`ProcessPool`; there is no worker_started_event, since the
+    worker shares all resources with the parent.
+    """
+
+    def __init__(self, collection):
+        """
+        Constructor.
+
+        :type  collection: Pipeline
+        :param collection: The collection that holds the jobs.
+        """
+        self.collection = collection
+        self.worker_init_event = Event()
+        self.worker_destroy_event = Event()
+        self.cond = threading.Condition(threading.Lock())
+        self.workers = []
+        self.jobs = deque()
+        self.n_idle = 0
+
+    def _spawn(self):
+        # Must be called with the lock held.
+        data = {}
+        self.worker_init_event(data)
+        worker = _ThreadWorker(self, data)
+        self.workers.append(worker)
+        return worker
+
+    def _serve(self, worker):
+        while True:
+            with self.cond:
+                while not self.jobs and not worker.stopping:
+                    self.cond.wait()
+                if not self.jobs:
+                    break
+                job, callback = self.jobs.popleft()
+                worker.begin(job, callback)
+
+            data = _merge_data(job.data, worker.data)
+            child = Inline(job.id, job.func, job.name, data)
+            child.failures = job.failures
+            results = []
+            child.start(results.append)
+
+            with self.cond:
+                worker.end()
+                worker.n_jobs += 1
+                retire = worker.stopping \
+                    or self.n_idle >= self.collection.get_max_working()
+                if retire:
+                    if worker in self.workers:
+                        self.workers.remove(worker)
+                else:
+                    self.n_idle += 1
+            callback(results[0])
+            if retire:
+                break
+
+        with self.cond:
+            if worker in self.workers:
+                self.workers.remove(worker)
+        self.worker_destroy_event(worker.data)
+
+    def start(self, job, on_complete):
+        """
+        Runs the given job in a worker thread. The on_complete callback
+        is invoked with the job and the exception info (None on success).
+
+        :type  job: Job
+        :param job: The job to run.
+        :type  on_complete: callable
+        :param on_complete: Called when the job is completed.
+        """
+        job.child = Inline(job.id, job.func, job.name, job.data)
+        job.child.failures = job.failures
+        with self.cond:
+            if self.n_idle > 0:
+                self.n_idle -= 1
+            else:
+                self._spawn()
+            self.jobs.append((job, partial(on_complete, job)))
+            self.cond.notify()
+
+    def get_stats(self):
+        """
+        Like :class:`ProcessPool.get_stats()`, but the dictionaries
+        have no pid.
+
+        :rtype:  list[dict]
+        :return: A dictionary per worker.
+        """
+        now = monotonic()
+        with self.cond:
+            return [w.get_stats(now) for w in self.workers]
+
+    def shutdown(self, wait=True):
+        """
+        Stops all workers. Workers that are currently running a job exit
+        once the job is completed. The pool may still be used afterwards;
+        new workers are started as needed.
+
+        :type  wait: bool
+        :param wait: Whether to wait until all workers have exited.
+        """
+        with self.cond:
+            workers = self.workers
+            self.workers = []
+            self.n_idle = 0
+            for worker in workers:
+                worker.stopping = True
+            self.cond.notify_all()
+        if wait:
+            for worker in workers:
+                if worker.thread is not threading.current_thread():
+                    worker.thread.join()
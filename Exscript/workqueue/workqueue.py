@@ -26,6 +26,7 @@ from ..util.event import Event
 from .job import Thread, Process
 from .pipeline import Pipeline
 from .mainloop import MainLoop
+from .workerpool import ProcessPool, ThreadPool
 
 
 class WorkQueue(object):
@@ -39,26 +40,53 @@ class WorkQueue(object):
                  collection=None,
                  debug=0,
                  max_threads=1,
-                 mode='threading'):
+                 mode='threading',
+                 max_jobs_per_worker=None):
         """
         Constructor.
 
+        In 'threading' and 'multiprocessing' mode, a new thread or process
+        is started for each job. In 'thread-pool' and 'process-pool' mode,
+        jobs are run by long-lived worker threads or processes; see
+        :class:`ThreadPool` and :class:`ProcessPool`.
+
         :type  debug: int
         :param debug: The debug level.
         :type  max_threads: int
         :param max_threads: The maximum number of concurrent threads.
+        :type  mode: str
+        :param mode: 'threading', 'multiprocessing', 'thread-pool' or
+            'process-pool'.
+        :type  max_jobs_per_worker: int
+        :param max_jobs_per_worker: In 'process-pool' mode, the number of
+            jobs after which a worker is replaced by a fresh one.
         """
+        if collection is None:
+            self.collection = Pipeline(max_threads)
+        else:
+            self.collection = collection
+            collection.set_max_working(max_threads)
+        self.mode = mode
+        self.pool = None
+        self.worker_init_event = Event()
+        self.worker_started_event = Event()
+        self.worker_destroy_event = Event()
         if mode == 'threading':
             self.job_cls = Thread
         elif mode == 'multiprocessing':
             self.job_cls = Process
+        elif mode == 'thread-pool':
+            self.job_cls = None
+            self.pool = ThreadPool(self.collection)
+        elif mode == 'process-pool':
+            self.job_cls = None
+            self.pool = ProcessPool(self.collection, max_jobs_per_worker)
+            self.pool.worker_started_event.listen(self.worker_started_event)
         else:
             raise TypeError('invalid "mode" argument: ' + repr(mode))
-        if collection is None:
-            self.collection = Pipeline(max_threads)
-        else:
-            self.collection = collection
-            collection.set_max_working(max_threads)
+        if self.pool is not None:
+            self.pool.worker_init_event.listen(self.worker_init_event)
+            self.pool.worker_destroy_event.listen(self.worker_destroy_event)
         self.job_init_event = Event()
         self.job_started_event = Event()
         self.job_error_event = Event()
@@ -70,7 +98,7 @@ class WorkQueue(object):
         self._init()
 
     def _init(self):
-        self.main_loop = MainLoop(self.collection, self.job_cls)
+        self.main_loop = MainLoop(self.collection, self.job_cls, self.pool)
         self.main_loop.debug = self.debug
         self.main_loop.job_init_event.listen(self.job_init_event)
         self.main_loop.job_started_event.listen(self.job_started_event)
@@ -252,6 +280,16 @@ class WorkQueue(object):
         """
         self.collection.wait_all()
 
+    def wait_until_length(self, length):
+        """
+        Waits until no more than the given number of jobs are queued
+        or in progress.
+
+        :type  length: int
+        :param length: The maximum length of the queue.
+        """
+        self.collection.wait_for_length(length)
+
     def shutdown(self, restart=True):
         """
         Stop the execution of enqueued jobs, and wait for all running
@@ -272,6 +310,8 @@ class WorkQueue(object):
         self.collection.wait()
         self.main_loop.join()
         self.main_loop = None
+        if self.pool is not None:
+            self.pool.shutdown()
         self.collection.clear()
         if restart:
             self.collection.start()
@@ -286,6 +326,8 @@ class WorkQueue(object):
         self.collection.stop()
         self.main_loop.join()
         self.main_loop = None
+        if self.pool is not None:
+            self.pool.shutdown(False)
         self.collection.clear()
 
     def is_paused(self):
@@ -309,6 +351,19 @@ class WorkQueue(object):
         """
         return self.collection.get_working()
 
+    def get_worker_stats(self):
+        """
+        Returns statistics about the workers in 'thread-pool' and
+        'process-pool' mode; see :class:`ProcessPool.get_stats()`.
+        In other modes the list is empty.
+
+        :rtype:  list[dict]
+        :return: A dictionary per worker.
+        """
+        if self.pool is None:
+            return []
+        return self.pool.get_stats()
+
     def get_length(self):
         """
         Returns the number of currently non-completed jobs.
@@ -5,7 +5,8 @@ import os.path
 import warnings
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
-from Exscript.account import Account, AccountPool, AccountManager
+from Exscript.account import Account, AccountPool, AccountManager, \
+    TokenBucket, ConcurrencyLimit
 
 
 class AccountManagerTest(unittest.TestCase):
@@ -53,6 +54,12 @@ class AccountManagerTest(unittest.TestCase):
         self.am.add_pool(pool2, match_cb)
         self.assertEqual(self.am.default_pool, pool1)
 
+        # Attach a policy to the pool.
+        bucket = TokenBucket(10)
+        pool3 = AccountPool()
+        self.am.add_pool(pool3, match_cb, bucket)
+        self.assertEqual(pool3.policies, [bucket])
+
     def testGetAccountFromHash(self):
         pool1 = AccountPool()
         acc1 = Account('user1')
@@ -64,6 +71,22 @@ class AccountManagerTest(unittest.TestCase):
         self.assertEqual(self.am.get_account_from_hash(acc1.__hash__()), acc1)
         self.assertEqual(self.am.get_account_from_hash(acc2.__hash__()), acc2)
 
+    def testRegisterAccount(self):
+        account = Account('user1')
+        self.am.register_account(account)
+        self.assertEqual(self.am.get_account_from_hash(account.__hash__()),
+                         account)
+        self.assertEqual(self.am.default_pool.n_accounts(), 0)
+
+        # Registered accounts are not owned by a pool.
+        self.assertEqual(self.am.acquire_account(account), account)
+        self.assertFalse(account.lock.acquire(False))
+        account.release()
+
+        self.am.reset()
+        self.assertEqual(self.am.get_account_from_hash(account.__hash__()),
+                         None)
+
     def testAcquireAccount(self):
         account1 = Account('user1', 'test')
         self.assertRaises(ValueError, self.am.acquire_account)
@@ -104,6 +127,30 @@ class AccountManagerTest(unittest.TestCase):
         self.assertEqual(self.data, {'match-called': True, 'host': 'myhost'})
         self.assertEqual(self.account, account)
 
+    def testReleaseAccount(self):
+        limit = ConcurrencyLimit(1)
+        account1 = Account('foo', needs_lock=False)
+        pool = AccountPool(account1)
+        self.am.add_pool(pool, lambda x: True, policies=limit)
+        account2 = Account('bar')
+        self.am.add_account(account2)
+        account3 = Account('baz')
+
+        for n in range(2):
+            account = self.am.acquire_account_for('myhost')
+            self.assertEqual(account, account1)
+            self.assertEqual(limit.active, 1)
+            self.am.release_account(account)
+            self.assertEqual(limit.active, 0)
+
+        self.am.release_account(self.am.acquire_account(account2))
+        self.assertIn(account2, self.am.default_pool.unlocked_accounts)
+
+        # Accounts that are not in any pool are released directly.
+        self.am.acquire_account(account3)
+        self.am.release_account(account3)
+        self.assertTrue(account3.lock.acquire(False))
+
     def testReleaseAccounts(self):
         account1 = Account('foo')
         pool = AccountPool()
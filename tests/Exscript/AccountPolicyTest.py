@@ -0,0 +1,105 @@
+import sys
+import unittest
+import re
+import os.path
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from Exscript.account import AccountPolicy, TokenBucket, ConcurrencyLimit
+
+
+class FakePolicy(AccountPolicy):
+
+    def __init__(self):
+        AccountPolicy.__init__(self)
+        self.blocked = False
+
+    def _wait(self):
+        if self.blocked:
+            time.sleep(.01)
+        return self.blocked
+
+
+class AccountPolicyTest(unittest.TestCase):
+    CORRELATE = AccountPolicy
+
+    def setUp(self):
+        self.policy = FakePolicy()
+
+    def testConstructor(self):
+        policy = AccountPolicy()
+        self.assertRaises(NotImplementedError, policy.acquire)
+
+    def testAcquire(self):
+        self.assertLess(self.policy.acquire(), .01)
+        self.policy.blocked = True
+        self.assertGreaterEqual(self.policy.acquire(), .01)
+
+    def testRelease(self):
+        self.policy.release()
+
+    def testGetMetrics(self):
+        self.assertEqual(self.policy.get_metrics(), {'acquired': 0,
+                                                     'waited': 0,
+                                                     'wait_time': 0.0,
+                                                     'max_wait': 0.0})
+        self.testAcquire()
+        metrics = self.policy.get_metrics()
+        self.assertEqual(metrics['acquired'], 2)
+        self.assertEqual(metrics['waited'], 1)
+        self.assertGreaterEqual(metrics['wait_time'], .01)
+        self.assertEqual(metrics['max_wait'], metrics['wait_time'])
+
+
+class TokenBucketTest(unittest.TestCase):
+    CORRELATE = TokenBucket
+
+    def testConstructor(self):
+        self.assertRaises(ValueError, TokenBucket, 0)
+        self.assertRaises(ValueError, TokenBucket, 1, 0)
+
+        # The first acquisitions are served from the bucket, the next
+        # ones at the given rate.
+        bucket = TokenBucket(100, 2)
+        start = time.time()
+        for _ in range(6):
+            bucket.acquire()
+        self.assertGreaterEqual(time.time() - start, .035)
+        metrics = bucket.get_metrics()
+        self.assertEqual(metrics['acquired'], 6)
+        self.assertGreaterEqual(metrics['waited'], 4)
+
+
+class ConcurrencyLimitTest(unittest.TestCase):
+    CORRELATE = ConcurrencyLimit
+
+    def testConstructor(self):
+        self.assertRaises(ValueError, ConcurrencyLimit, 0)
+        limit = ConcurrencyLimit(2)
+        self.assertEqual(limit.max_concurrent, 2)
+
+    def testRelease(self):
+        limit = ConcurrencyLimit(2)
+        limit.acquire()
+        limit.acquire()
+        thread = threading.Thread(target=limit.acquire)
+        thread.start()
+        thread.join(.1)
+        self.assertTrue(thread.is_alive())
+
+        limit.release()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(limit.active, 2)
+        self.assertEqual(limit.get_metrics()['waited'], 1)
+
+
+def suite():
+    loader = unittest.TestLoader()
+    suite1 = loader.loadTestsFromTestCase(AccountPolicyTest)
+    suite2 = loader.loadTestsFromTestCase(TokenBucketTest)
+    suite3 = loader.loadTestsFromTestCase(ConcurrencyLimitTest)
+    return unittest.TestSuite((suite1, suite2, suite3))
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
@@ -3,10 +3,11 @@ import sys
 import unittest
 import re
 import os.path
+import threading
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from Exscript import Account
-from Exscript.account import AccountPool
+from Exscript.account import AccountPool, ConcurrencyLimit
 from Exscript.util.file import get_accounts_from_file
 
 
@@ -29,6 +30,10 @@ class AccountPoolTest(unittest.TestCase):
         accm = AccountPool([self.account1, self.account2])
         self.assertEqual(accm.n_accounts(), 2)
 
+        accm = AccountPool(sync='multiprocessing')
+        self.assertEqual(accm.sync.name, 'multiprocessing')
+        self.assertRaises(ValueError, AccountPool, sync='foo')
+
     def testAddAccount(self):
         self.assertEqual(self.accm.n_accounts(), 0)
         self.accm.add_account(self.account1)
@@ -37,6 +42,37 @@ class AccountPoolTest(unittest.TestCase):
         self.accm.add_account(self.account2)
         self.assertEqual(self.accm.n_accounts(), 2)
 
+    def testAddPolicy(self):
+        limit = ConcurrencyLimit(1)
+        self.accm.add_account([self.account1, self.account2])
+        self.accm.add_policy(limit)
+        self.assertEqual(self.accm.policies, [limit])
+
+        # The policy is enforced on top of the account locks.
+        self.accm.acquire_account(owner='one')
+        thread = threading.Thread(target=self.accm.acquire_account)
+        thread.start()
+        thread.join(.1)
+        self.assertTrue(thread.is_alive())
+
+        # Releasing the account also releases the policy.
+        self.accm.release_accounts('one')
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(limit.active, 1)
+        self.assertEqual(limit.get_metrics()['waited'], 1)
+
+        # Policies are not consumed by calls that can never succeed.
+        limit.release()
+        limit = ConcurrencyLimit(1)
+        limit.acquire()
+        pool = AccountPool(policies=limit)
+        self.assertRaises(ValueError, pool.acquire_account)
+        pool.add_account(self.account1)
+        self.assertRaises(ValueError, pool.acquire_account, self.account2)
+        self.assertEqual(limit.active, 1)
+        self.assertEqual(limit.get_metrics()['acquired'], 1)
+
     def testReset(self):
         self.testAddAccount()
         self.accm.reset()
@@ -52,11 +88,25 @@ class AccountPoolTest(unittest.TestCase):
         thehash = account.__hash__()
         self.accm.add_account(account)
         self.assertEqual(self.accm.get_account_from_hash(thehash), account)
+        self.assertEqual(self.accm.get_account_from_hash(1), None)
+
+        self.accm.reset()
+        self.assertEqual(self.accm.get_account_from_hash(thehash), None)
 
     def testGetAccountFromName(self):
         self.testAddAccount()
         self.assertEqual(self.account2,
                          self.accm.get_account_from_name(self.user2))
+        self.assertEqual(self.accm.get_account_from_name('foo'), None)
+
+        # The index follows name changes.
+        self.account2.set_name('foo')
+        self.assertEqual(self.accm.get_account_from_name(self.user2), None)
+        self.assertEqual(self.accm.get_account_from_name('foo'),
+                         self.account2)
+
+        self.accm.reset()
+        self.assertEqual(self.accm.get_account_from_name('foo'), None)
 
     def testNAccounts(self):
         self.testAddAccount()
@@ -94,6 +144,58 @@ class AccountPoolTest(unittest.TestCase):
             for account in list(acquired.values()):
                 account.release()
 
+    def testAcquireAccountWaiting(self):
+        self.accm.add_account([self.account1, self.account2])
+        self.accm.acquire_account(self.account1)
+        self.accm.acquire_account(self.account2)
+
+        # Block one thread on a specific account, and one on any account.
+        result = {}
+        def acquire(key, account=None):
+            result[key] = self.accm.acquire_account(account)
+        specific = threading.Thread(target=acquire,
+                                    args=('specific', self.account1))
+        anyone = threading.Thread(target=acquire, args=('any',))
+        specific.start()
+        anyone.start()
+        while len(self.accm.waiters) + len(self.accm.account_waiters) < 2:
+            specific.join(.01)
+        self.assertEqual(result, {})
+
+        # Releasing an account wakes only the thread that waits for it.
+        self.account2.release()
+        anyone.join(5)
+        self.assertFalse(anyone.is_alive())
+        self.assertTrue(specific.is_alive())
+        self.assertEqual(result, {'any': self.account2})
+
+        self.account1.release()
+        specific.join(5)
+        self.assertFalse(specific.is_alive())
+        self.assertEqual(result['specific'], self.account1)
+        self.assertEqual(len(self.accm.waiters), 0)
+        self.assertEqual(len(self.accm.account_waiters), 0)
+
+    def testReleaseAccount(self):
+        limit = ConcurrencyLimit(1)
+        pool = AccountPool(policies=limit)
+        pool.add_account(self.account1)
+        account = pool.acquire_account(self.account1)
+        pool.release_account(account)
+        self.assertIn(self.account1, pool.unlocked_accounts)
+        self.assertEqual(limit.active, 0)
+
+        # Accounts that need no lock do not signal their release, but
+        # are returned to the pool, and free their policies.
+        account = Account('foo', needs_lock=False)
+        pool = AccountPool(account, policies=limit)
+        for n in range(3):
+            self.assertEqual(pool.acquire_account(), account)
+            self.assertEqual(limit.active, 1)
+            pool.release_account(account)
+            self.assertIn(account, pool.unlocked_accounts)
+            self.assertEqual(limit.active, 0)
+
     def testReleaseAccounts(self):
         account1 = Account('foo')
         account2 = Account('bar')
@@ -31,6 +31,25 @@ class AccountTest(unittest.TestCase):
         self.assertNotEqual(account.get_password(),
                             account.get_authorization_password())
 
+        account = Account(self.user, sync='multiprocessing')
+        self.assertEqual(account.sync.name, 'multiprocessing')
+        account.acquire()
+        account.release()
+
+    def testPickle(self):
+        import pickle
+        self.account.acquire()
+        account = pickle.loads(pickle.dumps(self.account))
+        self.assertEqual(hash(account), hash(self.account))
+        self.assertEqual(account.get_name(), self.user)
+        self.assertEqual(account.get_authorization_password(),
+                         self.password2)
+
+        # The copy has a lock of its own.
+        account.acquire()
+        account.release()
+        self.account.release()
+
     def testContext(self):
         with self.account as account:
             account.release()
@@ -0,0 +1,181 @@
+import sys
+import unittest
+import re
+import os.path
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from tempfile import mkdtemp
+from shutil import rmtree
+from Exscript import BufferedFileLogger
+from Exscript.logger import HandleCache
+from FileLoggerTest import FileLoggerTest
+
+
+def read(filename):
+    with open(filename) as fp:
+        return fp.read()
+
+
+class BufferedFileLoggerTest(FileLoggerTest):
+    CORRELATE = BufferedFileLogger
+
+    def setUp(self):
+        FileLoggerTest.setUp(self)
+        # Flush on every write, so that the FileLogger tests apply.
+        self.logger = BufferedFileLogger(self.logdir,
+                                         clearmem=False,
+                                         flush_interval=0)
+
+    def tearDown(self):
+        self.logger.close()
+        FileLoggerTest.tearDown(self)
+
+    def testLog(self):
+        log = FileLoggerTest.testLog(self)
+        self.assertTrue(self.logger.handles.is_open(self.logfile))
+
+        # Buffered data is not visible on the disk until flushed.
+        logger = BufferedFileLogger(self.logdir, flush_interval=3600)
+        logfile = os.path.join(self.logdir, 'buffered.log')
+        logger.add_log(1, 'buffered', 1)
+        logger.log(1, 'hello world')
+        self.assertEqual(read(logfile), '')
+        logger.flush()
+        self.assertEqual(read(logfile), 'hello world')
+        logger.close()
+        return log
+
+    def testLogSucceeded(self):
+        log = FileLoggerTest.testLogSucceeded(self)
+        self.assertFalse(self.logger.handles.is_open(self.logfile))
+
+        # Pending data is written once the log ends.
+        logger = BufferedFileLogger(self.logdir, flush_interval=3600)
+        logfile = os.path.join(self.logdir, 'ended.log')
+        logger.add_log(1, 'ended', 1)
+        logger.log(1, 'hello world')
+        logger.log_succeeded(1)
+        self.assertEqual(read(logfile), 'hello world')
+        return log
+
+    def testLogAborted(self):
+        log = FileLoggerTest.testLogAborted(self)
+        self.assertFalse(self.logger.handles.is_open(self.logfile))
+        self.assertFalse(self.logger.handles.is_open(self.errfile))
+        return log
+
+    def testFlush(self):
+        pass  # See testLog()
+
+    def testClose(self):
+        logger = BufferedFileLogger(self.logdir, mode='w', flush_interval=3600)
+        logfile = os.path.join(self.logdir, 'buffered.log')
+        logger.add_log(1, 'buffered', 1)
+        logger.log(1, 'hello')
+        logger.close()
+        self.assertEqual(read(logfile), 'hello')
+
+        # The file is reopened for appending.
+        logger.log(1, ' world')
+        logger.close()
+        self.assertEqual(read(logfile), 'hello world')
+
+
+class HandleCacheTest(unittest.TestCase):
+    CORRELATE = HandleCache
+
+    def setUp(self):
+        self.tempdir = mkdtemp()
+        self.files = [os.path.join(self.tempdir, str(n)) for n in range(3)]
+        self.cache = HandleCache(max_handles=2,
+                                 flush_size=10,
+                                 flush_interval=3600)
+
+    def tearDown(self):
+        self.cache.close()
+        rmtree(self.tempdir)
+
+    def testConstructor(self):
+        self.assertEqual(self.cache.max_handles, 2)
+        self.assertEqual(self.cache.flush_size, 10)
+        self.assertEqual(self.cache.flush_interval, 3600)
+
+    def testWrite(self):
+        self.cache.write(self.files[0], 'w', 'hello')
+        self.assertEqual(read(self.files[0]), '')
+        self.cache.write(self.files[0], 'w', ' world')
+        self.assertEqual(read(self.files[0]), 'hello world')
+
+        # The least recently used file is closed when the budget is
+        # exhausted.
+        self.cache.write(self.files[1], 'a', 'one')
+        self.cache.write(self.files[0], 'a', '!')
+        self.cache.write(self.files[2], 'a', 'two')
+        self.assertTrue(self.cache.is_open(self.files[0]))
+        self.assertFalse(self.cache.is_open(self.files[1]))
+        self.assertTrue(self.cache.is_open(self.files[2]))
+        self.assertEqual(read(self.files[1]), 'one')
+
+        # Pending data is flushed by a timer.
+        self.cache.close()
+        self.cache.flush_interval = 0.05
+        self.cache.write(self.files[0], 'a', '?')
+        self.cache.write(self.files[2], 'a', '!')
+        self.assertEqual(read(self.files[0]), 'hello world!')
+        for n in range(100):
+            if read(self.files[2]) == 'two!':
+                break
+            time.sleep(0.05)
+        self.assertEqual(read(self.files[0]), 'hello world!?')
+        self.assertEqual(read(self.files[2]), 'two!')
+        self.assertTrue(self.cache.is_open(self.files[2]))
+
+        # Without an interval, every write is flushed.
+        self.cache.flush_interval = 0
+        self.cache.write(self.files[2], 'a', '!')
+        self.assertEqual(read(self.files[2]), 'two!!')
+
+    def testPickle(self):
+        import pickle
+        self.cache.write(self.files[0], 'w', 'foo')
+        cache = pickle.loads(pickle.dumps(self.cache))
+        self.assertEqual(cache.max_handles, 2)
+        self.assertFalse(cache.is_open(self.files[0]))
+        cache.write(self.files[1], 'w', 'bar')
+        cache.close()
+        self.assertEqual(read(self.files[1]), 'bar')
+
+    def testFlush(self):
+        self.cache.write(self.files[0], 'w', 'foo')
+        self.cache.write(self.files[1], 'w', 'bar')
+        self.cache.flush(self.files[0])
+        self.assertEqual(read(self.files[0]), 'foo')
+        self.assertEqual(read(self.files[1]), '')
+        self.cache.flush()
+        self.assertEqual(read(self.files[1]), 'bar')
+
+    def testClose(self):
+        self.cache.write(self.files[0], 'w', 'foo')
+        self.cache.write(self.files[1], 'w', 'bar')
+        self.cache.close(self.files[0])
+        self.assertFalse(self.cache.is_open(self.files[0]))
+        self.assertTrue(self.cache.is_open(self.files[1]))
+        self.assertEqual(read(self.files[0]), 'foo')
+        self.cache.close()
+        self.assertFalse(self.cache.is_open(self.files[1]))
+        self.assertEqual(read(self.files[1]), 'bar')
+
+    def testIsOpen(self):
+        self.assertFalse(self.cache.is_open(self.files[0]))
+        self.cache.write(self.files[0], 'w', 'foo')
+        self.assertTrue(self.cache.is_open(self.files[0]))
+
+
+def suite():
+    loader = unittest.TestLoader()
+    suite1 = loader.loadTestsFromTestCase(BufferedFileLoggerTest)
+    suite2 = loader.loadTestsFromTestCase(HandleCacheTest)
+    return unittest.TestSuite((suite1, suite2))
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,124 @@
+import sys
+import unittest
+import re
+import os.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from Exscript import Account, Host, ConnectionPool
+from Exscript.protocols import Dummy
+
+
+class BrokenDummy(Dummy):
+    broken = False
+
+    def send(self, data):
+        if self.broken:
+            raise EOFError('connection closed')
+        Dummy.send(self, data)
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    CORRELATE = ConnectionPool
+
+    def setUp(self):
+        self.account = Account('user', 'test')
+        self.host = Host('dummy://dummy1')
+        self.pool = ConnectionPool(max_per_host=2)
+
+    def createConnection(self, cls=Dummy, login=True):
+        conn = cls()
+        conn.connect(self.host.get_address())
+        if login:
+            conn.login(self.account)
+        return conn
+
+    def testConstructor(self):
+        pool = ConnectionPool()
+        self.assertEqual(pool.max_per_host, 1)
+        self.assertEqual(pool.n_connections(), 0)
+
+    def testCheckout(self):
+        self.assertEqual(self.pool.checkout(self.host), None)
+
+        # A pooled connection is returned with a fresh prompt.
+        conn = self.createConnection()
+        self.pool.checkin(self.host, conn)
+        self.assertEqual(self.pool.checkout(self.host), conn)
+        self.assertTrue(str(conn.buffer).endswith('dummy> '))
+        self.assertEqual(self.pool.n_connections(), 0)
+        conn.login()
+        conn.execute('ls')
+        self.assertEqual(conn.response, 'ls\r')
+
+        # Connections to other hosts are not handed out.
+        self.pool.checkin(self.host, conn)
+        self.assertEqual(self.pool.checkout(Host('dummy://dummy2')), None)
+        self.assertEqual(self.pool.checkout(Host('dummy://dummy1:23')), None)
+        host = Host('dummy://dummy1')
+        host.set_account(self.account)
+        self.assertEqual(self.pool.checkout(host), None)
+        self.assertEqual(self.pool.checkout(self.host), conn)
+
+        # Connections that fail the health check are dropped.
+        broken = self.createConnection(BrokenDummy)
+        broken.broken = True
+        self.pool.checkin(self.host, broken)
+        self.assertEqual(self.pool.checkout(self.host), None)
+        self.assertEqual(self.pool.n_connections(), 0)
+
+        # Expired connections are not handed out.
+        self.pool.idle_timeout = 0
+        self.pool.checkin(self.host, conn)
+        self.assertEqual(self.pool.checkout(self.host), None)
+
+    def testCheckin(self):
+        conn1 = self.createConnection()
+        conn2 = self.createConnection()
+        conn3 = self.createConnection()
+        self.assertTrue(self.pool.checkin(self.host, conn1))
+        self.assertTrue(self.pool.checkin(self.host, conn2))
+        self.assertEqual(self.pool.n_connections(), 2)
+
+        # The per-host limit is enforced.
+        self.assertFalse(self.pool.checkin(self.host, conn3))
+        self.assertEqual(self.pool.n_connections(), 2)
+        self.assertTrue(self.pool.checkin(Host('dummy://dummy2'), conn3))
+        self.assertEqual(self.pool.n_connections(), 3)
+
+        # Unauthenticated connections are not pooled.
+        conn = self.createConnection(login=False)
+        self.assertFalse(self.pool.checkin(Host('dummy://dummy3'), conn))
+        self.assertEqual(self.pool.n_connections(), 3)
+
+        # The most recently used connection is handed out first.
+        self.assertEqual(self.pool.checkout(self.host), conn2)
+        self.assertEqual(self.pool.checkout(self.host), conn1)
+
+    def testEvictIdle(self):
+        self.pool.checkin(self.host, self.createConnection())
+        self.assertEqual(self.pool.evict_idle(), 0)
+        self.assertEqual(self.pool.n_connections(), 1)
+        self.pool.idle_timeout = 0
+        self.assertEqual(self.pool.evict_idle(), 1)
+        self.assertEqual(self.pool.n_connections(), 0)
+
+    def testNConnections(self):
+        self.assertEqual(self.pool.n_connections(), 0)
+        self.pool.checkin(self.host, self.createConnection())
+        self.assertEqual(self.pool.n_connections(), 1)
+        self.pool.checkout(self.host)
+        self.assertEqual(self.pool.n_connections(), 0)
+
+    def testCloseAll(self):
+        self.pool.checkin(self.host, self.createConnection())
+        self.pool.checkin(Host('dummy://dummy2'), self.createConnection())
+        self.assertEqual(self.pool.n_connections(), 2)
+        self.pool.close_all()
+        self.assertEqual(self.pool.n_connections(), 0)
+        self.assertEqual(self.pool.checkout(self.host), None)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(ConnectionPoolTest)
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
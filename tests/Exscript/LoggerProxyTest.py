@@ -0,0 +1,102 @@
+import sys
+import unittest
+import re
+import os.path
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from Exscript.logger import LoggerProxy
+
+
+class FakePipe(object):
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def recv(self):
+        return 'response'
+
+
+class LoggerProxyTest(unittest.TestCase):
+    CORRELATE = LoggerProxy
+
+    def setUp(self):
+        self.pipe = FakePipe()
+        self.proxy = LoggerProxy(self.pipe, 123, batch_interval=3600)
+
+    def testConstructor(self):
+        self.assertEqual(self.proxy.parent, self.pipe)
+        self.assertEqual(self.proxy.logger_id, 123)
+        self.assertEqual(self.proxy.batch_size, 8192)
+        self.assertEqual(self.proxy.batch_interval, 3600)
+
+    def testFlush(self):
+        self.proxy.flush()
+        self.assertEqual(self.pipe.sent, [])
+
+        self.proxy.log(1, 'foo')
+        self.proxy.log(2, 'bar')
+        self.proxy.log(1, 'baz')
+        self.assertEqual(self.pipe.sent, [])
+        self.proxy.flush()
+        self.assertEqual(self.pipe.sent, [
+            ('log-messages', (123, [(1, 'foobaz'), (2, 'bar')]))
+        ])
+        self.assertEqual(self.proxy.timer, None)
+
+    def testAddLog(self):
+        self.proxy.log(1, 'foo')
+        self.assertEqual(self.proxy.add_log(2, 'name', 1), 'response')
+        self.assertEqual(self.pipe.sent, [
+            ('log-messages', (123, [(1, 'foo')])),
+            ('log-add', (123, 2, 'name', 1))
+        ])
+
+    def testLog(self):
+        # Batches are sent once they are large enough.
+        self.proxy.batch_size = 6
+        self.proxy.log(1, 'foo')
+        self.assertEqual(self.pipe.sent, [])
+        self.proxy.log(1, 'bar')
+        self.assertEqual(self.pipe.sent, [
+            ('log-messages', (123, [(1, 'foobar')]))
+        ])
+
+        # Or by a timer, even if nothing else is logged.
+        self.proxy.batch_interval = 0.05
+        self.proxy.log(1, 'foo')
+        self.assertEqual(len(self.pipe.sent), 1)
+        time.sleep(0.2)
+        self.assertEqual(self.pipe.sent[1],
+                         ('log-messages', (123, [(1, 'foo')])))
+        self.assertEqual(self.proxy.timer, None)
+
+        # Or right away.
+        self.proxy.batch_interval = 0
+        self.proxy.log(1, 'foo')
+        self.assertEqual(len(self.pipe.sent), 3)
+
+    def testLogAborted(self):
+        self.proxy.log(1, 'foo')
+        self.proxy.log_aborted(1, 'exc_info')
+        self.assertEqual(self.pipe.sent, [
+            ('log-messages', (123, [(1, 'foo')])),
+            ('log-aborted', (123, 1, 'exc_info'))
+        ])
+
+    def testLogSucceeded(self):
+        self.proxy.log(1, 'foo')
+        self.proxy.log_succeeded(1)
+        self.assertEqual(self.pipe.sent, [
+            ('log-messages', (123, [(1, 'foo')])),
+            ('log-succeeded', (123, 1))
+        ])
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(LoggerProxyTest)
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
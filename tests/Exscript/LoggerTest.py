@@ -10,7 +10,7 @@ import gc
 from itertools import islice
 from tempfile import mkdtemp
 from shutil import rmtree
-from Exscript.logger import Log, Logger
+from Exscript.logger import Log, Logger, SpilledLog
 from LogTest import FakeError
 from util.reportTest import FakeJob
 
@@ -164,7 +164,50 @@ class LoggerTest(unittest.TestCase):
         return log
 
 
+class LoggerTestMemoryBudget(LoggerTest):
+
+    def setUp(self):
+        self.logger = Logger(max_memory=15)
+        self.job = FakeJob('fake')
+
+    def testSpill(self):
+        jobs = [FakeJob('job%d' % n) for n in range(3)]
+        for job in jobs:
+            self.logger.add_log(id(job), job.name, 1)
+            self.logger.log(id(job), 'hello world')
+        self.logger.log_succeeded(id(jobs[0]))
+        try:
+            raise FakeError()
+        except FakeError:
+            self.logger.log_aborted(id(jobs[1]), sys.exc_info())
+
+        # Completed logs were moved to the disk, oldest first, until
+        # the budget was met.
+        logs = list(self.logger.get_logs())
+        self.assertIsInstance(logs[0], SpilledLog)
+        self.assertEqual(str(logs[0]), 'hello world')
+        self.assertEqual(logs[0].get_name(), 'job0')
+        self.assertIsInstance(logs[1], SpilledLog)
+        self.assertIn('FakeError', str(logs[1]))
+        self.assertTrue(logs[1].has_error())
+        self.assertEqual(logs[1].get_error(False), 'FakeError')
+        self.assertNotIsInstance(logs[2], SpilledLog)
+        self.assertEqual(self.logger.get_succeeded_logs(), [logs[0]])
+        self.assertEqual(self.logger.get_aborted_logs(), [logs[1]])
+
+        # A log that fits into the budget stays in memory.
+        self.logger.log_succeeded(id(jobs[2]))
+        logs = list(self.logger.get_logs())
+        self.assertNotIsInstance(logs[2], SpilledLog)
+        self.assertEqual(self.logger.memory, len('hello world'))
+        self.assertEqual(self.logger.get_aborted_logs(), [logs[1]])
+        self.assertEqual(self.logger.get_succeeded_logs(),
+                         [logs[0], logs[2]])
+
 def suite():
-    return unittest.TestLoader().loadTestsFromTestCase(LoggerTest)
+    loader = unittest.TestLoader()
+    suite1 = loader.loadTestsFromTestCase(LoggerTest)
+    suite2 = loader.loadTestsFromTestCase(LoggerTestMemoryBudget)
+    return unittest.TestSuite((suite1, suite2))
 if __name__ == '__main__':
     unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,179 @@
+import sys
+import unittest
+import re
+import os.path
+import json
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from urllib.request import urlopen, HTTPDigestAuthHandler, build_opener
+from urllib.error import HTTPError
+from Exscript import Queue, Metrics
+from Exscript.metrics import Counter, Histogram
+
+
+def do_nothing(job, host, conn):
+    pass
+
+
+def fail_once(job, host, conn):
+    if host.get_name() == 'fail' or job.failures == 0:
+        raise Exception('intentional error')
+
+
+class CounterTest(unittest.TestCase):
+    CORRELATE = Counter
+
+    def testConstructor(self):
+        self.assertEqual(Counter().slots, {})
+
+    def testIncrement(self):
+        counter = Counter()
+        threads = [threading.Thread(target=lambda: [counter.increment()
+                                                    for n in range(1000)])
+                   for n in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.get(), 5000)
+        counter.increment(5)
+        self.assertEqual(counter.get(), 5005)
+
+    def testGet(self):
+        self.assertEqual(Counter().get(), 0)
+
+
+class HistogramTest(unittest.TestCase):
+    CORRELATE = Histogram
+
+    def testConstructor(self):
+        self.assertEqual(Histogram().buckets, (.1, .25, .5, 1, 2.5, 5, 10,
+                                               30, 60, 120, 300))
+        self.assertEqual(Histogram([1, 2]).buckets, (1, 2))
+
+    def testObserve(self):
+        histogram = Histogram((1, 2))
+        histogram.observe(.5)
+        histogram.observe(1)
+        histogram.observe(1.5)
+        thread = threading.Thread(target=histogram.observe, args=(3,))
+        thread.start()
+        thread.join()
+        counts, total, count = histogram.get()
+        self.assertEqual(counts, [(1, 2), (2, 3), (float('inf'), 4)])
+        self.assertEqual(total, 6)
+        self.assertEqual(count, 4)
+
+    def testGet(self):
+        counts, total, count = Histogram((1,)).get()
+        self.assertEqual(counts, [(1, 0), (float('inf'), 0)])
+        self.assertEqual((total, count), (0, 0))
+
+
+class MetricsTest(unittest.TestCase):
+    CORRELATE = Metrics
+
+    def setUp(self):
+        self.queue = Queue(verbose=-1, max_threads=2)
+        self.metrics = Metrics(self.queue)
+        self.queue.run(['dummy://ok1', 'dummy://ok2'], do_nothing)
+        self.queue.run(['dummy://retried', 'dummy://fail'],
+                       fail_once,
+                       attempts=2)
+        self.queue.shutdown()
+
+    def tearDown(self):
+        self.queue.destroy()
+
+    def testConstructor(self):
+        metrics = Metrics(self.queue, buckets=(1,), window=10)
+        self.assertEqual(metrics.buckets, (1,))
+        self.assertEqual(metrics.window, 10)
+        self.assertEqual(metrics.started.get(), 0)
+        self.assertEqual(self.queue.job_timing_event.n_subscribers(), 2)
+
+    def testGetThroughput(self):
+        self.assertTrue(self.metrics.get_throughput() > 0)
+        self.metrics.window = 0
+        self.assertEqual(self.metrics.get_throughput(), 0)
+
+    def testGetValues(self):
+        values = self.metrics.get_values()
+        self.assertEqual(values['queue_depth'], 0)
+        self.assertEqual(values['active_sessions'], 0)
+        self.assertEqual(values['jobs_started'], 6)
+        self.assertEqual(values['jobs_succeeded'], 3)
+        self.assertEqual(values['jobs_failed'], 1)
+        self.assertEqual(values['job_errors'], 3)
+        self.assertEqual(values['job_retries'], 2)
+        self.assertEqual(values['retry_rate'], 2 / 6)
+
+        durations = values['job_duration_seconds']
+        self.assertEqual(list(durations), ['generic'])
+        self.assertEqual(durations['generic']['count'], 6)
+        self.assertEqual(durations['generic']['buckets'][-1], ('+Inf', 6))
+        durations = values['span_duration_seconds']
+        self.assertEqual(sorted(durations), ['connect', 'queue_wait'])
+        self.assertEqual(durations['queue_wait']['count'], 4)
+
+    def testToJson(self):
+        values = json.loads(self.metrics.to_json())
+        self.assertEqual(values['jobs_started'], 6)
+        self.assertEqual(values['job_duration_seconds']['generic']['count'],
+                         6)
+
+    def testToPrometheus(self):
+        text = self.metrics.to_prometheus()
+        self.assertIn('# TYPE exscript_jobs_started_total counter\n', text)
+        self.assertIn('\nexscript_jobs_started_total 6\n', text)
+        self.assertIn('\nexscript_queue_depth 0\n', text)
+        self.assertIn('\nexscript_job_duration_seconds_bucket'
+                      '{driver="generic",le="+Inf"} 6\n', text)
+        self.assertIn('\nexscript_job_duration_seconds_count'
+                      '{driver="generic"} 6\n', text)
+        self.assertIn('\nexscript_span_duration_seconds_count'
+                      '{span="connect"} 6\n', text)
+
+        # Every line is a comment or a sample.
+        for line in text.splitlines():
+            self.assertTrue(re.match(r'(# |exscript_\w+(\{.*\})? \S+$)',
+                                     line), line)
+
+    def testServe(self):
+        server = self.metrics.serve(port=0)
+        url = 'http://127.0.0.1:%d' % server.server_address[1]
+        try:
+            response = urlopen(url + '/metrics')
+            self.assertIn('text/plain', response.headers['Content-Type'])
+            text = response.read().decode('utf8')
+            self.assertIn('\nexscript_jobs_started_total 6\n', text)
+
+            response = urlopen(url + '/metrics.json')
+            values = json.loads(response.read().decode('utf8'))
+            self.assertEqual(values['jobs_succeeded'], 3)
+
+            self.assertRaises(HTTPError, urlopen, url + '/other')
+
+            # Once an account is added, a login is required.
+            server.add_account('user', 'password')
+            self.assertRaises(HTTPError, urlopen, url + '/metrics')
+            auth = HTTPDigestAuthHandler()
+            auth.add_password('exscript', url, 'user', 'password')
+            response = build_opener(auth).open(url + '/metrics.json')
+            values = json.loads(response.read().decode('utf8'))
+            self.assertEqual(values['jobs_succeeded'], 3)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def suite():
+    loader = unittest.TestLoader()
+    return unittest.TestSuite((
+        loader.loadTestsFromTestCase(CounterTest),
+        loader.loadTestsFromTestCase(HistogramTest),
+        loader.loadTestsFromTestCase(MetricsTest),
+    ))
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
@@ -11,14 +11,16 @@ warnings.simplefilter('ignore', DeprecationWarning)
 import shutil
 import time
 import ctypes
+import socket
 from functools import partial
 from tempfile import mkdtemp
 from multiprocessing import Value
 from multiprocessing.managers import BaseManager
-from Exscript import Queue, Account, AccountPool, FileLogger
+from Exscript import Queue, Account, AccountPool, FileLogger, \
+    BufferedFileLogger, ConnectionPool, Host, Resolver
 from Exscript.protocols import Protocol, Dummy
 from Exscript.interpreter.exception import FailException
-from Exscript.util.decorator import bind
+from Exscript.util.decorator import bind, autologin
 from Exscript.util.log import log_to
 
 
@@ -33,6 +35,11 @@ def count_calls2(job, host, conn, data, **kwargs):
     count_calls(job, data, **kwargs)
 
 
+def login_and_count(job, host, conn, data):
+    conn.login()
+    data.value += 1
+
+
 def count_and_fail(job, data, **kwargs):
     count_calls(job, data, **kwargs)
     raise FailException('intentional error')
@@ -294,6 +301,16 @@ class QueueTest(unittest.TestCase):
         self.assertTrue(self.queue.is_completed())
         self.assertEqual(self.accm.default_pool.n_accounts(), 1)
 
+        # Files that a logger of the queue keeps open are closed.
+        logger = BufferedFileLogger(self.tempdir, flush_interval=3600)
+        self.queue.run('dummy://dummy1', log_to(logger)(do_nothing))
+        logger.add_log(1, 'pending', 1)
+        logger.log(1, 'hello')
+        logfile = os.path.join(self.tempdir, 'pending.log')
+        self.assertTrue(logger.handles.is_open(logfile))
+        self.queue.shutdown()
+        self.assertFalse(logger.handles.is_open(logfile))
+
     def testDestroy(self):
         task = self.startTask()   # this also adds an account
         self.queue.destroy()
@@ -326,9 +343,36 @@ class QueueTest(unittest.TestCase):
         self.queue.shutdown()
         self.assertEqual(data.value, 3)
 
-        self.queue.run('dummy://dummy4', func)
-        self.queue.destroy()
+        # An account attached to the host is locked through the parent
+        # when the job runs in another process.
+        account = Account('user', 'test')
+        host = Host('dummy://dummy4')
+        host.set_account(account)
+        self.queue.run(host, bind(login_and_count, data))
+        self.queue.shutdown()
         self.assertEqual(data.value, 4)
+        found = self.accm.get_account_from_hash(account.__hash__())
+        self.assertEqual(found is account, 'process' in self.mode)
+        self.assertTrue(account.lock.acquire(False))
+        account.lock.release()
+
+        # Hosts from an iterator are read while the jobs run, keeping
+        # no more than the lookahead of jobs in the queue.
+        lengths = []
+
+        def read_hosts():
+            for n in range(10):
+                lengths.append(self.queue.workqueue.get_length())
+                yield 'dummy://stream%d' % n
+        self.queue.lookahead = 2
+        self.queue.run(read_hosts(), func)
+        self.queue.shutdown()
+        self.assertEqual(data.value, 14)
+        self.assertTrue(max(lengths) <= 2)
+
+        self.queue.run('dummy://dummy5', func)
+        self.queue.destroy()
+        self.assertEqual(data.value, 15)
 
     def testRunOrIgnore(self):
         data = Value('i', 0)
@@ -404,6 +448,111 @@ class QueueTest(unittest.TestCase):
         self.queue.destroy()
         self.assertEqual(data.value, 10)
 
+    def testConnectionPool(self):
+        pool = ConnectionPool()
+        if self.mode not in ('threading', 'thread-pool'):
+            self.assertRaises(ValueError,
+                              self.createQueue,
+                              connection_pool=pool)
+            return
+
+        conns = []
+
+        @autologin()
+        def remember(job, host, conn):
+            conn.execute('ls')
+            conns.append(conn)
+
+        self.createQueue(verbose=-1, connection_pool=pool)
+        self.queue.add_account(Account('user', 'test'))
+        self.queue.run('dummy://dummy1', remember)
+        self.queue.join()
+        self.assertEqual(pool.n_connections(), 1)
+        self.queue.run(['dummy://dummy1', 'dummy://dummy2'], remember)
+        self.queue.join()
+        self.assertEqual(len(conns), 3)
+        self.assertIs(conns[0], conns[1])
+        self.assertIsNot(conns[0], conns[2])
+        self.assertEqual(pool.n_connections(), 2)
+        self.queue.shutdown()
+        self.assertEqual(pool.n_connections(), 0)
+
+        # A logged job must complete its log before the connection is
+        # handed back to the pool.
+        subscribers = []
+        checkin = pool.checkin
+        def check_subscribers(host, conn):
+            subscribers.append(conn.data_received_event.n_subscribers())
+            return checkin(host, conn)
+        pool.checkin = check_subscribers
+        self.createQueue(verbose=-1, connection_pool=pool)
+        self.queue.add_account(Account('user', 'test'))
+        self.queue.run('dummy://dummy1', log_to(self.logger)(remember))
+        self.queue.join()
+        self.assertEqual(len(conns), 4)
+        self.assertEqual(subscribers, [0])
+        self.queue.shutdown()
+
+        # If the connection can not be handed back, the job and its log
+        # fail.
+        def fail_checkin(host, conn):
+            raise Exception('checkin failed')
+        pool.checkin = fail_checkin
+        self.createQueue(verbose=-1, connection_pool=pool)
+        self.queue.add_account(Account('user', 'test'))
+        self.queue.run('dummy://dummy2', log_to(self.logger)(remember))
+        self.queue.shutdown()
+        self.assertEqual(self.queue.failed, 1)
+        errorfile = os.path.join(self.tempdir, 'dummy2.log.error')
+        self.assertTrue(os.path.exists(errorfile))
+
+    def testResolver(self):
+        resolved = []
+
+        def lookup(hostname):
+            resolved.append(hostname)
+            return ['::1', '127.0.0.1']
+        self.createQueue(verbose=-1, resolver=Resolver(lookup=lookup))
+
+        # Telnet connects to the resolved IPv4 address; "myhost" itself
+        # does not resolve. The host keeps its name.
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(5)
+        port = server.getsockname()[1]
+        dummy = Host('dummy://dummy1')
+        host = Host('telnet://myhost:%d' % port)
+        try:
+            self.queue.run([dummy, host], do_nothing)
+            self.queue.shutdown()
+        finally:
+            server.close()
+        self.assertEqual(resolved, ['myhost'])
+        self.assertEqual(host.get_address(), 'myhost')
+        self.assertEqual(dummy.get_address(), 'dummy1')
+        self.assertEqual(self.queue.failed, 0)
+
+    def testTiming(self):
+        timings = []
+        drivers = []
+
+        def on_timing(name, attempt, spans):
+            timings.append((name, attempt, [s['name'] for s in spans]))
+            drivers.append(spans[-1]['driver'])
+        self.queue.job_timing_event.connect(on_timing)
+        self.queue.run(['dummy://dummy1', 'dummy://dummy2'], do_nothing)
+        self.queue.shutdown()
+        self.assertEqual(sorted(timings), [
+            ('dummy1', 1, ['queue_wait', 'connect', 'job']),
+            ('dummy2', 1, ['queue_wait', 'connect', 'job'])])
+        self.assertEqual(drivers, ['generic', 'generic'])
+
+        # Without a handler, nothing is collected.
+        self.queue.job_timing_event.disconnect(on_timing)
+        self.queue.run('dummy://dummy3', do_nothing)
+        self.queue.shutdown()
+        self.assertEqual(len(timings), 2)
+
     # FIXME: Not a method test; this should probably be elsewhere.
     def testLogging(self):
         task = self.startTask()
@@ -428,10 +577,20 @@ class QueueTestMultiProcessing(QueueTest):
     mode = 'multiprocessing'
 
 
+class QueueTestThreadPool(QueueTest):
+    mode = 'thread-pool'
+
+
+class QueueTestProcessPool(QueueTest):
+    mode = 'process-pool'
+
+
 def suite():
     loader = unittest.TestLoader()
     suite1 = loader.loadTestsFromTestCase(QueueTest)
     suite2 = loader.loadTestsFromTestCase(QueueTestMultiProcessing)
-    return unittest.TestSuite((suite1, suite2))
+    suite3 = loader.loadTestsFromTestCase(QueueTestThreadPool)
+    suite4 = loader.loadTestsFromTestCase(QueueTestProcessPool)
+    return unittest.TestSuite((suite1, suite2, suite3, suite4))
 if __name__ == '__main__':
     unittest.TextTestRunner(verbosity=2).run(suite())
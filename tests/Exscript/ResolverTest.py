@@ -0,0 +1,101 @@
+import sys
+import unittest
+import re
+import os.path
+import socket
+import time
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from Exscript import Resolver
+from Exscript.resolver import getaddrinfo
+
+
+class ResolverTest(unittest.TestCase):
+    CORRELATE = Resolver
+
+    def setUp(self):
+        self.lookups = []
+        self.blocked = threading.Event()
+        self.blocked.set()
+        self.resolver = Resolver(max_threads=2, lookup=self.lookup)
+
+    def lookup(self, hostname):
+        self.blocked.wait()
+        self.lookups.append(hostname)
+        if hostname == 'unknown':
+            raise socket.gaierror('no such host')
+        address = '10.0.0.%d' % len(self.lookups)
+        if hostname == 'dualstack':
+            return ['::1', address]
+        return [address]
+
+    def testGetaddrinfo(self):
+        self.assertEqual(getaddrinfo('127.0.0.1'), ['127.0.0.1'])
+
+    def testConstructor(self):
+        resolver = Resolver()
+        self.assertEqual(resolver.max_threads, 10)
+        self.assertEqual(resolver.timeout, 10)
+        self.assertEqual(resolver.lookup, getaddrinfo)
+
+    def testPrefetch(self):
+        self.blocked.clear()
+        for n in range(5):
+            self.resolver.prefetch('host%d' % n)
+        self.resolver.prefetch('host0')
+
+        # No more than max_threads lookups run at the same time.
+        self.assertEqual(self.resolver.threads, 2)
+        self.blocked.set()
+        for n in range(5):
+            self.assertTrue(self.resolver.resolve('host%d' % n))
+        self.assertEqual(sorted(self.lookups),
+                         ['host%d' % n for n in range(5)])
+
+    def testResolve(self):
+        self.assertEqual(self.resolver.resolve('host1'), '10.0.0.1')
+        self.assertEqual(self.resolver.resolve('host1'), '10.0.0.1')
+        self.assertEqual(self.resolver.resolve('host2'), '10.0.0.2')
+
+        # Failed lookups are not cached.
+        self.assertEqual(self.resolver.resolve('unknown'), None)
+        self.assertEqual(self.resolver.resolve('unknown'), None)
+        self.assertEqual(self.lookups.count('unknown'), 2)
+
+        # Addresses are filtered by their family.
+        self.assertEqual(self.resolver.resolve('dualstack'), '::1')
+        self.assertEqual(self.resolver.resolve('dualstack', socket.AF_INET),
+                         '10.0.0.5')
+        self.assertEqual(self.resolver.resolve('dualstack', socket.AF_INET6),
+                         '::1')
+        self.assertEqual(self.resolver.resolve('host1', socket.AF_INET6),
+                         None)
+
+        # A slow lookup does not block the caller beyond the timeout; it
+        # completes in the background.
+        self.blocked.clear()
+        self.resolver.timeout = 0.01
+        self.assertEqual(self.resolver.resolve('host3'), None)
+        self.blocked.set()
+        self.resolver.timeout = 10
+        self.assertEqual(self.resolver.resolve('host3'), '10.0.0.6')
+
+        # Expired addresses are looked up again.
+        self.resolver.ttl = 0.01
+        self.resolver.clear()
+        self.assertEqual(self.resolver.resolve('host1'), '10.0.0.7')
+        time.sleep(0.02)
+        self.assertEqual(self.resolver.resolve('host1'), '10.0.0.8')
+
+    def testClear(self):
+        self.resolver.resolve('host1')
+        self.resolver.clear()
+        self.resolver.resolve('host1')
+        self.assertEqual(self.lookups, ['host1', 'host1'])
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(ResolverTest)
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,174 @@
+import sys
+import unittest
+import re
+import os.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from tempfile import mkdtemp
+from shutil import rmtree
+from Exscript import TranscriptLogger
+from Exscript.logger import TranscriptStore, TranscriptLog
+from LogTest import LogTest
+from LoggerTest import LoggerTest, FakeJob
+from util.reportTest import FakeError
+
+
+class TranscriptLoggerTest(LoggerTest):
+    CORRELATE = TranscriptLogger
+
+    def setUp(self):
+        self.tempdir = mkdtemp()
+        self.logdir = os.path.join(self.tempdir, 'non-existent')
+        self.logger = TranscriptLogger(self.logdir, clearmem=False)
+        self.job = FakeJob('fake')
+
+    def tearDown(self):
+        LoggerTest.tearDown(self)
+        rmtree(self.tempdir)
+
+    def testConstructor(self):
+        self.assertTrue(os.path.isdir(self.logdir))
+        self.assertRaises(ValueError,
+                          TranscriptLogger,
+                          self.logdir,
+                          compression='foo')
+
+    def testLogSucceeded(self):
+        log = LoggerTest.testLogSucceeded(self)
+        self.assertEqual(self.logger.get_transcript('fake'), 'hello world')
+        return log
+
+    def testGetTranscript(self):
+        self.assertEqual(self.logger.get_transcript('fake'), None)
+        self.logger.add_log(id(self.job), 'fake', 2)
+        self.logger.log(id(self.job), 'retried')
+        self.assertEqual(self.logger.get_transcript('fake', 2), None)
+        try:
+            raise FakeError()
+        except FakeError:
+            self.logger.log_aborted(id(self.job), sys.exc_info())
+        transcript = self.logger.get_transcript('fake', 2)
+        self.assertTrue(transcript.startswith('retried'))
+        self.assertIn('FakeError', transcript)
+
+        # The index survives the logger.
+        logger = TranscriptLogger(self.logdir)
+        self.assertEqual(logger.get_transcript('fake', 2), transcript)
+        self.assertEqual(logger.get_transcript('fake', 1), None)
+
+
+class TranscriptLogTest(LogTest):
+    CORRELATE = TranscriptLog
+
+    def setUp(self):
+        self.tempdir = mkdtemp()
+        self.store = TranscriptStore(self.tempdir)
+        self.log = TranscriptLog('testme', 1, self.store, block_size=10)
+
+    def tearDown(self):
+        rmtree(self.tempdir)
+
+    def testWrite(self):
+        LogTest.testWrite(self)
+
+        # Data is compressed in blocks.
+        self.log.write(' and some more')
+        self.assertEqual(len(self.log.blocks), 2)
+        self.assertEqual(self.log.pending, [])
+        self.assertEqual(str(self.log), 'test me please and some more')
+
+    def testSucceeded(self):
+        LogTest.testSucceeded(self)
+        self.assertEqual(self.store.read('testme'), '')
+
+    def testAborted(self):
+        LogTest.testAborted(self)
+        self.assertEqual(self.store.read('testme'), str(self.log))
+
+
+class TranscriptStoreTest(unittest.TestCase):
+    CORRELATE = TranscriptStore
+
+    def setUp(self):
+        self.tempdir = mkdtemp()
+        self.store = TranscriptStore(self.tempdir, segment_size=50)
+
+    def tearDown(self):
+        rmtree(self.tempdir)
+
+    def testConstructor(self):
+        self.assertEqual(self.store.segment, 0)
+        self.assertRaises(ValueError,
+                          TranscriptStore,
+                          self.tempdir,
+                          compression='foo')
+
+    def testAdd(self):
+        data = self.store.compress(b'x' * 1000)
+        entry1 = self.store.add('one', 1, data)
+        entry2 = self.store.add('two', 1, data, 'error')
+        entry3 = self.store.add('one', 2, self.store.compress(b'foo'))
+        self.assertLess(len(data), 50)
+        self.assertEqual(entry1['segment'], entry2['segment'])
+        self.assertEqual(entry2['offset'], len(data))
+        self.assertEqual(entry2['length'], len(data))
+
+        # Segments are rotated once they are large enough.
+        self.assertEqual(entry3['segment'], entry1['segment'] + 1)
+        self.assertEqual(entry3['offset'], 0)
+        files = sorted(os.listdir(self.tempdir))
+        self.assertEqual(files, ['index.jsonl',
+                                 'transcripts-000000.gz',
+                                 'transcripts-000001.gz'])
+
+        # Rotation continues with the last segment after a restart.
+        store = TranscriptStore(self.tempdir, segment_size=50)
+        self.assertEqual(store.segment, 1)
+        self.assertEqual(store.get_entry('two'), entry2)
+
+    def testGetEntry(self):
+        self.assertEqual(self.store.get_entry('one'), None)
+        entry = self.store.add('one', 1, self.store.compress(b'foo'))
+        self.assertEqual(self.store.get_entry('one'), entry)
+        self.assertEqual(self.store.get_entry('one', 2), None)
+
+    def testReadRaw(self):
+        data = self.store.compress(b'foo')
+        self.store.add('zero', 1, self.store.compress(b'bar'))
+        entry = self.store.add('one', 1, data)
+        self.assertEqual(self.store.read_raw(entry), data)
+
+    def testRead(self):
+        self.assertEqual(self.store.read('one'), None)
+        self.store.add('one', 1, self.store.compress(b'foo'))
+        self.store.add('two', 1, self.store.compress(b'bar'), 'error')
+        self.assertEqual(self.store.read('one'), 'foo')
+        self.assertEqual(self.store.read('two'), 'barerror')
+
+    def testLzma(self):
+        try:
+            store = TranscriptStore(self.tempdir, compression='lzma')
+        except ValueError:
+            return  # lzma is not supported by this Python.
+        data = store.compress(b'foo') + store.compress(b'bar')
+        store.add('one', 1, data)
+        self.assertEqual(store.read('one'), 'foobar')
+        self.assertIn('transcripts-000000.xz', os.listdir(self.tempdir))
+
+        # Empty transcripts, whether pending or stored.
+        log = TranscriptLog('empty', 1, store)
+        self.assertEqual(str(log), '')
+        log.write('foo')
+        self.assertEqual(str(log), 'foo')
+        store.add('empty', 1, b'')
+        self.assertEqual(store.read('empty'), '')
+
+
+def suite():
+    loader = unittest.TestLoader()
+    suite1 = loader.loadTestsFromTestCase(TranscriptLoggerTest)
+    suite2 = loader.loadTestsFromTestCase(TranscriptLogTest)
+    suite3 = loader.loadTestsFromTestCase(TranscriptStoreTest)
+    return unittest.TestSuite((suite1, suite2, suite3))
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,56 @@
+from __future__ import print_function, division
+# This script is not meant to provide an automated test; it lets a number
+# of threads acquire and release accounts from an AccountPool the way the
+# queue's pipe handlers do, and prints the time per acquire/release cycle
+# for increasing pool sizes. With constant-time lookups, the time per
+# cycle stays (roughly) constant.
+#
+# Usage: python accountpool_bench.py [n_accounts...]
+import os
+import sys
+import time
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from Exscript import Account
+from Exscript.account import AccountPool, AccountManager
+
+n_threads = 20
+n_cycles = 10000
+
+
+def worker(accm, hashes, cycles):
+    for n in range(cycles):
+        # Like AccountProxy.for_account_hash() and release().
+        account = accm.get_account_from_hash(hashes[n % len(hashes)])
+        account = accm.acquire_account(account)
+        accm.get_account_from_hash(account.__hash__()).release()
+
+        # Like AccountProxy.for_random_account().
+        account = accm.acquire_account()
+        account.release()
+
+
+def bench(n_accounts):
+    pool = AccountPool([Account('user%d' % n) for n in range(n_accounts)])
+    accm = AccountManager()
+    accm.add_pool(pool)
+    hashes = [account.__hash__() for account in pool.accounts]
+    threads = [threading.Thread(target=worker,
+                                args=(accm, hashes[n::n_threads] or hashes,
+                                      n_cycles // n_threads))
+               for n in range(n_threads)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+    for n_accounts in sizes:
+        elapsed = bench(n_accounts)
+        print('%6d accounts: %6.2fs, %5.1fus/cycle' % (
+            n_accounts, elapsed, elapsed / n_cycles * 1000000))
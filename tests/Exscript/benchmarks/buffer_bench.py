@@ -0,0 +1,59 @@
+from __future__ import print_function, division
+# This script is not meant to provide an automated test; it streams
+# device-like output through a MonitoredBuffer the way the protocol
+# adapters do and prints the throughput for increasing amounts of data.
+# With linear behavior, the throughput stays (roughly) constant.
+#
+# Usage: python buffer_bench.py [megabytes...]
+import os
+import re
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from Exscript.util.buffer import MonitoredBuffer
+
+prompt_re = re.compile(r'[\r\n]router1#$')
+line = u'GigabitEthernet0/0/1 is up, line protocol is up (connected)\n'
+packet = (line * (4096 // len(line) + 1))[:4096]
+
+
+def expect_prompt(buffer):
+    # This is what Protocol.expect() does after each packet.
+    window = buffer.tail(150)
+    match = prompt_re.search(window)
+    if match is None:
+        return None
+    end = buffer.size() - len(window) + match.start()
+    response = buffer.pop(end)
+    buffer.pop(match.end() - match.start())
+    return response
+
+
+def stream(megabytes):
+    """
+    Streams the given amount of data as the response to a single command,
+    such as "show tech-support", with a monitor attached.
+    """
+    buffer = MonitoredBuffer()
+    buffer.add_monitor(r'%ERROR', lambda *args: None)
+    total = megabytes * 1024 * 1024
+    streamed = 0
+    start = time.time()
+    while streamed < total:
+        buffer.append(packet)
+        streamed += len(packet)
+        assert expect_prompt(buffer) is None
+    buffer.append(u'\nrouter1#')
+    response = expect_prompt(buffer)
+    assert len(response) == streamed
+    return streamed, time.time() - start
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [25, 50, 100]
+    for megabytes in sizes:
+        streamed, elapsed = stream(megabytes)
+        print('%4d MB: %6.2fs, %6.1f MB/s' % (megabytes,
+                                              elapsed,
+                                              streamed / elapsed / 1024 / 1024))
@@ -0,0 +1,65 @@
+from __future__ import print_function, division
+# This script is not meant to provide an automated test; it writes a
+# tab-separated host inventory with the given number of rows, and runs
+# a job for each host. It prints the time until the first job starts,
+# once when the hosts are loaded with get_hosts_from_csv() and once when
+# they are streamed with iter_hosts_from_csv(). When streaming, the time
+# to the first job stays (roughly) constant.
+#
+# Usage: python inventory_bench.py [n_hosts...]
+import os
+import sys
+import time
+import threading
+from tempfile import NamedTemporaryFile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from Exscript import Queue
+from Exscript.util.file import get_hosts_from_csv, iter_hosts_from_csv
+
+
+def write_inventory(n_hosts):
+    inventory = NamedTemporaryFile(suffix='.csv')
+    inventory.write(b'address\thostname\tvar\n')
+    for n in range(n_hosts):
+        row = 'dummy://10.0.%d.%d\thost%d\tvalue\n' % (n // 256, n % 256, n)
+        inventory.write(row.encode('utf8'))
+    inventory.flush()
+    return inventory
+
+
+def run(load, filename):
+    """
+    Returns the time until the first job starts, and the total time.
+    """
+    started = threading.Event()
+
+    def first_job(job, host, conn):
+        started.set()
+
+    queue = Queue(verbose=-1, max_threads=5)
+    start = time.time()
+    thread = threading.Thread(target=queue.run,
+                              args=(load(filename), first_job))
+    thread.start()
+    started.wait()
+    first = time.time() - start
+    thread.join()
+    queue.destroy()
+    return first, time.time() - start
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+    print('%10s %10s %16s %12s' % ('hosts', 'loader', 'first job (ms)',
+                                   'total (s)'))
+    for n_hosts in sizes:
+        inventory = write_inventory(n_hosts)
+        for name, load in (('list', get_hosts_from_csv),
+                           ('stream', iter_hosts_from_csv)):
+            first, total = run(load, inventory.name)
+            print('%10d %10s %16.1f %12.2f' % (n_hosts,
+                                               name,
+                                               first * 1000,
+                                               total))
+        inventory.close()
@@ -0,0 +1,118 @@
+from __future__ import print_function, division
+# This script is not meant to provide an automated test; it compares the
+# throughput of the telnetlib IAC parser with the byte-by-byte parser that
+# it replaced, by feeding both the same data through a fake socket.
+#
+# Usage: python telnetlib_bench.py [megabytes]
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from Exscript.protocols import telnetlib
+from Exscript.protocols.telnetlib import IAC, DO, WILL, SB, SE, TTYPE, \
+    NAWS, ECHO, SEND_TTYPE
+
+
+class FakeSocket(object):
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def recv(self, size):
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += len(chunk)
+        return chunk
+
+    def send(self, data):
+        return len(data)
+
+
+class LegacyTelnet(telnetlib.Telnet):
+
+    """
+    The parser as it was before the fast path was added: one recv() of 64
+    bytes at a time, and one rawq_getchar() call per byte.
+    """
+
+    def process_rawq(self):
+        buf = b''
+        try:
+            while self.rawq:
+                char = self.rawq_getchar()
+                if char != IAC:
+                    buf = buf + char
+                    continue
+                command = self.rawq_getchar()
+                if command == IAC:
+                    buf = buf + command
+                elif command in (telnetlib.DO, telnetlib.DONT):
+                    opt = self.rawq_getchar()
+                    self.sock.send(IAC + telnetlib.WONT + opt)
+                elif command == SB:
+                    while self.rawq_getchar() != SE:
+                        pass
+                elif command in (WILL, telnetlib.WONT):
+                    opt = self.rawq_getchar()
+                    self.sock.send(IAC + telnetlib.DONT + opt)
+        except EOFError:
+            pass
+        buf = buf.decode(self.encoding)
+        self.cookedq.write(buf)
+        if self.data_callback is not None:
+            self.data_callback(buf, **self.data_callback_kwargs)
+
+    def rawq_getchar(self):
+        if not self.rawq:
+            self.fill_rawq()
+            if self.eof:
+                raise EOFError
+        c = self.rawq[self.irawq]
+        if not isinstance(c, bytes):
+            c = c.to_bytes((c.bit_length()+7)//8, 'big')
+        self.irawq += 1
+        if self.irawq >= len(self.rawq):
+            self.rawq = b''
+            self.irawq = 0
+        return c
+
+    def fill_rawq(self):
+        if self.irawq >= len(self.rawq):
+            self.rawq = b''
+            self.irawq = 0
+        buf = self.sock.recv(64)
+        self.eof = (not buf)
+        self.rawq = self.rawq + buf
+
+
+def make_data(megabytes):
+    negotiation = (IAC + DO + TTYPE + IAC + WILL + ECHO + IAC + DO + NAWS +
+                   IAC + SB + TTYPE + SEND_TTYPE + IAC + SE)
+    line = b'GigabitEthernet0/0/1 is up, line protocol is up (connected)\r\n'
+    block = line * 100 + IAC + IAC + b'\r\n'
+    count = megabytes * 1024 * 1024 // len(block)
+    return negotiation + block * count
+
+
+def run(cls, data):
+    tn = cls(receive_callback=lambda data: None)
+    tn.sock = FakeSocket(data)
+    start = time.time()
+    while not tn.eof:
+        tn.fill_rawq()
+        tn.process_rawq()
+        tn.cookedq.seek(0)
+        tn.cookedq.truncate()
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    data = make_data(megabytes)
+    for name, cls in (('legacy', LegacyTelnet), ('current', telnetlib.Telnet)):
+        elapsed = run(cls, data)
+        print('%-8s %3d MB: %7.2fs, %7.1f MB/s' % (name,
+                                                  megabytes,
+                                                  elapsed,
+                                                  len(data) / elapsed / 1024 / 1024))
@@ -0,0 +1,122 @@
+from __future__ import print_function, division
+# This script is not meant to provide an automated test; it runs an
+# Exscript template that extracts values from a large device response
+# and prints the time it takes for increasing numbers of lines.
+# With linear behavior, the time per line stays (roughly) constant.
+#
+# It then runs each of the templates in tests/templates, and a template
+# that only does computations, both by walking the parsed token tree and
+# as compiled code, and prints the time per run.
+#
+# Usage: python template_bench.py [n_lines...]
+import os
+import sys
+import time
+dirname = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(dirname, '..', '..', '..'))
+
+from Exscript import Account
+from Exscript.util import template
+from Exscript.protocols import prepare, Dummy
+from Exscript.emulators import IOSEmulator
+
+template_dir = os.path.join(dirname, '..', '..', 'templates')
+n_runs = 200
+
+line = 'GigabitEthernet0/0/%d is up, line protocol is up (connected)'
+
+extract_template = '''{
+  extract /^(\\S+) is up/ as static from lines
+  extract /^(\\S+) is $state/ as dynamic from lines
+}'''
+
+
+def extract(n_lines):
+    """
+    Runs a template with a static and a variable regular expression on
+    the given number of lines.
+    """
+    lines = [line % n for n in range(n_lines)]
+    start = time.time()
+    result = template.eval(None, extract_template, lines=lines, state='up')
+    assert len(result['static']) == n_lines
+    assert len(result['dynamic']) == n_lines
+    return time.time() - start
+
+
+compute_template = '''{
+  total = 0
+  loop from 0 to 20 as i
+    loop items as item
+      if item is "b" and i gt 5
+        total = total + i * 2
+      else
+        total = total + 1
+      end
+    end
+  end
+}'''
+
+
+def connect(name):
+    pseudo = os.path.join(template_dir, name, 'pseudodev.py')
+    if os.path.exists(pseudo):
+        conn = prepare('pseudo://' + pseudo)
+        conn.connect(pseudo)
+    else:
+        conn = Dummy(device=IOSEmulator('dummy', strict=False))
+        conn.connect(name)
+    conn.login(Account('sab', ''), flush=True)
+    return conn
+
+
+def run(program):
+    """
+    Returns the time per run of the given template, when walking the
+    token tree and when running the compiled code.
+    """
+    result = []
+    for compiled in (program.value, program.compile()):
+        program.compiled = compiled
+        start = time.time()
+        for n in range(n_runs):
+            program.execute()
+        result.append((time.time() - start) / n_runs)
+    return result
+
+
+def templates():
+    for name in sorted(os.listdir(template_dir)):
+        conn = connect(name)
+        filename = os.path.join(template_dir, name, 'test.exscript')
+        with open(filename) as fp:
+            program = template._compile(conn,
+                                        filename,
+                                        fp.read(),
+                                        {'strip_command': True},
+                                        slot=10)
+        yield name, run(program)
+        conn.close(force=True)
+
+    program = template._compile(None, None, compute_template, {},
+                                items=['a', 'b', 'c', 'd'])
+    yield 'compute', run(program)
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    print('%10s %12s %14s' % ('lines', 'seconds', 'usec/line'))
+    for n_lines in sizes:
+        elapsed = extract(n_lines)
+        print('%10d %12.3f %14.2f' % (n_lines,
+                                      elapsed,
+                                      elapsed / n_lines * 1e6))
+
+    print()
+    print('%-20s %14s %14s %8s' % ('template', 'tree usec', 'compiled usec',
+                                   'speedup'))
+    for name, (interpreted, compiled) in templates():
+        print('%-20s %14.1f %14.1f %7.2fx' % (name,
+                                               interpreted * 1e6,
+                                               compiled * 1e6,
+                                               interpreted / compiled))
@@ -0,0 +1,41 @@
+from __future__ import print_function, division
+# This script is not meant to provide an automated test; it runs a large
+# number of no-op jobs through a WorkQueue in each of the given modes and
+# prints the throughput. This measures the per-job overhead of the
+# execution mode itself.
+#
+# Usage: python workqueue_bench.py [n_jobs [max_threads [mode...]]]
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from Exscript.workqueue import WorkQueue
+
+
+def nop(job):
+    pass
+
+
+def bench(mode, n_jobs, max_threads):
+    queue = WorkQueue(mode=mode, max_threads=max_threads)
+    queue.pause()
+    for _ in range(n_jobs):
+        queue.enqueue(nop)
+    start = time.time()
+    queue.unpause()
+    queue.wait_until_done()
+    elapsed = time.time() - start
+    workers = len(queue.get_worker_stats())
+    queue.shutdown(False)
+    return elapsed, workers
+
+
+if __name__ == '__main__':
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    max_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    modes = sys.argv[3:] or ['threading', 'thread-pool', 'process-pool']
+    for mode in modes:
+        elapsed, workers = bench(mode, n_jobs, max_threads)
+        print('%-14s %7d jobs in %7.2fs: %9.0f jobs/s (%d pooled workers)'
+              % (mode, n_jobs, elapsed, n_jobs / elapsed, workers))
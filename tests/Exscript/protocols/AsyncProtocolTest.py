@@ -0,0 +1,292 @@
+from __future__ import absolute_import
+import sys
+import unittest
+import re
+import os.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+import time
+from Exscript import Account
+from Exscript.emulators import VirtualDevice
+from Exscript.protocols.exception import TimeoutException, \
+    InvalidCommandException, ExpectCancelledException
+try:
+    import asyncio
+    from Exscript.protocols.asyncprotocol import AsyncProtocol
+except (ImportError, SyntaxError):
+    AsyncProtocol = None
+
+
+@unittest.skipIf(AsyncProtocol is None, 'asyncio is not supported')
+class AsyncProtocolTest(unittest.TestCase):
+
+    """
+    Since protocols.AsyncProtocol is abstract, this test is only a base
+    class for other protocols. It does not do anything fancy on its own.
+    """
+    if AsyncProtocol is not None:
+        CORRELATE = AsyncProtocol
+
+    def setUp(self):
+        self.hostname = '127.0.0.1'
+        self.port = 1236
+        self.user = 'user'
+        self.password = 'password'
+        self.account = Account(self.user, password=self.password)
+        self.daemon = None
+        self.loop = asyncio.new_event_loop()
+
+        self.createVirtualDevice()
+        self.createDaemon()
+        if self.daemon is not None:
+            self.daemon.start()
+            time.sleep(.2)
+        self.createProtocol()
+
+    def tearDown(self):
+        if not self.isAbstract():
+            self.sync(self.protocol.close(True))
+        if self.daemon is not None:
+            self.daemon.exit()
+            self.daemon.join()
+        self.loop.close()
+
+    def createVirtualDevice(self):
+        self.prompt = self.hostname + '> '
+        self.device = VirtualDevice(self.hostname, echo=True)
+        ls_response = '-rw-r--r--  1 sab  nmc    1628 Aug 18 10:02 file'
+        self.device.add_command('ls',   ls_response)
+        self.device.add_command('df',   'foobar')
+        self.device.add_command('exit', '')
+        self.device.add_command('term len 0', '')
+        self.device.add_command('term width 0', '')
+        self.device.add_command('this-command-causes-an-error',
+                                '\ncommand not found')
+
+    def createDaemon(self):
+        pass
+
+    def createProtocol(self):
+        self.protocol = AsyncProtocol(timeout=1, loop=self.loop)
+
+    def isAbstract(self):
+        return self.protocol.__class__ == AsyncProtocol
+
+    def sync(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def doConnect(self):
+        self.sync(self.protocol.connect(self.hostname, self.port))
+
+    def doLogin(self, flush=True):
+        self.doConnect()
+        self.sync(self.protocol.login(self.account, flush=flush))
+
+    def testConstructor(self):
+        self.assertIsInstance(self.protocol, AsyncProtocol)
+        self.assertEqual(self.protocol.loop, self.loop)
+
+    def testConnect(self):
+        if self.isAbstract():
+            self.assertRaises(NotImplementedError, self.doConnect)
+            return
+        self.assertEqual(self.protocol.response, None)
+        self.doConnect()
+        self.assertEqual(self.protocol.response, None)
+        self.assertEqual(self.protocol.get_host(), self.hostname)
+
+    def testAutoinit(self):
+        if self.isAbstract():
+            self.sync(self.protocol.autoinit())
+            return
+        self.doLogin()
+        self.protocol.set_driver('ios')
+        self.sync(self.protocol.autoinit())
+        self.assertTrue(self.protocol.response.startswith('term width 0'))
+
+    def testLogin(self):
+        if self.isAbstract():
+            self.assertRaises(Exception, self.doLogin)
+            return
+        self.doLogin(flush=False)
+        self.assertTrue(self.protocol.response is not None)
+        self.assertTrue(len(self.protocol.response) > 0)
+        self.assertTrue(self.protocol.is_protocol_authenticated())
+        self.assertTrue(self.protocol.is_app_authenticated())
+        self.assertTrue(self.protocol.is_app_authorized())
+        self.assertEqual('shell', self.protocol.guess_os())
+
+    def testLoginSharedAccount(self):
+        # Sessions that wait for a locked account must not starve the
+        # executor that the session holding the account needs.
+        if self.isAbstract():
+            return
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.loop.set_default_executor(executor)
+        cls = self.protocol.__class__
+        protocols = [cls(timeout=5, loop=self.loop) for _ in range(4)]
+
+        async def login(protocol):
+            await protocol.connect(self.hostname, self.port)
+            await protocol.login(self.account)
+            await protocol.close(True)
+
+        async def login_all():
+            logins = asyncio.gather(*[login(p) for p in protocols])
+            await asyncio.wait_for(logins, 20)
+        self.sync(login_all())
+        for protocol in protocols:
+            self.assertTrue(protocol.is_app_authenticated())
+        executor.shutdown()
+
+    def testAuthenticate(self):
+        if self.isAbstract():
+            self.assertRaises(Exception,
+                              self.sync,
+                              self.protocol.authenticate(self.account))
+            return
+        self.doConnect()
+        self.sync(self.protocol.authenticate(self.account, flush=False))
+        self.assertTrue(self.protocol.response is not None)
+        self.assertTrue(self.protocol.is_protocol_authenticated())
+        self.assertTrue(self.protocol.is_app_authenticated())
+        self.assertFalse(self.protocol.is_app_authorized())
+
+    def testProtocolAuthenticate(self):
+        if self.isAbstract():
+            self.sync(self.protocol.protocol_authenticate(self.account))
+            self.assertTrue(self.protocol.is_protocol_authenticated())
+            return
+        self.doConnect()
+        self.sync(self.protocol.protocol_authenticate(self.account))
+        self.assertTrue(self.protocol.is_protocol_authenticated())
+        self.assertFalse(self.protocol.is_app_authenticated())
+        self.assertFalse(self.protocol.is_app_authorized())
+
+    def testAppAuthenticate(self):
+        if self.isAbstract():
+            self.assertRaises(Exception,
+                              self.sync,
+                              self.protocol.app_authenticate(self.account))
+            return
+        self.testProtocolAuthenticate()
+        self.sync(self.protocol.app_authenticate(self.account, False))
+        self.assertTrue(self.protocol.is_protocol_authenticated())
+        self.assertTrue(self.protocol.is_app_authenticated())
+        self.assertFalse(self.protocol.is_app_authorized())
+
+    def testAppAuthorize(self):
+        if self.isAbstract():
+            self.assertRaises(Exception,
+                              self.sync,
+                              self.protocol.app_authorize(self.account))
+            return
+        self.testAppAuthenticate()
+        response = self.protocol.response
+
+        # Authorize should see that a prompt is still in the buffer,
+        # and do nothing.
+        self.sync(self.protocol.app_authorize(self.account, False))
+        self.assertEqual(self.protocol.response, response)
+        self.assertTrue(self.protocol.is_app_authorized())
+
+        # The buffer is now empty, so this must time out.
+        self.sync(self.protocol.app_authorize(self.account, True))
+        self.assertRaises(TimeoutException,
+                          self.sync,
+                          self.protocol.app_authorize(self.account))
+
+    def testAutoAppAuthorize(self):
+        if self.isAbstract():
+            self.assertRaises(TypeError,
+                              self.sync,
+                              self.protocol.auto_app_authorize())
+            return
+        self.testAppAuthenticate()
+        response = self.protocol.response
+
+        # This should do nothing, because our test host does not
+        # support AAA.
+        self.sync(self.protocol.auto_app_authorize(self.account, False))
+        self.assertEqual(self.protocol.response, response)
+        self.assertTrue(self.protocol.is_app_authorized())
+
+    def testExecute(self):
+        if self.isAbstract():
+            self.assertRaises(Exception,
+                              self.sync,
+                              self.protocol.execute('ls'))
+            return
+        self.doLogin()
+        self.sync(self.protocol.execute('ls'))
+        self.assertTrue(self.protocol.response.startswith('ls'))
+
+        # Make sure that we raise an error if the device responds
+        # with something that matches any of the error prompts.
+        self.protocol.set_error_prompt('.')
+        self.assertRaises(InvalidCommandException,
+                          self.sync,
+                          self.protocol.execute('this-command-causes-an-error'))
+
+    def testWaitfor(self):
+        if self.isAbstract():
+            self.assertRaises(Exception,
+                              self.sync,
+                              self.protocol.waitfor('ls'))
+            return
+        self.doLogin()
+        oldresponse = self.protocol.response
+        self.protocol.send('ls\r')
+        self.sync(self.protocol.waitfor(re.compile(r'[\r\n]')))
+        self.assertNotEqual(oldresponse, self.protocol.response)
+        oldresponse = self.protocol.response
+        self.sync(self.protocol.waitfor(re.compile(r'[\r\n]')))
+        self.assertEqual(oldresponse, self.protocol.response)
+
+    def testExpect(self):
+        if self.isAbstract():
+            self.assertRaises(Exception,
+                              self.sync,
+                              self.protocol.expect('ls'))
+            return
+        self.doLogin()
+        oldresponse = self.protocol.response
+        self.protocol.send('ls\r')
+        self.sync(self.protocol.expect(re.compile(r'[\r\n]')))
+        self.assertNotEqual(oldresponse, self.protocol.response)
+
+    def testExpectPrompt(self):
+        if self.isAbstract():
+            self.assertRaises(Exception,
+                              self.sync,
+                              self.protocol.expect_prompt())
+            return
+        self.doLogin()
+        oldresponse = self.protocol.response
+        self.protocol.send('ls\r')
+        self.sync(self.protocol.expect_prompt())
+        self.assertNotEqual(oldresponse, self.protocol.response)
+
+    def testCancelExpect(self):
+        if self.isAbstract():
+            self.protocol.cancel_expect()
+            return
+        self.doLogin()
+        self.loop.call_later(.1, self.protocol.cancel_expect)
+        start = time.time()
+        self.assertRaises(ExpectCancelledException,
+                          self.sync,
+                          self.protocol.expect('notgoingtohappen'))
+        self.assertLess(time.time() - start, 1)
+
+    def testClose(self):
+        if not self.isAbstract():
+            self.doConnect()
+        self.sync(self.protocol.close(True))
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(AsyncProtocolTest)
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
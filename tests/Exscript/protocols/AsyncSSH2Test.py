@@ -0,0 +1,38 @@
+from __future__ import absolute_import
+import sys
+import unittest
+import os.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from .AsyncProtocolTest import AsyncProtocolTest
+from Exscript.servers import SSHd
+from Exscript import PrivateKey
+try:
+    from Exscript.protocols.asyncssh2 import AsyncSSH2
+except (ImportError, SyntaxError):
+    AsyncSSH2 = None
+
+keyfile = os.path.join(os.path.dirname(__file__), 'id_rsa')
+key = PrivateKey.from_file(keyfile)
+
+
+@unittest.skipIf(AsyncSSH2 is None, 'asyncio is not supported')
+class AsyncSSH2Test(AsyncProtocolTest):
+    if AsyncSSH2 is not None:
+        CORRELATE = AsyncSSH2
+
+    def createDaemon(self):
+        self.daemon = SSHd(self.hostname, self.port, self.device, key=key)
+
+    def createProtocol(self):
+        self.protocol = AsyncSSH2(timeout=1, loop=self.loop)
+
+    def testConstructor(self):
+        self.assertIsInstance(self.protocol, AsyncSSH2)
+        self.assertEqual(self.protocol.loop, self.loop)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(AsyncSSH2Test)
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,77 @@
+from __future__ import absolute_import
+import sys
+import unittest
+import os.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from .AsyncProtocolTest import AsyncProtocolTest
+from Exscript.servers import Telnetd
+try:
+    from Exscript.protocols.asynctelnet import AsyncTelnet, _complete_length
+except (ImportError, SyntaxError):
+    AsyncTelnet = None
+
+
+@unittest.skipIf(AsyncTelnet is None, 'asyncio is not supported')
+class AsyncTelnetTest(AsyncProtocolTest):
+    if AsyncTelnet is not None:
+        CORRELATE = AsyncTelnet
+
+    def createDaemon(self):
+        self.daemon = Telnetd(self.hostname, self.port, self.device)
+
+    def createProtocol(self):
+        self.protocol = AsyncTelnet(timeout=1, loop=self.loop)
+
+    def testConstructor(self):
+        self.assertIsInstance(self.protocol, AsyncTelnet)
+
+    def testCompleteLength(self):
+        self.assertEqual(_complete_length(b'abc'), 3)
+        self.assertEqual(_complete_length(b'abc\xff'), 3)
+        self.assertEqual(_complete_length(b'abc\xff\xfd'), 3)
+        self.assertEqual(_complete_length(b'abc\xff\xfd\x18'), 6)
+        self.assertEqual(_complete_length(b'a\xff\xff'), 3)
+        self.assertEqual(_complete_length(b'a\xff\xfa\x18\x01\xff'), 1)
+        self.assertEqual(_complete_length(b'a\xff\xfa\x18\x01\xff\xf0b'), 8)
+
+    def testDataReceived(self):
+        sent = []
+        self.doConnect()
+        self.protocol.tn.sock.send = sent.append
+
+        # Split an IAC DO TTYPE sequence across two packets.
+        self.protocol._telnet_data_received(b'foo\xff\xfd')
+        self.assertEqual(str(self.protocol.buffer), 'foo')
+        self.assertEqual(sent, [])
+        self.protocol._telnet_data_received(b'\x18bar')
+        self.assertEqual(str(self.protocol.buffer), 'foobar')
+        self.assertEqual(sent, [b'\xff\xfb\x18'])
+
+    def testSend(self):
+        self.doLogin()
+        self.protocol.send('ls\r')
+        self.sync(self.protocol.expect_prompt())
+        self.assertTrue(self.protocol.response.startswith('ls'))
+
+    def testConnectError(self):
+        # Nothing listens on the port.
+        self.assertRaises(OSError,
+                          self.sync,
+                          self.protocol.connect(self.hostname, 1))
+        self.assertEqual(self.protocol.tn, None)
+        self.sync(self.protocol.close(True))
+
+        # The connection may be retried.
+        self.doConnect()
+        self.assertEqual(self.protocol.get_host(), self.hostname)
+
+    def testInteract(self):
+        # Not supported; inherited from Protocol.
+        self.assertRaises(NotImplementedError, self.protocol.interact)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(AsyncTelnetTest)
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
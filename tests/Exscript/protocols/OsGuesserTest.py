@@ -78,6 +78,42 @@ class OsGuesserTest(unittest.TestCase):
                 osg.data_received(char, False)
             self.assertEqual(osg.get('os'), osname)
 
+            # Long banners are not kept in memory completely, but are
+            # still matched like they were.
+            data = 'Unauthorized access is prohibited.\r\n' * 150 + banner
+            osg = OsGuesser()
+            unlimited = OsGuesser()
+            unlimited.head_size = sys.maxsize
+            for i in range(0, len(data), 500):
+                osg.data_received(data[i:i + 500], False)
+                unlimited.data_received(data[i:i + 500], False)
+                self.assertLessEqual(len(osg.auth_buffer), osg.head_size + 1)
+            self.assertEqual(osg.get('os'), unlimited.get('os'))
+
+        # A confident guess may still be replaced by a better one.
+        osg = OsGuesser()
+        osg.set('os', 'sros', 95)
+        osg.data_received('Arbor Networks Peakflow SP', False)
+        self.assertEqual(osg.get('os'), 'arbor_peakflow')
+
+        # Drivers that can not beat the current guess are not checked.
+        osg = OsGuesser()
+        osg.set('os', 'sros', 95)
+        candidates = osg._candidates(osg.auth_os_map)
+        self.assertEqual([f.__self__.name for f in candidates],
+                         ['arbor_peakflow'])
+
+        # A guess is certain at the highest confidence of any driver.
+        self.assertEqual(osg.sure, 97)
+
+        # Once the guess is certain, the head is no longer checked.
+        osg = OsGuesser()
+        osg.set('os', 'ios', osg.sure)
+        osg.data_received('Cisco Nexus Operating System (NX-OS) Software',
+                          False)
+        self.assertEqual(osg.get('os'), 'ios')
+        self.assertEqual(osg.auth_buffer, '')
+
     def testProtocolInfo(self):
         osg = OsGuesser()
         osg.protocol_info('')
@@ -0,0 +1,166 @@
+import sys
+import unittest
+import re
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from Exscript.util.buffer import MonitoredBuffer
+from Exscript.protocols.matcher import PromptMatcher, PromptSet, combine
+from Exscript.protocols.drivers.hp_pro_curve import HPProCurveDriver
+
+
+class PromptMatcherTest(unittest.TestCase):
+    CORRELATE = PromptMatcher
+
+    def setUp(self):
+        self.buffer = MonitoredBuffer()
+        self.matcher = PromptMatcher(self.buffer)
+
+    def testConstructor(self):
+        self.assertIsInstance(self.matcher, PromptMatcher)
+        self.assertEqual(self.matcher.buffer, self.buffer)
+
+    def testReset(self):
+        prompt = [re.compile(r'foo')]
+        self.buffer.append('foo' + 'x' * 200)
+        self.assertEqual(self.matcher.search(prompt)[0], 0)
+
+        # Data before the window is considered searched after a reset.
+        self.matcher.reset()
+        self.assertEqual(self.matcher.search(prompt), None)
+        self.matcher.reset()
+        self.assertEqual(self.matcher.search(prompt, window=300)[0], 0)
+
+    def testSearch(self):
+        prompts = [re.compile(r'bar'), re.compile(r'[\r\n]\w+#')]
+        self.matcher.reset()
+        self.assertEqual(self.matcher.search(prompts), None)
+
+        # New data is searched completely, even if it exceeds the window.
+        self.buffer.append('hello\nrouter#' + 'x' * 1000)
+        n, match, start, end = self.matcher.search(prompts, window=10)
+        self.assertEqual(n, 1)
+        self.assertEqual(match.group(0), '\nrouter#')
+        self.assertEqual((start, end), (5, 13))
+
+        # A prompt that spans two chunks is found through the overlap.
+        self.buffer.pop(self.buffer.size())
+        self.matcher.reset()
+        self.buffer.append('abc\nswi')
+        self.assertEqual(self.matcher.search(prompts), None)
+        self.buffer.append('tch# bar')
+        n, match, start, end = self.matcher.search(prompts)
+        self.assertEqual(n, 0)
+        self.assertEqual((start, end), (12, 15))
+
+        # Without an overlap, only new data is searched.
+        self.buffer.pop(self.buffer.size())
+        self.matcher.reset()
+        self.buffer.append('ba')
+        self.assertEqual(self.matcher.search(prompts, window=0), None)
+        self.buffer.append('r')
+        self.assertEqual(self.matcher.search(prompts, window=0), None)
+
+        # The first regular expression in the list wins, no matter
+        # where it matches.
+        self.buffer.append('\nhost# bar')
+        n, match, start, end = self.matcher.search(prompts)
+        self.assertEqual(n, 0)
+        self.assertEqual(self.buffer.head(end)[start:], 'bar')
+        self.assertEqual(start, 0)
+
+    def testSearchWithCleanup(self):
+        calls = []
+        cleanup = HPProCurveDriver().clean_response_for_re_match
+
+        def counting_cleanup(response):
+            calls.append(response)
+            return cleanup(response)
+
+        prompts = [re.compile(r'[\r\n]switch# $')]
+        self.matcher.reset()
+        self.buffer.append('\x1b[1;24r\x1b[24;1H\r\nswi')
+        result = self.matcher.search(prompts, cleanup=counting_cleanup)
+        self.assertEqual(result, None)
+
+        # Escape sequences that are split across chunks are cleaned once
+        # they are complete.
+        self.buffer.append('tch# \x1b[')
+        n, match, start, end = self.matcher.search(prompts,
+                                                   cleanup=counting_cleanup)
+        self.assertEqual(match.group(0), '\nswitch# ')
+        self.assertEqual(self.buffer.head(end)[start:], '\nswitch# ')
+
+        # Every chunk is cleaned only once.
+        self.buffer.append('2K\r\nswitch# ')
+        n, match, start, end = self.matcher.search(prompts,
+                                                   cleanup=counting_cleanup)
+        self.assertEqual(calls, ['\x1b[1;24r\x1b[24;1H\r\nswi',
+                                 'tch# \x1b[',
+                                 '\x1b[2K\r\nswitch# '])
+        self.assertEqual((start, end), (29, 38))
+        self.assertEqual(self.buffer.head(end)[start:], '\nswitch# ')
+
+    def testCombine(self):
+        foo = re.compile('foo')
+        bar = re.compile('bar')
+        self.assertEqual(combine([foo]), None)
+        regex = combine([foo, bar])
+        self.assertEqual(regex.search('xbarfoo').group(0), 'bar')
+        self.assertIs(combine([foo, bar]), regex)
+
+        # Expressions with numbered back references, or with flags that
+        # can not be scoped to a group are not combined.
+        self.assertEqual(combine([foo, re.compile(r'(b)\1')]), None)
+        self.assertEqual(combine([foo, re.compile('bar', re.X)]), None)
+        regex = combine([foo, re.compile('bar', re.I)])
+        self.assertEqual(regex.pattern, '(?P<_p0>(?:foo))|(?P<_p1>(?i:bar))')
+        self.assertEqual(regex.search('BARfoo').lastgroup, '_p1')
+
+
+class PromptSetTest(unittest.TestCase):
+    CORRELATE = PromptSet
+
+    def setUp(self):
+        self.foo = re.compile('foo')
+        self.bar = re.compile('bar', re.I)
+        self.prompt_set = PromptSet((('one', [self.foo, self.bar]),
+                                     ('two', 'baz')))
+
+    def testConstructor(self):
+        self.assertIsInstance(self.prompt_set, PromptSet)
+        self.assertEqual(self.prompt_set.prompts[:2], [self.foo, self.bar])
+        self.assertEqual(self.prompt_set.prompts[2].pattern, 'baz')
+        self.assertEqual(self.prompt_set.regex.search('xBaRbaz').lastgroup,
+                         '_p1')
+
+    def testGet(self):
+        self.assertEqual(self.prompt_set.get(1), ('one', self.bar))
+        section, prompt = self.prompt_set.get(2)
+        self.assertEqual(section, 'two')
+        self.assertEqual(prompt.pattern, 'baz')
+
+        # The first prompt in the set takes precedence.
+        buffer = MonitoredBuffer()
+        buffer.append('baz bar foo')
+        matcher = PromptMatcher(buffer)
+        n, match, start, end = matcher.search(self.prompt_set.prompts)
+        self.assertEqual(self.prompt_set.get(n), ('one', self.foo))
+        self.assertEqual((start, end), (8, 11))
+
+        # The set can be searched directly, using its combined regex.
+        matcher.reset()
+        buffer.append(' bar')
+        n, match, start, end = matcher.search(self.prompt_set, 0)
+        self.assertEqual(self.prompt_set.get(n), ('one', self.bar))
+        self.assertEqual((start, end), (12, 15))
+        self.assertEqual(list(self.prompt_set), self.prompt_set.prompts)
+
+
+def suite():
+    loader = unittest.TestLoader()
+    suite1 = loader.loadTestsFromTestCase(PromptMatcherTest)
+    suite2 = loader.loadTestsFromTestCase(PromptSetTest)
+    return unittest.TestSuite((suite1, suite2))
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
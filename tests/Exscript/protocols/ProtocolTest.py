@@ -8,6 +8,7 @@ import os.path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
 import time
+import threading
 from functools import partial
 from configparser import RawConfigParser
 from Exscript import Account, PrivateKey
@@ -16,6 +17,7 @@ from Exscript.protocols.exception import TimeoutException, \
     InvalidCommandException, ExpectCancelledException
 from Exscript.protocols import drivers
 from Exscript.protocols.protocol import Protocol
+from Exscript.util import timing
 
 
 class ProtocolTest(unittest.TestCase):
@@ -190,10 +192,11 @@ class ProtocolTest(unittest.TestCase):
     def testAutoinit(self):
         self.protocol.autoinit()
 
-    def _test_prompt_setter(self, getter, setter):
+    def _test_prompt_setter(self, getter, setter, login=False):
         initial_regex = getter()
         self.assertIsInstance(initial_regex, list)
         self.assertTrue(hasattr(initial_regex[0], 'groups'))
+        login_prompts = self.protocol._get_login_prompts()
 
         my_re = re.compile(r'% username')
         setter(my_re)
@@ -201,28 +204,38 @@ class ProtocolTest(unittest.TestCase):
         self.assertIsInstance(regex, list)
         self.assertTrue(hasattr(regex[0], 'groups'))
         self.assertEqual(regex[0], my_re)
+        if login:
+            self.assertIn(my_re, self.protocol._get_login_prompts().prompts)
 
         setter()
         regex = getter()
         self.assertEqual(regex, initial_regex)
+        if login:
+            self.assertNotIn(my_re,
+                             self.protocol._get_login_prompts().prompts)
+        else:
+            self.assertIs(self.protocol._get_login_prompts(), login_prompts)
 
     def testSetUsernamePrompt(self):
         self._test_prompt_setter(self.protocol.get_username_prompt,
-                                 self.protocol.set_username_prompt)
+                                 self.protocol.set_username_prompt,
+                                 True)
 
     def testGetUsernamePrompt(self):
         pass  # Already tested in testSetUsernamePrompt()
 
     def testSetPasswordPrompt(self):
         self._test_prompt_setter(self.protocol.get_password_prompt,
-                                 self.protocol.set_password_prompt)
+                                 self.protocol.set_password_prompt,
+                                 True)
 
     def testGetPasswordPrompt(self):
         pass  # Already tested in testSetPasswordPrompt()
 
     def testSetPrompt(self):
         self._test_prompt_setter(self.protocol.get_prompt,
-                                 self.protocol.set_prompt)
+                                 self.protocol.set_prompt,
+                                 True)
 
     def testGetPrompt(self):
         pass  # Already tested in testSetPrompt()
@@ -236,7 +249,8 @@ class ProtocolTest(unittest.TestCase):
 
     def testSetLoginErrorPrompt(self):
         self._test_prompt_setter(self.protocol.get_login_error_prompt,
-                                 self.protocol.set_login_error_prompt)
+                                 self.protocol.set_login_error_prompt,
+                                 True)
 
     def testGetLoginErrorPrompt(self):
         pass  # Already tested in testSetLoginErrorPrompt()
@@ -267,6 +281,12 @@ class ProtocolTest(unittest.TestCase):
         self.assertEqual(self.protocol.response, None)
         self.assertEqual(self.protocol.get_host(), self.hostname)
 
+        # A resolved address is used for the socket, but the hostname is
+        # kept.
+        self.protocol.close(force=True)
+        self.protocol.connect('myhost', self.port, address=self.hostname)
+        self.assertEqual(self.protocol.get_host(), 'myhost')
+
     def testLogin(self):
         # Test can not work on the abstract base.
         if self.protocol.__class__ == Protocol:
@@ -455,6 +475,15 @@ class ProtocolTest(unittest.TestCase):
         self.assertTrue(self.protocol.response is not None)
         self.assertTrue(self.protocol.response.startswith('ls'))
 
+        # Commands are timed while the thread is recording.
+        recorder = timing.start_recording()
+        try:
+            self.protocol.execute('ls')
+        finally:
+            timing.stop_recording()
+        self.assertEqual([s['name'] for s in recorder.spans], ['execute'])
+        self.assertEqual(recorder.spans[0]['command'], 'ls')
+
         # Make sure that we raise an error if the device responds
         # with something that matches any of the error prompts.
         self.protocol.set_error_prompt('.')
@@ -551,6 +580,21 @@ class ProtocolTest(unittest.TestCase):
                           self.protocol.expect,
                           'notgoingtohappen')
 
+        # Cancelling from another thread wakes up the waiting call
+        # immediately.
+        if self.protocol.is_dummy():
+            return
+        self.protocol.data_received_event.disconnect(self._cancel_cb)
+        self.protocol.set_timeout(10)
+        timer = threading.Timer(.2, self.protocol.cancel_expect)
+        timer.start()
+        start = time.time()
+        self.assertRaises(ExpectCancelledException,
+                          self.protocol.expect,
+                          'notgoingtohappen')
+        self.assertLess(time.time() - start, 2)
+        timer.join()
+
     def testInteract(self):
         # Test can not work on the abstract base.
         if self.protocol.__class__ == Protocol:
@@ -0,0 +1,101 @@
+from __future__ import absolute_import
+import sys
+import unittest
+import os.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from Exscript.protocols import telnetlib
+from Exscript.protocols.telnetlib import IAC, DO, DONT, WILL, WONT, SB, SE, \
+    TTYPE, NAWS, ECHO, BINARY, SEND_TTYPE, theNULL
+
+
+class FakeSocket(object):
+
+    def __init__(self, packets):
+        self.packets = list(packets)
+        self.sent = []
+
+    def recv(self, size):
+        if not self.packets:
+            return b''
+        return self.packets.pop(0)
+
+    def send(self, data):
+        self.sent.append(data)
+        return len(data)
+
+
+class telnetlibTest(unittest.TestCase):
+
+    def setUp(self):
+        self.received = []
+        self.tn = telnetlib.Telnet(termtype='vt100',
+                                   termsize=(24, 80),
+                                   receive_callback=self.received.append)
+
+    def process(self, *packets):
+        del self.received[:]
+        self.tn.sock = FakeSocket(packets[1:])
+        self.tn.rawq = packets[0]
+        self.tn.irawq = 0
+        self.tn.process_rawq()
+        return ''.join(self.received), b''.join(self.tn.sock.sent)
+
+    def testConstructor(self):
+        self.assertEqual(self.tn.recv_size, telnetlib.RECV_SIZE)
+        tn = telnetlib.Telnet(recv_size=10)
+        self.assertEqual(tn.recv_size, 10)
+
+    def testProcessRawq(self):
+        self.assertEqual(self.process(b'hello world'), ('hello world', b''))
+
+        # IAC IAC is a literal 0xff, NUL bytes are dropped.
+        self.assertEqual(self.process(b'a' + IAC + IAC + b'b\r' + theNULL),
+                         (u'a\xffb\r', b''))
+
+        # Negotiation.
+        data, sent = self.process(b'a' + IAC + DO + TTYPE +
+                                  b'b' + IAC + DO + ECHO +
+                                  IAC + DO + BINARY +
+                                  IAC + DONT + ECHO +
+                                  IAC + WILL + ECHO +
+                                  IAC + WILL + TTYPE +
+                                  IAC + WONT + ECHO + b'c')
+        self.assertEqual(data, 'abc')
+        self.assertEqual(sent, IAC + WILL + TTYPE +
+                               IAC + WONT + ECHO +
+                               IAC + WONT + BINARY +
+                               IAC + WONT + ECHO +
+                               IAC + DO + ECHO +
+                               IAC + DONT + TTYPE +
+                               IAC + DO + ECHO)
+
+        # NAWS also sends the window size.
+        data, sent = self.process(IAC + DO + NAWS)
+        self.assertTrue(self.tn.can_naws)
+        self.assertEqual(sent, IAC + WILL + NAWS +
+                               IAC + SB + NAWS + b'\x00\x50\x00\x18' + IAC + SE)
+
+        # Subnegotiation.
+        data, sent = self.process(b'a' + IAC + SB + NAWS + b'xyz' + SE +
+                                  b'b' + IAC + SB + TTYPE + SEND_TTYPE +
+                                  IAC + SE + b'c')
+        self.assertEqual(data, 'abc')
+        self.assertEqual(sent, IAC + SB + TTYPE + theNULL + b'vt100' + IAC + SE)
+
+    def testProcessRawqIncomplete(self):
+        # Sequences that are split across packets block until the rest
+        # of the sequence was received.
+        data, sent = self.process(b'a' + IAC, DO, TTYPE + b'b')
+        self.assertEqual(data, 'ab')
+        self.assertEqual(sent, IAC + WILL + TTYPE)
+
+        data, sent = self.process(b'a' + IAC + SB + NAWS + b'xy', b'z', SE + b'b')
+        self.assertEqual(data, 'ab')
+        self.assertEqual(sent, b'')
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(telnetlibTest)
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
@@ -27,6 +27,19 @@ class bufferTest(unittest.TestCase):
         b.append('bar')
         self.assertEqual(b.size(), 6)
 
+    def testOffset(self):
+        b = MonitoredBuffer()
+        self.assertEqual(b.offset(), 0)
+        b.append('foobar')
+        self.assertEqual(b.offset(), 0)
+        b.pop(2)
+        self.assertEqual(b.offset(), 2)
+        b.append('doh')
+        self.assertEqual(b.offset(), 2)
+        self.assertEqual(b.offset() + b.size(), 9)
+        b.clear()
+        self.assertEqual(b.offset(), 9)
+
     def testHead(self):
         b = MonitoredBuffer()
         self.assertEqual(str(b), '')
@@ -72,6 +85,16 @@ class bufferTest(unittest.TestCase):
         self.assertEqual(b.pop(10), 'obardoh')
         self.assertEqual(str(b), '')
 
+        # Pop across chunk boundaries.
+        b.append('a' * 5000)
+        b.append('b' * 5000)
+        b.append('c')
+        self.assertEqual(b.pop(4999), 'a' * 4999)
+        self.assertEqual(b.pop(2), 'ab')
+        self.assertEqual(b.head(2), 'bb')
+        self.assertEqual(b.tail(3), 'bbc')
+        self.assertEqual(b.size(), 5000)
+
     def testAppend(self):
         b = MonitoredBuffer()
         self.assertEqual(str(b), '')
@@ -128,6 +151,18 @@ class bufferTest(unittest.TestCase):
         self.assertEqual(data.get('args')[1].group(0), 'abc')
         self.assertEqual(data.get('kwargs'), {})
 
+        # Data that was popped from the buffer does not affect the
+        # position of the last match.
+        data.pop('args')
+        b.pop(b.size())
+        b.append('bbb')
+        self.assertEqual(data, {'kwargs': {}})
+
+        # A match that is far behind the start of a large packet is still
+        # found.
+        b.append('abc' + 'x' * 1000)
+        self.assertEqual(data.get('args')[1].group(0), 'abc')
+
 
 def suite():
     return unittest.TestLoader().loadTestsFromTestCase(bufferTest)
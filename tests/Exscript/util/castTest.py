@@ -51,6 +51,15 @@ class castTest(unittest.TestCase):
         self.assertIsInstance(result[0], Host)
         self.assertIsInstance(result[1], Host)
 
+    def testIterHosts(self):
+        from Exscript.util.cast import iter_hosts
+        hosts = (h for h in ['localhost', Host('1.2.3.4')])
+        result = iter_hosts(hosts, default_domain='test')
+        self.assertEqual(next(result).get_address(), 'localhost.test')
+        self.assertEqual(next(result).get_address(), '1.2.3.4')
+        self.assertRaises(StopIteration, next, result)
+        self.assertRaises(TypeError, list, iter_hosts(None))
+
     def testToRegex(self):
         from Exscript.util.cast import to_regex
         self.assertTrue(hasattr(to_regex('regex'), 'match'))
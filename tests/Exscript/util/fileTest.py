@@ -69,6 +69,32 @@ class fileTest(unittest.TestCase):
         self.assertEqual(hostnames, expected_hosts)
         self.assertEqual(testvars, ['blah' for h in result])
 
+    def testIterHostsFromFile(self):
+        from Exscript.util.file import iter_hosts_from_file
+        self.assertRaises(IOError, iter_hosts_from_file, 'nonexistent')
+        result = iter_hosts_from_file(self.host_file.name)
+        self.assertEqual(next(result).get_name(), expected_hosts[0])
+        self.assertEqual([h.get_name() for h in result], expected_hosts[1:])
+
+    def testIterHostsFromCsv(self):
+        from Exscript.util.file import iter_hosts_from_csv
+        self.assertRaises(IOError, iter_hosts_from_csv, 'nonexistent')
+        self.assertRaises(Exception, iter_hosts_from_csv, self.host_file.name)
+
+        # Consecutive lines of the same host are merged.
+        with NamedTemporaryFile() as csv_file:
+            csv_file.write(b'address	test\n'
+                           b'host1	one\n'
+                           b'host1	two\n'
+                           b'host2	three\n')
+            csv_file.flush()
+            result = iter_hosts_from_csv(csv_file.name)
+            host1 = next(result)
+            self.assertEqual(host1.get('test'), ['one', 'two'])
+            host2, = list(result)
+            self.assertEqual(host2.get_address(), 'host2')
+            self.assertEqual(host2.get('test'), ['three'])
+
     def testLoadLib(self):
         from Exscript.util.file import load_lib
         functions = load_lib(self.lib_file.name)
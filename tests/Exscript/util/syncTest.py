@@ -0,0 +1,60 @@
+import sys
+import unittest
+import re
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+import threading
+from Exscript.util.sync import SyncBackend, get_backend, \
+    set_default_backend
+
+
+class syncTest(unittest.TestCase):
+    CORRELATE = SyncBackend
+
+    def setUp(self):
+        self.backend = SyncBackend('threading', threading)
+
+    def tearDown(self):
+        set_default_backend('threading')
+
+    def testConstructor(self):
+        self.assertEqual(self.backend.name, 'threading')
+        self.assertEqual(self.backend.module, threading)
+
+    def testLock(self):
+        lock = self.backend.lock()
+        self.assertTrue(lock.acquire(False))
+        self.assertFalse(lock.acquire(False))
+        lock.release()
+
+    def testRlock(self):
+        lock = self.backend.rlock()
+        self.assertTrue(lock.acquire(False))
+        self.assertTrue(lock.acquire(False))
+        lock.release()
+        lock.release()
+
+    def testCondition(self):
+        lock = self.backend.lock()
+        cond = self.backend.condition(lock)
+        with cond:
+            self.assertFalse(lock.acquire(False))
+            cond.notify()
+        self.assertIsNotNone(self.backend.condition())
+
+    def testGetBackend(self):
+        self.assertEqual(get_backend().name, 'threading')
+        self.assertEqual(get_backend('multiprocessing').name,
+                         'multiprocessing')
+        self.assertEqual(get_backend(self.backend), self.backend)
+        self.assertRaises(ValueError, get_backend, 'foo')
+
+        set_default_backend('multiprocessing')
+        self.assertEqual(get_backend().name, 'multiprocessing')
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(syncTest)
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,104 @@
+import sys
+import unittest
+import re
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from tempfile import mkstemp
+from Exscript.util import template
+from Exscript.util.template import TemplateCache
+
+
+class TemplateCacheTest(unittest.TestCase):
+    CORRELATE = TemplateCache
+
+    def setUp(self):
+        self.cache = TemplateCache(max_templates=2)
+        self.compiled = []
+
+    def compile(self):
+        compiled = object()
+        self.compiled.append(compiled)
+        return compiled
+
+    def testConstructor(self):
+        self.assertEqual(self.cache.max_templates, 2)
+        self.assertEqual(self.cache.hits, 0)
+        self.assertEqual(self.cache.misses, 0)
+
+    def testCheckout(self):
+        one = self.cache.checkout('one', self.compile)
+        self.assertEqual(self.compiled, [one])
+
+        # A template that is in use is not handed out twice.
+        two = self.cache.checkout('one', self.compile)
+        self.assertEqual(self.compiled, [one, two])
+        self.cache.checkin('one', one)
+        self.cache.checkin('one', two)
+        self.assertEqual(self.cache.checkout('one', self.compile), two)
+        self.assertEqual(self.cache.checkout('one', self.compile), one)
+        self.assertEqual(self.cache.hits, 2)
+        self.assertEqual(self.cache.misses, 2)
+
+    def testCheckin(self):
+        for key in ('one', 'two', 'three'):
+            self.cache.checkin(key, self.cache.checkout(key, self.compile))
+
+        # The least recently used template was dropped.
+        self.assertEqual(list(self.cache.templates), ['two', 'three'])
+        self.cache.checkout('one', self.compile)
+        self.assertEqual(len(self.compiled), 4)
+
+    def testClear(self):
+        self.cache.checkin('one', self.cache.checkout('one', self.compile))
+        self.cache.clear()
+        self.cache.checkout('one', self.compile)
+        self.assertEqual(len(self.compiled), 2)
+
+
+class templateTest(unittest.TestCase):
+
+    def setUp(self):
+        template.cache.clear()
+
+    def testEval(self):
+        misses = template.cache.misses
+        result = template.eval(None, '{x = y}', y='one')
+        self.assertEqual(result['x'], ['one'])
+
+        # The cached template is executed with the new variables.
+        result = template.eval(None, '{x = y}', y=['two'])
+        self.assertEqual(result['x'], ['two'])
+        self.assertEqual(template.cache.misses, misses + 1)
+
+        # Variables must still be defined when the template is compiled.
+        self.assertRaises(ValueError, template.eval, None, '{x = y}')
+
+    def testEvalFile(self):
+        fd, filename = mkstemp()
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                fp.write('{x = y}')
+            misses = template.cache.misses
+            result = template.eval_file(None, filename, y='one')
+            self.assertEqual(result['x'], ['one'])
+            self.assertEqual(result['__filename__'], [filename])
+            template.eval_file(None, filename, y='one')
+            self.assertEqual(template.cache.misses, misses + 1)
+
+            # A changed file is compiled again.
+            with open(filename, 'w') as fp:
+                fp.write('{x = y}{z = y}')
+            result = template.eval_file(None, filename, y='two')
+            self.assertEqual(result['z'], ['two'])
+        finally:
+            os.remove(filename)
+
+
+def suite():
+    loader = unittest.TestLoader()
+    suite1 = loader.loadTestsFromTestCase(TemplateCacheTest)
+    suite2 = loader.loadTestsFromTestCase(templateTest)
+    return unittest.TestSuite((suite1, suite2))
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
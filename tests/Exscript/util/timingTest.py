@@ -0,0 +1,121 @@
+import sys
+import unittest
+import re
+import os
+import json
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from tempfile import mkstemp
+from Exscript.util import timing
+from Exscript.util.timing import Recorder, JsonLinesExporter
+
+
+class RecorderTest(unittest.TestCase):
+    CORRELATE = Recorder
+
+    def setUp(self):
+        self.recorder = Recorder()
+
+    def testConstructor(self):
+        self.assertEqual(self.recorder.spans, [])
+
+    def testAdd(self):
+        self.recorder.add('test', 10.0, 12.5, foo='bar')
+        self.assertEqual(self.recorder.spans, [{'name': 'test',
+                                                'start': 10.0,
+                                                'duration': 2.5,
+                                                'foo': 'bar'}])
+
+    def testSpan(self):
+        with self.recorder.span('one', foo='bar'):
+            pass
+        try:
+            with self.recorder.span('two'):
+                raise ValueError()
+        except ValueError:
+            pass
+        one, two = self.recorder.spans
+        self.assertEqual(one['name'], 'one')
+        self.assertEqual(one['foo'], 'bar')
+        self.assertTrue(one['duration'] >= 0)
+        self.assertEqual(two['error'], 'ValueError')
+
+
+class JsonLinesExporterTest(unittest.TestCase):
+    CORRELATE = JsonLinesExporter
+
+    def setUp(self):
+        fd, self.filename = mkstemp()
+        os.close(fd)
+        self.exporter = JsonLinesExporter(self.filename)
+
+    def tearDown(self):
+        self.exporter.close()
+        os.remove(self.filename)
+
+    def testConstructor(self):
+        self.assertEqual(self.exporter.filename, self.filename)
+
+    def testCall(self):
+        spans = [{'name': 'connect', 'start': 1.0, 'duration': 0.5}]
+        self.exporter('host1', 1, spans)
+        self.exporter('host2', 2, [])
+        with open(self.filename) as fp:
+            lines = [json.loads(line) for line in fp]
+        self.assertEqual(lines, [
+            {'job': 'host1', 'attempt': 1, 'spans': spans},
+            {'job': 'host2', 'attempt': 2, 'spans': []}])
+
+    def testClose(self):
+        self.exporter.close()
+        self.assertRaises(ValueError, self.exporter, 'host1', 1, [])
+
+
+class timingTest(unittest.TestCase):
+    CORRELATE = timing
+
+    def tearDown(self):
+        timing.stop_recording()
+
+    def testStartRecording(self):
+        recorder = timing.start_recording()
+        with timing.span('test'):
+            pass
+        self.assertEqual([s['name'] for s in recorder.spans], ['test'])
+
+        # Other threads are not recorded.
+        def run():
+            with timing.span('other'):
+                pass
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(recorder.spans), 1)
+
+    def testStopRecording(self):
+        self.assertEqual(timing.stop_recording(), None)
+        recorder = timing.start_recording()
+        self.assertEqual(timing.stop_recording(), recorder)
+        with timing.span('test'):
+            pass
+        self.assertEqual(recorder.spans, [])
+
+    def testSpan(self):
+        # Without a recorder, the span does nothing.
+        with timing.span('test', foo='bar'):
+            pass
+        recorder = timing.start_recording()
+        with timing.span('test', foo='bar'):
+            pass
+        self.assertEqual(recorder.spans[0]['foo'], 'bar')
+
+
+def suite():
+    loader = unittest.TestLoader()
+    suite1 = loader.loadTestsFromTestCase(RecorderTest)
+    suite2 = loader.loadTestsFromTestCase(JsonLinesExporterTest)
+    suite3 = loader.loadTestsFromTestCase(timingTest)
+    return unittest.TestSuite((suite1, suite2, suite3))
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
@@ -13,6 +13,10 @@ urls = [
      'telnet://testhost:23'),
     ('testhost?myvar=testvalue',
      'telnet://testhost:23?myvar=testvalue'),
+    ('test-host_1.example.com',
+     'telnet://test-host_1.example.com:23'),
+    ('10.0.0.1',
+     'telnet://10.0.0.1:23'),
 
     # No protocol + empty user.
     ('@testhost',
@@ -0,0 +1,62 @@
+import sys
+import unittest
+import os
+import select
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from Exscript.util.wakeup import Wakeup
+
+
+class wakeupTest(unittest.TestCase):
+    CORRELATE = Wakeup
+
+    def setUp(self):
+        self.wakeup = Wakeup()
+
+    def tearDown(self):
+        self.wakeup.close()
+
+    def isReadable(self, timeout=0):
+        r, w, x = select.select([self.wakeup], [], [], timeout)
+        return r == [self.wakeup]
+
+    def testConstructor(self):
+        self.assertFalse(self.isReadable())
+
+    def testFileno(self):
+        self.assertIsInstance(self.wakeup.fileno(), int)
+
+    def testWake(self):
+        self.wakeup.wake()
+        self.assertTrue(self.isReadable())
+        self.wakeup.wake()
+        self.assertTrue(self.isReadable())
+
+        # Waking up a select() call in another thread.
+        self.wakeup.clear()
+        timer = threading.Timer(.1, self.wakeup.wake)
+        timer.start()
+        start = time.time()
+        self.assertTrue(self.isReadable(5))
+        self.assertLess(time.time() - start, 2)
+        timer.join()
+
+    def testClear(self):
+        self.wakeup.clear()
+        self.assertFalse(self.isReadable())
+        self.wakeup.wake()
+        self.wakeup.wake()
+        self.wakeup.clear()
+        self.assertFalse(self.isReadable())
+
+    def testClose(self):
+        self.wakeup.close()
+        self.assertRaises(Exception, self.wakeup.wake)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(wakeupTest)
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())
@@ -10,7 +10,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 from multiprocessing import Pipe
 from tempfile import NamedTemporaryFile
 from pickle import dumps, loads
-from Exscript.workqueue.job import Thread, Process, Job
+from Exscript.workqueue.job import Thread, Process, Inline, Job
 
 
 def do_nothing(job):
@@ -42,6 +42,28 @@ class ProcessTest(ThreadTest):
     CORRELATE = Process
 
 
+class InlineTest(unittest.TestCase):
+    CORRELATE = Inline
+
+    def testConstructor(self):
+        job = Inline(1, do_nothing, 'myaction', None)
+        self.assertEqual(do_nothing, job.function)
+        self.assertEqual(job.failures, 0)
+
+    def testStart(self):
+        results = []
+        job = Inline(1, do_nothing, 'myaction', None)
+        job.start(results.append)
+        self.assertEqual(results, [None])
+
+        def fail(job):
+            raise Exception('intentional error')
+        job = Inline(1, fail, 'myaction', None)
+        job.start(results.append)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(str(results[1][1]), 'intentional error')
+
+
 class JobTest(unittest.TestCase):
 
     def testConstructor(self):
@@ -63,7 +85,8 @@ def suite():
     loader = unittest.TestLoader()
     suite1 = loader.loadTestsFromTestCase(ThreadTest)
     suite2 = loader.loadTestsFromTestCase(ProcessTest)
-    suite3 = loader.loadTestsFromTestCase(JobTest)
-    return unittest.TestSuite((suite1, suite2, suite3))
+    suite3 = loader.loadTestsFromTestCase(InlineTest)
+    suite4 = loader.loadTestsFromTestCase(JobTest)
+    return unittest.TestSuite((suite1, suite2, suite3, suite4))
 if __name__ == '__main__':
     unittest.TextTestRunner(verbosity=2).run(suite())
@@ -273,6 +273,26 @@ class PipelineTest(unittest.TestCase):
         self.pipeline.wait_all()  # Must not deadlock.
         self.assertEqual(len(self.pipeline), 0)
 
+    def testWaitForLength(self):
+        self.pipeline.wait_for_length(0)  # Must return immediately.
+        for n in range(3):
+            self.pipeline.append(object())
+
+        class complete_all(Thread):
+
+            def run(inner_self):
+                while True:
+                    task = next(self.pipeline)
+                    if task is None:
+                        break
+                    self.pipeline.task_done(task)
+        thread = complete_all()
+        thread.daemon = True
+        thread.start()
+
+        self.pipeline.wait_for_length(1)  # Must not deadlock.
+        self.assertTrue(len(self.pipeline) <= 1)
+
     def testWithLock(self):
         result = self.pipeline.with_lock(lambda p, x: x, 'test')
         self.assertEqual(result, 'test')
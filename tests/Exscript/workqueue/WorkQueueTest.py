@@ -29,9 +29,15 @@ nop = lambda x: None
 
 class WorkQueueTest(unittest.TestCase):
     CORRELATE = WorkQueue
+    mode = 'threading'
 
     def setUp(self):
-        self.wq = WorkQueue()
+        self.wq = WorkQueue(mode=self.mode)
+
+    def tearDown(self):
+        if self.wq.main_loop is not None:
+            self.wq.set_debug(0)
+            self.wq.destroy()
 
     def testConstructor(self):
         self.assertEqual(1, self.wq.get_max_threads())
@@ -142,6 +148,15 @@ class WorkQueueTest(unittest.TestCase):
     def testWaitUntilDone(self):
         pass  # See testEnqueue()
 
+    def testWaitUntilLength(self):
+        self.wq.pause()
+        for n in range(3):
+            self.wq.enqueue(nop)
+        self.assertEqual(3, self.wq.get_length())
+        self.wq.unpause()
+        self.wq.wait_until_length(1)
+        self.assertTrue(self.wq.get_length() <= 1)
+
     def testShutdown(self):
         pass  # See testEnqueue()
 
@@ -174,11 +189,61 @@ class WorkQueueTest(unittest.TestCase):
         self.wq.shutdown(True)
         self.assertEqual(self.wq.get_running_jobs(), [])
 
+    def testGetWorkerStats(self):
+        self.assertEqual(self.wq.get_worker_stats(), [])
+        self.wq.enqueue(nop)
+        self.wq.wait_until_done()
+        if self.wq.pool is None:
+            self.assertEqual(self.wq.get_worker_stats(), [])
+            return
+        stats = self.wq.get_worker_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['jobs'], 1)
+        self.assertTrue(0 <= stats[0]['utilization'] <= 1)
+        self.wq.shutdown(True)
+        self.assertEqual(self.wq.get_worker_stats(), [])
+
     def testGetLength(self):
         pass  # See testEnqueue()
 
 
+class WorkQueueTestThreadPool(WorkQueueTest):
+    mode = 'thread-pool'
+
+    def testFailure(self):
+        def fail(job):
+            raise Exception('intentional error')
+        errors = []
+        self.wq.job_error_event.connect(lambda job, exc: errors.append(exc))
+        self.wq.enqueue(fail, times=2)
+        self.wq.wait_until_done()
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(str(errors[0][1]), 'intentional error')
+
+
+class WorkQueueTestProcessPool(WorkQueueTestThreadPool):
+    mode = 'process-pool'
+
+    def testRecycle(self):
+        self.wq.destroy()
+        self.wq = WorkQueue(mode=self.mode, max_jobs_per_worker=2)
+        data = Value('i', 0)
+        self.wq.pause()
+        for _ in range(5):
+            self.wq.enqueue(burn_time, data=data)
+        self.wq.unpause()
+        self.wq.wait_until_done()
+        self.assertEqual(data.value, 5)
+        stats = self.wq.get_worker_stats()
+        self.assertTrue(len(stats) <= 1)
+        self.assertTrue(all(s['jobs'] < 2 for s in stats))
+
+
 def suite():
-    return unittest.TestLoader().loadTestsFromTestCase(WorkQueueTest)
+    loader = unittest.TestLoader()
+    suite1 = loader.loadTestsFromTestCase(WorkQueueTest)
+    suite2 = loader.loadTestsFromTestCase(WorkQueueTestThreadPool)
+    suite3 = loader.loadTestsFromTestCase(WorkQueueTestProcessPool)
+    return unittest.TestSuite((suite1, suite2, suite3))
 if __name__ == '__main__':
     unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,159 @@
+import sys
+import unittest
+import re
+import os.path
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from multiprocessing import Value
+from Exscript.workqueue.job import Job
+from Exscript.workqueue.pipeline import Pipeline
+from Exscript.workqueue.workerpool import ThreadPool, ProcessPool
+
+
+def increment(job):
+    with job.data['value'].get_lock():
+        job.data['value'].value += job.data.get('step', 1)
+
+
+def fail(job):
+    raise Exception('intentional error')
+
+
+def exit_worker(job):
+    os._exit(1)
+
+
+class ThreadPoolTest(unittest.TestCase):
+    CORRELATE = ThreadPool
+
+    def createPool(self, collection):
+        return ThreadPool(collection)
+
+    def setUp(self):
+        self.collection = Pipeline(2)
+        self.pool = self.createPool(self.collection)
+        self.value = Value('i', 0)
+        self.done = threading.Event()
+        self.results = []
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def on_complete(self, job, exc_info):
+        self.results.append((job, exc_info))
+        self.done.set()
+
+    def createData(self):
+        return {'value': self.value}
+
+    def runJob(self, function, data=None):
+        if data is None:
+            data = self.createData()
+        job = Job(function, 'myaction', 1, data)
+        job.id = self.collection.append(job)
+        self.done.clear()
+        self.pool.start(job, self.on_complete)
+        self.assertTrue(self.done.wait(10))
+        return job
+
+    def testConstructor(self):
+        self.assertEqual(self.pool.get_stats(), [])
+
+    def testStart(self):
+        job = self.runJob(increment)
+        self.assertEqual(self.results, [(job, None)])
+        self.assertEqual(job.child.name, 'myaction')
+        self.assertEqual(self.value.value, 1)
+
+        # The idle worker is reused.
+        self.runJob(increment)
+        self.assertEqual(self.results[1][1], None)
+        self.assertEqual(self.value.value, 2)
+        self.assertEqual(len(self.pool.get_stats()), 1)
+
+        # Errors are passed to the callback.
+        self.runJob(fail)
+        self.assertEqual(str(self.results[2][1][1]), 'intentional error')
+
+        # Data from the worker_init_event is passed to the job.
+        destroyed = []
+        self.pool.shutdown()
+        self.pool.worker_init_event.connect(lambda data: data.update(step=5))
+        self.pool.worker_destroy_event.connect(destroyed.append)
+        self.runJob(increment)
+        self.assertEqual(self.value.value, 7)
+        self.pool.shutdown()
+        self.assertEqual(len(destroyed), 1)
+        self.assertEqual(destroyed[0]['step'], 5)
+
+    def testGetStats(self):
+        self.runJob(increment)
+        stats = self.pool.get_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['jobs'], 1)
+        self.assertTrue(stats[0]['busy'] <= stats[0]['uptime'])
+        self.assertTrue(0 <= stats[0]['utilization'] <= 1)
+
+    def testShutdown(self):
+        self.runJob(increment)
+        name = self.pool.get_stats()[0]['name']
+        self.pool.shutdown()
+        self.assertEqual(self.pool.get_stats(), [])
+        self.runJob(increment)
+        self.assertNotEqual(self.pool.get_stats()[0]['name'], name)
+
+
+class ProcessPoolTest(ThreadPoolTest):
+    CORRELATE = ProcessPool
+
+    def createPool(self, collection):
+        pool = ProcessPool(collection)
+        # Shared memory can only be passed to a process when it is forked.
+        pool.worker_init_event.connect(lambda d: d.update(value=self.value))
+        return pool
+
+    def createData(self):
+        return {}
+
+    def testConstructor(self):
+        ThreadPoolTest.testConstructor(self)
+        self.assertEqual(self.pool.max_jobs, None)
+
+    def testStart(self):
+        ThreadPoolTest.testStart(self)
+
+        # Jobs that were enqueued after the worker was forked are passed
+        # to it, as long as their data can be pickled.
+        self.pool.shutdown()
+        self.pool = self.createPool(self.collection)
+        for _ in range(5):
+            self.runJob(increment, {'step': 2})
+        self.assertEqual(self.value.value, 17)
+        self.assertEqual(len(self.pool.get_stats()), 1)
+        self.assertEqual(self.pool.get_stats()[0]['jobs'], 5)
+        self.assertEqual(self.pool.functions, {})
+
+        # Otherwise, a new worker that knows the job is forked, and the
+        # old one stays available.
+        self.runJob(increment, {'step': 1, 'lock': threading.Lock()})
+        self.assertEqual(self.results[-1][1], None)
+        self.assertEqual(self.value.value, 18)
+        self.assertEqual(len(self.pool.get_stats()), 2)
+
+        # A worker that dies causes the job to fail.
+        self.runJob(exit_worker)
+        self.assertIn('exited with code 1', str(self.results[-1][1][1]))
+
+    def testGetStats(self):
+        ThreadPoolTest.testGetStats(self)
+        self.assertTrue(self.pool.get_stats()[0]['pid'] > 0)
+
+
+def suite():
+    loader = unittest.TestLoader()
+    suite1 = loader.loadTestsFromTestCase(ThreadPoolTest)
+    suite2 = loader.loadTestsFromTestCase(ProcessPoolTest)
+    return unittest.TestSuite((suite1, suite2))
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(suite())